@@ -0,0 +1,112 @@
+import c4d
+import time
+
+#
+# Python tag version of the CopyPose XGroup. Copies global matrices from the joints of one
+# hierarchy to the joints with the same names in another (children can be in different order).
+#
+# Setup: add a Python tag to any object, paste this code and add user data to the tag:
+#   "CopyFrom"  - Link, root joint of the source hierarchy
+#   "CopyTo"    - Link, root joint of the target hierarchy (empty = object the tag is on)
+#   "Time (ms)" - Float, shows the cost of the copy per frame
+#
+# Joints are matched by name only when the hierarchies or their names change, every
+# frame is then one loop of matrix copies and a check of the names.
+#
+
+#Weight of the current frame in the displayed time, lower values give a steadier number
+timeSmoothing = 0.1
+
+#The displayed time is updated every this many executions, every write makes the tag dirty
+timeUpdateInterval = 25
+
+# Kept between executions of the tag, rebuilt when the links, a hierarchy or a name change
+cache = {"key": None, "objects": [], "names": None, "pairs": [], "userdata": None, "userdataDirty": None,
+         "time": None, "executions": 0}
+
+
+def main():
+    ids = get_userdata_ids(op)
+    source = op[ids["CopyFrom"]] if "CopyFrom" in ids else None
+    target = op[ids["CopyTo"]] if "CopyTo" in ids else None
+    if target is None:
+        target = op.GetObject()
+    if source is None or target is None or source == target:
+        return
+
+    start_time = time.perf_counter()
+
+    key = (source.GetGUID(), target.GetGUID(), doc.GetHDirty(c4d.HDIRTYFLAGS_OBJECT_HIERARCHY))
+    if key != cache["key"]:
+        cache["objects"] = get_hierarchy(source) + get_hierarchy(target)
+        cache["key"] = key
+        cache["names"] = None
+
+    # Renaming a joint changes the matches but not the hierarchy
+    names = [obj.GetName() for obj in cache["objects"]]
+    if names != cache["names"]:
+        cache["pairs"] = build_pairs(source, target)
+        cache["names"] = names
+        print("CopyPose: " + str(len(cache["pairs"])) + " joints matched")
+
+    # Pairs are in hierarchy order, parents get their matrix before their children
+    for src, tgt in cache["pairs"]:
+        tgt.SetMg(src.GetMg())
+
+    if "Time (ms)" in ids:
+        elapsed = (time.perf_counter() - start_time) * 1000.0
+        if cache["time"] is None:
+            cache["time"] = elapsed
+        else:
+            cache["time"] += (elapsed - cache["time"]) * timeSmoothing
+        cache["executions"] += 1
+        # Only write now and then and when the shown value changes
+        if (cache["executions"] - 1) % timeUpdateInterval == 0:
+            shown = round(cache["time"], 2)
+            if op[ids["Time (ms)"]] != shown:
+                op[ids["Time (ms)"]] = shown
+
+def get_userdata_ids(tag):
+    """Return the DescID of every user data entry of the tag by name, cached until the user data changes."""
+    dirty = tag.GetDirty(c4d.DIRTYFLAGS_DESCRIPTION)
+    if cache["userdata"] is None or dirty != cache["userdataDirty"]:
+        cache["userdata"] = dict((bc[c4d.DESC_NAME], descId) for descId, bc in tag.GetUserDataContainer())
+        cache["userdataDirty"] = dirty
+    return cache["userdata"]
+
+def get_hierarchy(root):
+    """Return root and all objects below it."""
+    objects = []
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        objects.append(obj)
+        stack.extend(obj.GetChildren())
+    return objects
+
+def build_pairs(source, target):
+    """
+    Match the joints of both hierarchies by name, the same way the XGroup does.
+
+    Children are only matched with children of the matched parent and each source
+    child takes the first target child with the same name.
+
+    Args:
+        source (c4d.BaseObject): Root of the hierarchy to copy from
+        target (c4d.BaseObject): Root of the hierarchy to copy to
+
+    Returns:
+        list[tuple]: (source, target) pairs, parents before their children
+    """
+    pairs = []
+    stack = [(source, target)]
+    while stack:
+        src, tgt = stack.pop()
+        pairs.append((src, tgt))
+        targetChildren = {}
+        for tCh in tgt.GetChildren():
+            targetChildren.setdefault(tCh.GetName(), tCh)
+        matched = [(sCh, targetChildren[sCh.GetName()]) for sCh in src.GetChildren()
+                   if sCh.GetName() in targetChildren]
+        stack.extend(reversed(matched))
+    return pairs
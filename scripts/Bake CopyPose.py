@@ -0,0 +1,231 @@
+import c4d
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# Bakes the pose copied by CopyPose to PSR keyframes on the target joints.
+# Select an object with the CopyPose Python tag, or select the source root and then the
+# target root (for the XGroup), and click Execute.
+#
+# Every frame of the range is evaluated once, the pose is copied with the same name
+# matching as CopyPose and all keys are written at the end, one track per joint and channel.
+# The CopyPose Python tag is disabled afterwards, disable the XPresso tag yourself.
+#
+
+#Change these if you need
+#Frame range, None = start/end of the document
+startFrame = None
+endFrame = None
+
+#if True drop keys that lie on a straight line between their neighbours
+dropLinearKeys = True
+
+#Max difference between the baked value and the remaining keys (cm for position, radians for rotation)
+linearTolerance = 0.001
+
+CHANNELS = [(param, component)
+            for param in (c4d.ID_BASEOBJECT_REL_POSITION, c4d.ID_BASEOBJECT_REL_ROTATION, c4d.ID_BASEOBJECT_REL_SCALE)
+            for component in (c4d.VECTOR_X, c4d.VECTOR_Y, c4d.VECTOR_Z)]
+
+
+def main():
+    doc = c4d.documents.GetActiveDocument()
+    source, target, tag = get_roots(doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_SELECTIONORDER))
+    if source is None or target is None:
+        c4d.gui.MessageDialog("Select an object with a CopyPose tag, or the source root and then the target root.")
+        return
+
+    fps = doc.GetFps()
+    first = startFrame if startFrame is not None else doc.GetMinTime().GetFrame(fps)
+    last = endFrame if endFrame is not None else doc.GetMaxTime().GetFrame(fps)
+    if last < first:
+        c4d.gui.MessageDialog("End frame is before start frame.")
+        return
+
+    start_time = time.perf_counter()
+    current_time = doc.GetTime()
+    doc.StartUndo()
+
+    if tag is not None:
+        # Nothing has to copy the pose anymore once it is baked
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE_SMALL, tag)
+        tag[c4d.EXPRESSION_ENABLE] = False
+
+    pairs = build_pairs(source, target)
+    # Sampling moves the joints, undo has to store them before that
+    for src, tgt in pairs:
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE, tgt)
+    times = [c4d.BaseTime(frame, fps) for frame in range(first, last + 1)]
+    values = sample_pose(doc, pairs, times)
+    keep = find_keys(values) if dropLinearKeys else None
+    key_count = write_keys(doc, [tgt for src, tgt in pairs], times, values, keep)
+
+    doc.SetTime(current_time)
+    doc.ExecutePasses(None, True, True, True, c4d.BUILDFLAGS_NONE)
+    doc.EndUndo()
+    c4d.gui.StatusClear()
+    c4d.EventAdd()
+
+    print("Baked " + str(len(pairs)) + " joints over " + str(len(times)) + " frames, "
+          + str(key_count) + " keys, took " + "%.3f" % (time.perf_counter() - start_time) + " s")
+
+def get_roots(objs):
+    """Return the source root, target root and CopyPose tag from the selection."""
+    for obj in objs:
+        for tag in obj.GetTags():
+            if not tag.CheckType(c4d.Tpython):
+                continue
+            ids = dict((bc[c4d.DESC_NAME], descId) for descId, bc in tag.GetUserDataContainer())
+            if "CopyFrom" not in ids:
+                continue
+            target = tag[ids["CopyTo"]] if "CopyTo" in ids else None
+            return tag[ids["CopyFrom"]], target or obj, tag
+    if len(objs) == 2:
+        return objs[0], objs[1], None
+    return None, None, None
+
+def build_pairs(source, target):
+    """Match the joints of both hierarchies by name like CopyPose, parents before their children."""
+    pairs = []
+    stack = [(source, target)]
+    while stack:
+        src, tgt = stack.pop()
+        pairs.append((src, tgt))
+        targetChildren = {}
+        for tCh in tgt.GetChildren():
+            targetChildren.setdefault(tCh.GetName(), tCh)
+        matched = [(sCh, targetChildren[sCh.GetName()]) for sCh in src.GetChildren()
+                   if sCh.GetName() in targetChildren]
+        stack.extend(reversed(matched))
+    return pairs
+
+def sample_pose(doc, pairs, times):
+    """
+    Evaluate the document at every time and read the copied pose of the target joints.
+
+    Args:
+        doc (c4d.documents.BaseDocument): Document to evaluate
+        pairs (list[tuple]): (source, target) pairs, parents before their children
+        times (list[c4d.BaseTime]): Times to sample
+
+    Returns:
+        list[list[float]]: Per frame the position, rotation and scale of every target joint,
+            9 values per joint in the order of CHANNELS
+    """
+    values = []
+    previous = [None] * len(pairs)
+    for frame, bt in enumerate(times):
+        if frame % 10 == 0:
+            c4d.gui.StatusSetBar(100 * frame // len(times))
+        doc.SetTime(bt)
+        doc.ExecutePasses(None, True, True, True, c4d.BUILDFLAGS_NONE)
+
+        row = []
+        for i, (src, tgt) in enumerate(pairs):
+            tgt.SetMg(src.GetMg())
+            rot = tgt.GetRelRot()
+            if previous[i] is not None:
+                # Avoid flips between frames, they can't be interpolated
+                rot = c4d.utils.GetOptimalAngle(previous[i], rot, tgt.GetRotationOrder())
+            previous[i] = rot
+            pos, scale = tgt.GetRelPos(), tgt.GetRelScale()
+            row.extend((pos.x, pos.y, pos.z, rot.x, rot.y, rot.z, scale.x, scale.y, scale.z))
+        values.append(row)
+    return values
+
+def find_keys(values):
+    """
+    Find the frames that need a key for linear interpolation to stay within linearTolerance.
+
+    From the last kept key, the range of slopes that passes every following value
+    within tolerance is narrowed frame by frame. When the line to the next value
+    leaves that range, the frame before it is kept and becomes the new start.
+
+    Args:
+        values (list[list[float]]): Per frame the value of every channel
+
+    Returns:
+        list[list[bool]]: Per channel whether a frame is kept
+    """
+    frames = len(values)
+    if np is not None:
+        values = np.array(values, dtype=np.float64).reshape(frames, -1)
+        channels = values.shape[1]
+        keep = np.zeros((frames, channels), dtype=bool)
+        keep[0] = keep[-1] = True
+        anchor = np.zeros(channels, dtype=np.int64)
+        anchor_value = values[0].copy()
+        low = np.full(channels, -np.inf)
+        high = np.full(channels, np.inf)
+        for frame in range(1, frames):
+            slope = (values[frame] - anchor_value) / (frame - anchor)
+            broken = (slope < low) | (slope > high)
+            if broken.any():
+                keep[frame - 1, broken] = True
+                anchor[broken] = frame - 1
+                anchor_value[broken] = values[frame - 1, broken]
+                low[broken] = -np.inf
+                high[broken] = np.inf
+            steps = frame - anchor
+            low = np.maximum(low, (values[frame] - linearTolerance - anchor_value) / steps)
+            high = np.minimum(high, (values[frame] + linearTolerance - anchor_value) / steps)
+        return keep.T.tolist()
+
+    keep = []
+    for channel in range(len(values[0]) if frames else 0):
+        kept = [False] * frames
+        kept[0] = kept[-1] = True
+        anchor, anchor_value = 0, values[0][channel]
+        low, high = float("-inf"), float("inf")
+        for frame in range(1, frames):
+            value = values[frame][channel]
+            slope = (value - anchor_value) / (frame - anchor)
+            if slope < low or slope > high:
+                kept[frame - 1] = True
+                anchor, anchor_value = frame - 1, values[frame - 1][channel]
+                low, high = float("-inf"), float("inf")
+            steps = frame - anchor
+            low = max(low, (value - linearTolerance - anchor_value) / steps)
+            high = min(high, (value + linearTolerance - anchor_value) / steps)
+        keep.append(kept)
+    return keep
+
+def write_keys(doc, joints, times, values, keep=None):
+    """Write the sampled values as linear keys, each track is looked up or created once. Returns the key count.
+
+    The joints must be added to the undo before, the keys are written without an undo step each.
+    """
+    first, last = times[0], times[-1]
+    key_count = 0
+    for j, joint in enumerate(joints):
+        for c, (param, component) in enumerate(CHANNELS):
+            channel = j * len(CHANNELS) + c
+            descId = c4d.DescID(c4d.DescLevel(param, c4d.DTYPE_VECTOR, 0),
+                                c4d.DescLevel(component, c4d.DTYPE_REAL, 0))
+            track = joint.FindCTrack(descId)
+            if track is None:
+                track = c4d.CTrack(joint, descId)
+                joint.InsertTrackSorted(track)
+            curve = track.GetCurve()
+
+            # Replace old keys in the range, the ones outside of it stay
+            for k in range(curve.GetKeyCount() - 1, -1, -1):
+                key_time = curve.GetKey(k).GetTime()
+                if not (key_time < first or last < key_time):
+                    curve.DelKey(k, bUndo=False)
+
+            for frame, bt in enumerate(times):
+                if keep is not None and not keep[channel][frame]:
+                    continue
+                key = curve.AddKey(bt, bUndo=False)["key"]
+                key.SetValue(curve, values[frame][channel])
+                key.SetInterpolation(curve, c4d.CINTERPOLATION_LINEAR)
+                key_count += 1
+    return key_count
+
+if __name__=='__main__':
+    main()
@@ -1,101 +1,1159 @@
+import array
+import bisect
 import c4d
+import concurrent.futures
 import math
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def main():
     
     # Set your desired tolerance in centimeters
     merge_tolerance_cm = 0.01  # distance in cm 
     
+    # Set to True to use the original brute-force search (for comparison)
+    use_brute_force = False
+    
+    # Set to False to process points and polygons as lists instead of NumPy arrays
+    use_numpy = True
+    
+    # Set to True to print the peak memory of the merge (traced, so it runs slower)
+    report_memory = False
+    
+    # Set to True to merge all selected polygon objects (and their children) in parallel
+    batch_mode = False
+    
+    # Set to True to connect all selected objects and weld their open borders
+    cross_object_weld = False
+    
+    # Set to True to only report how many points merge at the tolerances below.
+    # The points that merge at merge_tolerance_cm are stored in a point selection tag.
+    dry_run = False
+    dry_run_tolerances = [0.001, 0.01, 0.1, 1.0]
+    
+    if cross_object_weld:
+        weld_objects(doc, get_polygon_objects(doc), merge_tolerance_cm, use_numpy)
+        return
+    
+    if batch_mode:
+        merge_selected_objects(doc, merge_tolerance_cm, use_brute_force, use_numpy)
+        return
+    
     # Get active object
     obj = doc.GetActiveObject()
     if obj is None:
         raise RuntimeError("No object selected")   
     
+    if dry_run:
+        preview_merge(doc, obj, dry_run_tolerances, merge_tolerance_cm)
+        return
+    
     # Undo setup
     doc.StartUndo()
     doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj)
     
     # Execute merge
-    merge_points_with_tolerance(obj, merge_tolerance_cm)
+    merge_points_with_tolerance(obj, merge_tolerance_cm, use_brute_force, use_numpy, report_memory)
     
     # Finalize undo
     doc.EndUndo()
     c4d.EventAdd()
 
 
-def merge_points_with_tolerance(obj, tolerance_cm=0.1):
+def find_point_matches(coords, tolerance_cm, brute_force=False):
     """
-    Merge overlapping points within a specified tolerance distance in centimeters.
+    Match every point to the first unique point within tolerance.
+    
+    Points are visited in order; a point that has no unique point within
+    tolerance becomes a new unique point itself.
     
     Args:
-        obj (c4d.PolygonObject): The object to process
+        coords (list[tuple]): Point positions as (x, y, z) tuples
         tolerance_cm (float): Maximum distance between points to merge (in cm)
-    """
-    if not obj.IsInstanceOf(c4d.Opolygon):
-        raise TypeError("Selected object is not a PolygonObject")
+        brute_force (bool): Scan all unique points instead of using the spatial hash
     
+    Returns:
+        tuple: (point_map, unique_indices) where point_map[i] is the new index
+            of point i and unique_indices[n] is the original index of new point n
+    """
     # Convert tolerance to squared distance for efficient comparison
     tolerance_squared = tolerance_cm * tolerance_cm
     
+    point_map = [0] * len(coords)
+    unique_indices = []
+    unique_coords = []
+    
+    if brute_force:
+        for i, (x, y, z) in enumerate(coords):
+            match = None
+            for n, (ux, uy, uz) in enumerate(unique_coords):
+                dx, dy, dz = x - ux, y - uy, z - uz
+                if dx * dx + dy * dy + dz * dz <= tolerance_squared:
+                    match = n
+                    break
+            if match is None:
+                match = len(unique_indices)
+                unique_indices.append(i)
+                unique_coords.append((x, y, z))
+            point_map[i] = match
+        return point_map, unique_indices
+    
+    cell_size = abs(tolerance_cm)
+    if cell_size == 0:
+        # Zero tolerance only merges exact duplicates
+        exact = {}
+        for i, coord in enumerate(coords):
+            match = exact.get(coord)
+            if match is None:
+                match = exact[coord] = len(unique_indices)
+                unique_indices.append(i)
+            point_map[i] = match
+        return point_map, unique_indices
+    
+    # Uniform grid with cell size equal to the tolerance, so every unique point
+    # within tolerance lies in one of the 27 cells around the query point.
+    # Each cell lists its unique points in ascending order.
+    inv_cell = 1.0 / cell_size
+    grid = {}
+    neighbours = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    floor = math.floor
+    
+    for i, (x, y, z) in enumerate(coords):
+        cx, cy, cz = floor(x * inv_cell), floor(y * inv_cell), floor(z * inv_cell)
+        match = None
+        for dx, dy, dz in neighbours:
+            cell = grid.get((cx + dx, cy + dy, cz + dz))
+            if cell is None:
+                continue
+            for n in cell:
+                # Keep the lowest index so the first point within tolerance wins
+                if match is not None and n >= match:
+                    break
+                ux, uy, uz = unique_coords[n]
+                ex, ey, ez = x - ux, y - uy, z - uz
+                if ex * ex + ey * ey + ez * ez <= tolerance_squared:
+                    match = n
+                    break
+        if match is None:
+            match = len(unique_indices)
+            unique_indices.append(i)
+            unique_coords.append((x, y, z))
+            grid.setdefault((cx, cy, cz), []).append(match)
+        point_map[i] = match
+    
+    return point_map, unique_indices
+
+
+def find_point_matches_array(points, tolerance_cm):
+    """
+    NumPy version of find_point_matches with the same result.
+    
+    The pairs of points within tolerance are found with NumPy on the sorted
+    cell keys of the spatial hash, which releases the GIL so objects can be
+    welded on several threads. Only points that have an earlier point within
+    tolerance are then resolved one by one, in point order.
+    
+    Args:
+        points (numpy.ndarray): (n, 3) point positions
+        tolerance_cm (float): Maximum distance between points to merge (in cm)
+    
+    Returns:
+        tuple: (point_map, unique_indices) as NumPy arrays, see find_point_matches
+    """
+    count = len(points)
+    representative = np.arange(count)
+    cell_size = abs(tolerance_cm)
+    
+    if count == 0:
+        pass
+    elif cell_size == 0:
+        # Zero tolerance only merges exact duplicates into their first point
+        _, first, inverse = np.unique(points, axis=0, return_index=True, return_inverse=True)
+        representative = first[inverse.reshape(-1)]
+    else:
+        cells = np.floor(points / cell_size).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        dims = cells.max(axis=0) + 2
+        if float(dims[0]) * float(dims[1]) * float(dims[2]) >= 2.0 ** 62:
+            # Cell keys would overflow, the tolerance is tiny for the size of the object
+            coords = [tuple(p) for p in points.tolist()]
+            point_map, unique_indices = find_point_matches(coords, tolerance_cm)
+            return np.asarray(point_map, dtype=np.int64), np.asarray(unique_indices, dtype=np.int64)
+        
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        tolerance_squared = tolerance_cm * tolerance_cm
+        
+        # Keys are linear in the cell, so every neighbour cell is a constant key offset
+        pairs_i, pairs_j = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    neighbour_keys = keys + (dx * dims[1] + dy) * dims[2] + dz
+                    first = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+                    last = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+                    n = 0
+                    while True:
+                        active = np.flatnonzero(first + n < last)
+                        if not len(active):
+                            break
+                        candidates = order[first[active] + n]
+                        distance_squared = ((points[candidates] - points[active]) ** 2).sum(axis=1)
+                        close = (candidates < active) & (distance_squared <= tolerance_squared)
+                        pairs_i.append(active[close])
+                        pairs_j.append(candidates[close])
+                        n += 1
+        
+        pairs_i = np.concatenate(pairs_i)
+        pairs_j = np.concatenate(pairs_j)
+        by_point = np.lexsort((pairs_j, pairs_i))
+        pairs_i, pairs_j = pairs_i[by_point].tolist(), pairs_j[by_point].tolist()
+        
+        # A point merges into the lowest earlier point within tolerance that stayed unique
+        is_unique = [True] * count
+        k = 0
+        while k < len(pairs_i):
+            i = pairs_i[k]
+            match = -1
+            while k < len(pairs_i) and pairs_i[k] == i:
+                if match < 0 and is_unique[pairs_j[k]]:
+                    match = pairs_j[k]
+                k += 1
+            if match >= 0:
+                is_unique[i] = False
+                representative[i] = match
+    
+    is_unique = representative == np.arange(count)
+    unique_indices = np.flatnonzero(is_unique)
+    point_map = (np.cumsum(is_unique) - 1)[representative]
+    return point_map, unique_indices
+
+
+def remap_polygons(polygons, point_map):
+    """
+    Remap polygon point indices and drop polygons that became degenerate.
+    
+    Quads that lose one corner are stored as triangles (c == d). Polygons with
+    fewer than three distinct points, or with two opposite corners merged,
+    are removed.
+    
+    Args:
+        polygons (numpy.ndarray | list[tuple]): (n, 4) point indices per polygon
+        point_map (numpy.ndarray | list[int]): New point index of every old point
+    
+    Returns:
+        tuple: (new_polygons, kept, corners) where kept holds the old index of every
+            remaining polygon and corners[k] the old corner (0-3) of each new corner
+    """
+    if np is not None and isinstance(polygons, np.ndarray):
+        remapped = np.asarray(point_map, dtype=np.int32)[polygons]
+        a, b, c, d = remapped.T
+        ab, bc, cd, da = a == b, b == c, c == d, d == a
+        
+        ordered = np.sort(remapped, axis=1)
+        distinct = 1 + np.count_nonzero(np.diff(ordered, axis=1), axis=1)
+        collapsed = distinct == 3
+        keep = (distinct == 4) | (collapsed & (ab | bc | cd | da))
+        
+        # Move the duplicated corner to the end so the quad becomes a triangle
+        corners = np.tile(np.arange(4, dtype=np.int32), (len(remapped), 1))
+        corners[collapsed & ab] = (1, 2, 3, 3)
+        corners[collapsed & bc] = (0, 1, 3, 3)
+        corners[collapsed & da] = (0, 1, 2, 2)
+        
+        kept = np.flatnonzero(keep)
+        corners = corners[kept]
+        new_polygons = np.take_along_axis(remapped[kept], corners, axis=1)
+        return new_polygons, kept, corners
+    
+    new_polygons = []
+    kept = []
+    corners = []
+    for i, poly in enumerate(polygons):
+        a, b, c, d = (point_map[n] for n in poly)
+        distinct = len({a, b, c, d})
+        if distinct == 4 or (distinct == 3 and c == d):
+            order = (0, 1, 2, 3)
+        elif distinct == 3 and a == b:
+            order = (1, 2, 3, 3)
+        elif distinct == 3 and b == c:
+            order = (0, 1, 3, 3)
+        elif distinct == 3 and d == a:
+            order = (0, 1, 2, 2)
+        else:
+            continue
+        indices = (a, b, c, d)
+        new_polygons.append(tuple(indices[n] for n in order))
+        kept.append(i)
+        corners.append(order)
+    return new_polygons, kept, corners
+
+
+def read_point_array(obj):
+    """Read all points of a PointObject into an (n, 3) float64 array."""
+    point_count = obj.GetPointCount()
+    tag = obj.GetTag(c4d.Tpoint)
+    buffer = tag.GetLowlevelDataAddressR() if tag is not None else None
+    if buffer is not None and len(buffer) == point_count * 24:
+        return np.frombuffer(buffer, dtype=np.float64).reshape(-1, 3).copy()
+    
     points = obj.GetAllPoints()
+    return np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64).reshape(-1, 3)
+
+
+def read_polygon_array(obj):
+    """Read all polygons of a PolygonObject into an (n, 4) int32 array."""
+    polygon_count = obj.GetPolygonCount()
+    tag = obj.GetTag(c4d.Tpolygon)
+    buffer = tag.GetLowlevelDataAddressR() if tag is not None else None
+    if buffer is not None and len(buffer) == polygon_count * 16:
+        return np.frombuffer(buffer, dtype=np.int32).reshape(-1, 4).copy()
+    
     polygons = obj.GetAllPolygons()
+    return np.array([(p.a, p.b, p.c, p.d) for p in polygons], dtype=np.int32).reshape(-1, 4)
+
+
+def write_point_array(obj, points):
+    """Write an (n, 3) array to a PointObject that already has n points."""
+    tag = obj.GetTag(c4d.Tpoint)
+    buffer = tag.GetLowlevelDataAddressW() if tag is not None else None
+    data = np.ascontiguousarray(points, dtype=np.float64).tobytes()
+    if buffer is not None and len(buffer) == len(data):
+        buffer[:] = data
+    else:
+        obj.SetAllPoints([c4d.Vector(x, y, z) for x, y, z in points.tolist()])
+
+
+def write_polygon_array(obj, polygons):
+    """Write an (n, 4) array to a PolygonObject that already has n polygons."""
+    tag = obj.GetTag(c4d.Tpolygon)
+    buffer = tag.GetLowlevelDataAddressW() if tag is not None else None
+    data = np.ascontiguousarray(polygons, dtype=np.int32).tobytes()
+    if buffer is not None and len(buffer) == len(data):
+        buffer[:] = data
+    else:
+        for i, (a, b, c, d) in enumerate(polygons.tolist()):
+            obj.SetPolygon(i, c4d.CPolygon(a, b, c, d))
+
+
+def remap_records(data, count, indices, corners=None):
+    """
+    Reorder the fixed-size records of a variable tag buffer.
+    
+    Args:
+        data (bytes): Raw tag data holding count records
+        count (int): Number of records in data
+        indices (list[int]): Old record index of every new record
+        corners (list[tuple]): Old corner (0-3) of every new corner, for
+            per-polygon tags that store four values per record
+    
+    Returns:
+        bytes: The remapped tag data
+    """
+    if count == 0 or len(indices) == 0:
+        return b""
+    record_size = len(data) // count
+    
+    if np is not None:
+        records = np.frombuffer(data, dtype=np.uint8).reshape(count, record_size)
+        indices = np.asarray(indices)
+        if corners is None:
+            return records[indices].tobytes()
+        records = records.reshape(count, 4, record_size // 4)
+        return records[indices[:, None], np.asarray(corners)].tobytes()
+    
+    view = memoryview(data)
+    if corners is None:
+        return b"".join(view[i * record_size:(i + 1) * record_size] for i in indices)
+    corner_size = record_size // 4
+    return b"".join(view[i * record_size + c * corner_size:i * record_size + (c + 1) * corner_size]
+                    for i, order in zip(indices, corners) for c in order)
+
+
+def remap_edge_selection(states, kept, corners):
+    """
+    Remap the states of an edge selection to the merged polygons.
+    
+    Edges are numbered polygon * 4 + side, side k runs from corner k to the
+    next corner. A new edge is selected when one of the old edges between its
+    corners was. Quads that became triangles get their c-a edge as side 2 and 3.
+    
+    Args:
+        states (list[bool]): Selection state of every old edge
+        kept (list[int]): Old index of every remaining polygon
+        corners (list[tuple]): Old corner (0-3) of every new polygon corner
+    
+    Returns:
+        list[bool]: Selection state of every new edge
+    """
+    if np is not None and isinstance(kept, np.ndarray):
+        kept, corners = kept.tolist(), corners.tolist()
+    new_states = []
+    for i, order in zip(kept, corners):
+        sides = []
+        for k in range(4):
+            corner, end = order[k], order[(k + 1) % 4]
+            selected = False
+            while corner != end:
+                selected = selected or states[i * 4 + corner]
+                corner = (corner + 1) % 4
+            sides.append(selected)
+        if order[2] == order[3]:
+            sides[2] = sides[3]
+        new_states.extend(sides)
+    return new_states
+
+
+def read_tag_data(obj):
+    """
+    Copy the data of all tags that store values per point or per polygon.
+    
+    Must be called before the object is resized, since resizing truncates
+    the variable tags.
+    
+    Args:
+        obj (c4d.PolygonObject): The object to read the tags from
+    
+    Returns:
+        list[tuple]: (tag, per_polygon, count, data) for every supported tag
+    """
     point_count = obj.GetPointCount()
+    polygon_count = obj.GetPolygonCount()
+    tag_data = []
     
-    if point_count == 0:
-        return False
+    for tag in obj.GetTags():
+        if tag.CheckType(c4d.Tuvw) or tag.CheckType(c4d.Tnormal) or tag.CheckType(c4d.Tvertexmap):
+            buffer = tag.GetLowlevelDataAddressR()
+            if buffer is None:
+                print(f"Could not read data of tag {tag.GetName()}")
+                continue
+            if tag.CheckType(c4d.Tvertexmap):
+                tag_data.append((tag, False, point_count, bytes(buffer)))
+            else:
+                tag_data.append((tag, True, polygon_count, bytes(buffer)))
+        elif tag.CheckType(c4d.Tweights):
+            maps = [tag.GetWeightMap(j) for j in range(tag.GetJointCount())]
+            tag_data.append((tag, False, point_count, maps))
+        elif tag.CheckType(c4d.Tpolygonselection):
+            tag_data.append((tag, True, polygon_count, tag.GetBaseSelect().GetAll(polygon_count)))
+        elif tag.CheckType(c4d.Tpointselection):
+            tag_data.append((tag, False, point_count, tag.GetBaseSelect().GetAll(point_count)))
+        elif tag.CheckType(c4d.Tedgeselection):
+            tag_data.append((tag, True, polygon_count, tag.GetBaseSelect().GetAll(polygon_count * 4)))
+    
+    return tag_data
+
+
+def write_tag_data(tag_data, unique_indices, kept, corners):
+    """
+    Write the tag data read by read_tag_data back in the merged layout.
     
-    # Prepare data structures
-    unique_points = []
-    point_map = [0] * point_count
-    new_points = []
-    
-    def find_similar_point_index(point):
-        """Find index of first point within tolerance, or None if no match"""
-        for i, unique_pt in enumerate(unique_points):
-            if (point - unique_pt).GetLengthSquared() <= tolerance_squared:
-                return i
-        return None
-    
-    # Process all points
-    for i, point in enumerate(points):
-        similar_idx = find_similar_point_index(point)
+    Args:
+        tag_data (list[tuple]): Result of read_tag_data
+        unique_indices (list[int]): Old index of every remaining point
+        kept (list[int]): Old index of every remaining polygon
+        corners (list[tuple]): Old corner (0-3) of every new polygon corner
+    """
+    for tag, per_polygon, count, data in tag_data:
+        indices = kept if per_polygon else unique_indices
         
-        if similar_idx is not None:
-            # Point is similar to an existing unique point
-            point_map[i] = similar_idx
+        if tag.CheckType(c4d.Tweights):
+            for j, weights in enumerate(data):
+                if np is not None:
+                    new_weights = np.asarray(weights)[np.asarray(indices)].tolist()
+                else:
+                    new_weights = [weights[i] for i in indices]
+                tag.SetWeightMap(j, new_weights)
+            tag.WeightDirty()
+        elif tag.CheckType(c4d.Tpolygonselection) or tag.CheckType(c4d.Tpointselection):
+            tag.GetBaseSelect().SetAll([data[i] for i in indices])
+        elif tag.CheckType(c4d.Tedgeselection):
+            tag.GetBaseSelect().SetAll(remap_edge_selection(data, kept, corners))
         else:
-            # New unique point found
-            point_map[i] = len(unique_points)
-            unique_points.append(point)
+            new_data = remap_records(data, count, indices, corners if per_polygon else None)
+            buffer = tag.GetLowlevelDataAddressW()
+            if buffer is None:
+                print(f"Could not write data of tag {tag.GetName()}")
+                continue
+            buffer[:len(new_data)] = new_data
+
+
+def read_mesh(obj, use_arrays=True):
+    """
+    Read the points and polygons of a PolygonObject as plain data.
     
-    # Early exit if no merging needed
-    if len(unique_points) == point_count:
-        print("No points within tolerance found")
-        return False
+    Args:
+        obj (c4d.PolygonObject): The object to read
+        use_arrays (bool): Return NumPy arrays instead of lists of tuples
+    
+    Returns:
+        tuple: (points, polygons)
+    """
+    if use_arrays:
+        return read_point_array(obj), read_polygon_array(obj)
+    
+    points = [(p.x, p.y, p.z) for p in obj.GetAllPoints()]
+    polygons = [(p.a, p.b, p.c, p.d) for p in obj.GetAllPolygons()]
+    return points, polygons
+
+
+def weld_mesh(points, polygons, tolerance_cm, brute_force=False):
+    """
+    Weld points and remap polygons without touching any Cinema 4D object.
+    
+    Only works on plain data, so it can run on a worker thread. With NumPy
+    arrays most of the work releases the GIL.
+    
+    Args:
+        points (numpy.ndarray | list[tuple]): Point positions
+        polygons (numpy.ndarray | list[tuple]): Point indices per polygon
+        tolerance_cm (float): Maximum distance between points to merge (in cm)
+        brute_force (bool): Use the original O(n^2) search instead of the spatial hash
+    
+    Returns:
+        tuple: (unique_indices, new_polygons, kept, corners, elapsed, cpu_time),
+            cpu_time is the time of the calling thread only, on a worker thread
+            elapsed also includes waiting for the GIL and the other threads
+    """
+    start_time = time.perf_counter()
+    start_cpu = time.thread_time()
+    
+    # Find the unique point for every point
+    if np is not None and isinstance(points, np.ndarray) and not brute_force:
+        point_map, unique_indices = find_point_matches_array(points, tolerance_cm)
+    else:
+        if np is not None and isinstance(points, np.ndarray):
+            points = [tuple(p) for p in points.tolist()]
+        point_map, unique_indices = find_point_matches(points, tolerance_cm, brute_force)
     
     # Update polygons with new point indices
-    new_polygons = []
-    for poly in polygons:
-        new_poly = c4d.CPolygon(
-            point_map[poly.a],
-            point_map[poly.b],
-            point_map[poly.c],
-            point_map[poly.d]
-        )
-        new_polygons.append(new_poly)
+    new_polygons, kept, corners = remap_polygons(polygons, point_map)
+    return (unique_indices, new_polygons, kept, corners,
+            time.perf_counter() - start_time, time.thread_time() - start_cpu)
+
+
+def apply_weld(obj, points, result):
+    """
+    Write the result of weld_mesh back to the object, including its tags.
+    
+    Args:
+        obj (c4d.PolygonObject): The object the points were read from
+        points (numpy.ndarray | list[tuple]): Points returned by read_mesh
+        result (tuple): Result of weld_mesh
+    """
+    unique_indices, new_polygons, kept, corners = result[:4]
+    
+    # Keep the UVs, normals, vertex maps, weights and point, polygon and edge selections before resizing
+    tag_data = read_tag_data(obj)
     
     # Resize and update the object
-    obj.ResizeObject(len(unique_points), len(new_polygons))
-    obj.SetAllPoints(unique_points)
-    for i, poly in enumerate(new_polygons):
-        obj.SetPolygon(i, poly)
+    obj.ResizeObject(len(unique_indices), len(new_polygons))
+    if np is not None and isinstance(points, np.ndarray):
+        write_point_array(obj, points[unique_indices])
+        write_polygon_array(obj, new_polygons)
+    else:
+        obj.SetAllPoints([c4d.Vector(*points[i]) for i in unique_indices])
+        for i, (a, b, c, d) in enumerate(new_polygons):
+            obj.SetPolygon(i, c4d.CPolygon(a, b, c, d))
+    write_tag_data(tag_data, unique_indices, kept, corners)
     
     # Finalize changes
     obj.Message(c4d.MSG_UPDATE)
+
+
+def merge_points_with_tolerance(obj, tolerance_cm=0.1, brute_force=False, use_numpy=True,
+                                report_memory=False):
+    """
+    Merge overlapping points within a specified tolerance distance in centimeters.
+    
+    Args:
+        obj (c4d.PolygonObject): The object to process
+        tolerance_cm (float): Maximum distance between points to merge (in cm)
+        brute_force (bool): Use the original O(n^2) search instead of the spatial hash
+        use_numpy (bool): Process points and polygons as NumPy arrays if available
+        report_memory (bool): Trace the allocations of the merge and print their peak,
+            the weld is timed in a separate untraced run
+    """
+    if not obj.IsInstanceOf(c4d.Opolygon):
+        raise TypeError("Selected object is not a PolygonObject")
+    
+    point_count = obj.GetPointCount()
+    
+    if point_count == 0:
+        return False
+    
+    use_arrays = use_numpy and np is not None
+    start_time = time.perf_counter()
+    
+    if report_memory:
+        # Tracing slows the weld down a lot, so it is timed without first
+        weld_time = weld_mesh(*read_mesh(obj, use_arrays), tolerance_cm, brute_force)[4]
+        tracemalloc.start()
+    try:
+        points, polygons = read_mesh(obj, use_arrays)
+        result = weld_mesh(points, polygons, tolerance_cm, brute_force)
+        
+        # Early exit if no merging needed
+        if len(result[0]) == point_count:
+            print("No points within tolerance found")
+            return False
+        
+        apply_weld(obj, points, result)
+        peak_memory = tracemalloc.get_traced_memory()[1] if report_memory else 0
+    finally:
+        if report_memory:
+            tracemalloc.stop()
     c4d.EventAdd()
     
-    print(f"Merged {point_count - len(unique_points)} points (tolerance: {tolerance_cm} cm)")
+    elapsed = time.perf_counter() - start_time
+    
+    unique_indices, new_polygons = result[0], result[1]
+    if not report_memory:
+        weld_time = result[4]
+    method = "brute force" if brute_force else "spatial hash"
+    mode = "arrays" if use_arrays else "lists"
+    removed_polygons = len(polygons) - len(new_polygons)
+    print(f"Merged {point_count - len(unique_indices)} points (tolerance: {tolerance_cm} cm), "
+          f"removed {removed_polygons} degenerate polygons")
+    print(f"Finished in {elapsed:.3f} s, welding took {weld_time:.3f} s ({method}, {mode})")
+    if report_memory:
+        print(f"Peak memory of the merge {peak_memory / (1024 * 1024):.1f} MB")
     return True
 
+
+def get_polygon_objects(doc):
+    """Return all selected polygon objects and the polygon objects below them."""
+    objects = []
+    seen = set()
+    
+    def add(obj):
+        while obj is not None:
+            if obj.IsInstanceOf(c4d.Opolygon) and obj.GetPointCount() > 0 and obj not in seen:
+                seen.add(obj)
+                objects.append(obj)
+            add(obj.GetDown())
+            obj = obj.GetNext()
+    
+    for obj in doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_NONE):
+        if obj.IsInstanceOf(c4d.Opolygon) and obj.GetPointCount() > 0 and obj not in seen:
+            seen.add(obj)
+            objects.append(obj)
+        add(obj.GetDown())
+    
+    return objects
+
+
+def merge_selected_objects(doc, tolerance_cm=0.1, brute_force=False, use_numpy=True,
+                           max_workers=None):
+    """
+    Merge overlapping points of all selected polygon objects in parallel.
+    
+    Points and polygons are extracted on the main thread, welded in a thread
+    pool and written back on the main thread in a single undo step. Cinema 4D
+    cannot start worker processes, so only the NumPy weld runs in parallel,
+    since it releases the GIL. Lists and the brute force search are welded on
+    the main thread.
+    
+    Args:
+        doc (c4d.documents.BaseDocument): The document with the selection
+        tolerance_cm (float): Maximum distance between points to merge (in cm)
+        brute_force (bool): Use the original O(n^2) search instead of the spatial hash
+        use_numpy (bool): Process points and polygons as NumPy arrays if available
+        max_workers (int): Number of threads, defaults to the number of CPUs
+    """
+    objects = get_polygon_objects(doc)
+    if not objects:
+        raise RuntimeError("No polygon objects selected")
+    
+    use_arrays = use_numpy and np is not None
+    start_time = time.perf_counter()
+    
+    meshes = [read_mesh(obj, use_arrays) for obj in objects]
+    
+    # Only the weld stage is timed, to compare it with welding one object after another
+    weld_start = time.perf_counter()
+    if use_arrays and not brute_force:
+        kind = "worker threads"
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            results = list(executor.map(lambda mesh: weld_mesh(mesh[0], mesh[1], tolerance_cm), meshes))
+    else:
+        kind = "main thread"
+        results = [weld_mesh(points, polygons, tolerance_cm, brute_force) for points, polygons in meshes]
+    weld_time = time.perf_counter() - weld_start
+    
+    # Wall time per object is meaningless on threads, it includes waiting for the others
+    doc.StartUndo()
+    cpu_time = 0.0
+    merged_objects = 0
+    for obj, (points, polygons), result in zip(objects, meshes, results):
+        unique_indices, new_polygons, object_cpu_time = result[0], result[1], result[5]
+        cpu_time += object_cpu_time
+        if len(unique_indices) == len(points):
+            print(f"{obj.GetName()}: no points within tolerance found in {object_cpu_time:.3f} s CPU time")
+            continue
+        
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE, obj)
+        apply_weld(obj, points, result)
+        merged_objects += 1
+        print(f"{obj.GetName()}: merged {len(points) - len(unique_indices)} points, "
+              f"removed {len(polygons) - len(new_polygons)} degenerate polygons "
+              f"in {object_cpu_time:.3f} s CPU time")
+    doc.EndUndo()
+    c4d.EventAdd()
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"Merged {merged_objects} of {len(objects)} objects (tolerance: {tolerance_cm} cm) "
+          f"in {elapsed:.3f} s, welding on the {kind}")
+    print(f"Welding took {weld_time:.3f} s, {cpu_time:.3f} s CPU time summed over the objects")
+    return merged_objects > 0
+
+def find_border_points(polygons):
+    """
+    Find the points that lie on open edges.
+    
+    An edge is open when only one polygon uses it.
+    
+    Args:
+        polygons (numpy.ndarray | list[tuple]): Point indices per polygon
+    
+    Returns:
+        list[int] | numpy.ndarray: Sorted indices of all border points
+    """
+    if np is not None and isinstance(polygons, np.ndarray):
+        if len(polygons) == 0:
+            return np.zeros(0, dtype=np.int64)
+        # Edges a-b, b-c, c-d and d-a; the c-d edge of a triangle is empty
+        edges = np.stack([polygons, np.roll(polygons, -1, axis=1)], axis=2).reshape(-1, 2)
+        edges = np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1)
+        unique_edges, counts = np.unique(edges, axis=0, return_counts=True)
+        return np.unique(unique_edges[counts == 1])
+    
+    edge_counts = {}
+    for poly in polygons:
+        for k in range(4):
+            i, j = poly[k], poly[(k + 1) % 4]
+            if i != j:
+                edge = (i, j) if i < j else (j, i)
+                edge_counts[edge] = edge_counts.get(edge, 0) + 1
+    border = set()
+    for (i, j), count in edge_counts.items():
+        if count == 1:
+            border.add(i)
+            border.add(j)
+    return sorted(border)
+
+
+def to_global(points, mg):
+    """Transform points read by read_mesh with the matrix mg."""
+    if np is not None and isinstance(points, np.ndarray):
+        rotation = np.array([[mg.v1.x, mg.v1.y, mg.v1.z],
+                             [mg.v2.x, mg.v2.y, mg.v2.z],
+                             [mg.v3.x, mg.v3.y, mg.v3.z]])
+        return points @ rotation + np.array([mg.off.x, mg.off.y, mg.off.z])
+    
+    return [tuple(mg * c4d.Vector(*p)) for p in points]
+
+
+def transform_normals(data, mg):
+    """
+    Transform the normals of a normal tag buffer by the matrix mg.
+    
+    Args:
+        data (bytes): Normal tag data, three 16-bit components per corner
+        mg (c4d.Matrix): Matrix of the object the normals belong to
+    
+    Returns:
+        bytes: The normals in the space of mg's parent
+    """
+    tensor = mg.GetTensorMatrix()
+    tensor.off = c4d.Vector()
+    if tensor == c4d.Matrix() or len(data) == 0:
+        return data
+    
+    if np is not None:
+        normals = np.frombuffer(data, dtype=np.int16).reshape(-1, 3) / 32000.0
+        rotation = np.array([[tensor.v1.x, tensor.v1.y, tensor.v1.z],
+                             [tensor.v2.x, tensor.v2.y, tensor.v2.z],
+                             [tensor.v3.x, tensor.v3.y, tensor.v3.z]])
+        normals = normals @ rotation
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        lengths[lengths == 0] = 1.0
+        return np.round(normals / lengths * 32000.0).astype(np.int16).tobytes()
+    
+    values = array.array("h", data)
+    for k in range(0, len(values), 3):
+        normal = (tensor * c4d.Vector(values[k], values[k + 1], values[k + 2])).GetNormalized()
+        values[k:k + 3] = array.array("h", (int(round(v * 32000.0)) for v in normal))
+    return values.tobytes()
+
+
+def join_tag_data(objects, new_obj):
+    """
+    Join the tags of several objects on the connected object, like Connect.
+    
+    UVW, normal and vertex map tags with the same name are joined into one
+    tag, objects without it get zeros. Weight tags are joined into one tag
+    with the joints of all of them. Point, polygon and edge selections stay
+    separate and get a unique name. Every object also gets a polygon
+    selection with its name, its texture tags are restricted to that one or
+    to its renamed selections, so every material stays on its polygons.
+    
+    Args:
+        objects (list[c4d.PolygonObject]): The objects in the order their points were joined
+        new_obj (c4d.PolygonObject): The connected object, already resized to the welded counts
+    
+    Returns:
+        list[tuple]: Tag data of the joined, not yet welded mesh, see read_tag_data
+    """
+    point_counts = [obj.GetPointCount() for obj in objects]
+    polygon_counts = [obj.GetPolygonCount() for obj in objects]
+    point_count, polygon_count = sum(point_counts), sum(polygon_counts)
+    tag_data = []
+    joined = {}
+    weights_tag, weight_maps = None, []
+    used_names = {}
+    
+    def unique_name(type_id, name):
+        used = used_names.setdefault(type_id, set())
+        new_name, n = name, 1
+        while new_name in used:
+            new_name = f"{name}.{n}"
+            n += 1
+        used.add(new_name)
+        return new_name
+    
+    point_offset = polygon_offset = 0
+    for index, obj in enumerate(objects):
+        renamed = {}
+        occurrences = {}
+        for tag, per_polygon, count, data in read_tag_data(obj):
+            if tag.CheckType(c4d.Tweights):
+                if weights_tag is None:
+                    weights_tag = tag.GetClone()
+                    new_obj.InsertTag(weights_tag, new_obj.GetLastTag())
+                for j, weights in enumerate(data):
+                    joint = tag.GetJoint(j)
+                    n = weights_tag.FindJoint(joint)
+                    if n < 0:
+                        n = weights_tag.AddJoint(joint)
+                    while len(weight_maps) <= n:
+                        weight_maps.append({})
+                    weight_maps[n][index] = weights
+            
+            elif (tag.CheckType(c4d.Tpointselection) or tag.CheckType(c4d.Tpolygonselection)
+                  or tag.CheckType(c4d.Tedgeselection)):
+                new_tag = tag.GetClone()
+                new_tag.SetName(unique_name(tag.GetType(), tag.GetName()))
+                new_obj.InsertTag(new_tag, new_obj.GetLastTag())
+                if tag.CheckType(c4d.Tpolygonselection):
+                    renamed[tag.GetName()] = new_tag.GetName()
+                total = polygon_count if per_polygon else point_count
+                offset = polygon_offset if per_polygon else point_offset
+                # Edge selections store four states per polygon
+                scale = 4 if tag.CheckType(c4d.Tedgeselection) else 1
+                states = [False] * (total * scale)
+                states[offset * scale:offset * scale + len(data)] = data
+                tag_data.append((new_tag, per_polygon, total, states))
+            
+            else:
+                if tag.CheckType(c4d.Tnormal):
+                    data = transform_normals(data, obj.GetMg())
+                key = (tag.GetType(), tag.GetName())
+                occurrences[key] = occurrences.get(key, 0) + 1
+                key += (occurrences[key],)
+                if key not in joined:
+                    new_count = new_obj.GetPolygonCount() if per_polygon else new_obj.GetPointCount()
+                    new_tag = new_obj.MakeVariableTag(tag.GetType(), new_count, new_obj.GetLastTag())
+                    new_tag.SetName(tag.GetName())
+                    joined[key] = (new_tag, per_polygon, len(data) // count if count else 0, {})
+                joined[key][3][index] = data
+        
+        # Restrict the materials of this object to its own polygons
+        selection = new_obj.MakeTag(c4d.Tpolygonselection, new_obj.GetLastTag())
+        selection.SetName(unique_name(c4d.Tpolygonselection, obj.GetName()))
+        states = [False] * polygon_count
+        states[polygon_offset:polygon_offset + polygon_counts[index]] = [True] * polygon_counts[index]
+        tag_data.append((selection, True, polygon_count, states))
+        for tag in obj.GetTags():
+            if tag.CheckType(c4d.Ttexture):
+                new_tag = tag.GetClone()
+                restriction = tag[c4d.TEXTURETAG_RESTRICTION]
+                new_tag[c4d.TEXTURETAG_RESTRICTION] = (renamed.get(restriction, restriction) if restriction
+                                                       else selection.GetName())
+                # The projection follows the object into global space
+                new_tag.SetMl(obj.GetMg() * tag.GetMl())
+                new_obj.InsertTag(new_tag, new_obj.GetLastTag())
+        
+        point_offset += point_counts[index]
+        polygon_offset += polygon_counts[index]
+    
+    for new_tag, per_polygon, record_size, chunks in joined.values():
+        counts = polygon_counts if per_polygon else point_counts
+        data = b"".join(chunks.get(index, bytes(record_size * counts[index])) for index in range(len(objects)))
+        tag_data.append((new_tag, per_polygon, polygon_count if per_polygon else point_count, data))
+    
+    if weights_tag is not None:
+        maps = []
+        for chunks in weight_maps:
+            weights = []
+            for index in range(len(objects)):
+                weights.extend(chunks.get(index, [0.0] * point_counts[index]))
+            maps.append(weights)
+        tag_data.append((weights_tag, False, point_count, maps))
+    
+    return tag_data
+
+
+def weld_objects(doc, objects, tolerance_cm=0.1, use_numpy=True):
+    """
+    Connect objects into one mesh and merge coincident border points.
+    
+    Points are combined in global space. Only points on open edges are
+    matched, through one spatial index shared by all objects, so the cost
+    grows with the length of the seams rather than the total point count.
+    The tags are joined with join_tag_data and welded like the points, the
+    first Phong tag is copied. The source objects are replaced by the new object.
+    
+    Args:
+        doc (c4d.documents.BaseDocument): The document of the objects
+        objects (list[c4d.PolygonObject]): The objects to connect
+        tolerance_cm (float): Maximum distance between points to merge (in cm)
+        use_numpy (bool): Process points and polygons as NumPy arrays if available
+    
+    Returns:
+        c4d.PolygonObject: The connected object
+    """
+    if len(objects) < 2:
+        raise RuntimeError("Select at least two polygon objects")
+    
+    use_arrays = use_numpy and np is not None
+    start_time = time.perf_counter()
+    
+    # Combine all points in global space and offset the polygon indices
+    all_points = []
+    all_polygons = []
+    offset = 0
+    for obj in objects:
+        points, polygons = read_mesh(obj, use_arrays)
+        all_points.append(to_global(points, obj.GetMg()))
+        if use_arrays:
+            all_polygons.append(polygons + offset)
+        else:
+            all_polygons.append([tuple(i + offset for i in poly) for poly in polygons])
+        offset += len(points)
+    
+    if use_arrays:
+        points = np.concatenate(all_points)
+        polygons = np.concatenate(all_polygons)
+    else:
+        points = [p for chunk in all_points for p in chunk]
+        polygons = [poly for chunk in all_polygons for poly in chunk]
+    point_count = len(points)
+    
+    # Match the border points only
+    candidates = find_border_points(polygons)
+    if use_arrays:
+        coords = [tuple(p) for p in points[candidates].tolist()]
+    else:
+        coords = [points[i] for i in candidates]
+    candidate_map, candidate_unique = find_point_matches(coords, tolerance_cm)
+    
+    # Every point points to the first point of its cluster, which always comes
+    # first in point order, so new indices can be handed out in one pass
+    if use_arrays:
+        representative = np.arange(point_count)
+        representative[candidates] = candidates[np.asarray(candidate_unique)[candidate_map]]
+        is_unique = representative == np.arange(point_count)
+        point_map = (np.cumsum(is_unique) - 1)[representative]
+        unique_indices = np.flatnonzero(is_unique)
+    else:
+        representative = list(range(point_count))
+        for k, n in enumerate(candidate_map):
+            representative[candidates[k]] = candidates[candidate_unique[n]]
+        point_map = [0] * point_count
+        unique_indices = []
+        for i, rep in enumerate(representative):
+            if rep == i:
+                point_map[i] = len(unique_indices)
+                unique_indices.append(i)
+            else:
+                point_map[i] = point_map[rep]
+    
+    new_polygons, kept, corners = remap_polygons(polygons, point_map)
+    
+    # Build the connected object in global space
+    new_obj = c4d.PolygonObject(len(unique_indices), len(new_polygons))
+    new_obj.SetName(objects[0].GetName())
+    if use_arrays:
+        write_point_array(new_obj, points[unique_indices])
+        write_polygon_array(new_obj, new_polygons)
+    else:
+        new_obj.SetAllPoints([c4d.Vector(*points[i]) for i in unique_indices])
+        for i, (a, b, c, d) in enumerate(new_polygons):
+            new_obj.SetPolygon(i, c4d.CPolygon(a, b, c, d))
+    
+    # UVs, normals, vertex maps, weights, selections and materials of all objects
+    write_tag_data(join_tag_data(objects, new_obj), unique_indices, kept, corners)
+    for obj in objects:
+        phong = obj.GetTag(c4d.Tphong)
+        if phong is not None:
+            new_obj.InsertTag(phong.GetClone())
+            break
+    new_obj.Message(c4d.MSG_UPDATE)
+    
+    # Replace the source objects
+    doc.StartUndo()
+    new_obj.InsertBefore(objects[0])
+    new_obj.SetMg(c4d.Matrix())
+    doc.AddUndo(c4d.UNDOTYPE_NEWOBJ, new_obj)
+    for obj in reversed(objects):
+        doc.AddUndo(c4d.UNDOTYPE_DELETEOBJ, obj)
+        obj.Remove()
+    doc.SetActiveObject(new_obj, c4d.SELECTION_NEW)
+    doc.EndUndo()
+    c4d.EventAdd()
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"Connected {len(objects)} objects, merged {point_count - len(unique_indices)} of "
+          f"{len(candidates)} border points (tolerance: {tolerance_cm} cm) in {elapsed:.3f} s")
+    return new_obj
+
+def find_weld_distances(coords, tolerances):
+    """
+    Find the distance of every point to its nearest earlier point.
+    
+    The merge keeps the first point of a cluster, so a point merges at the
+    tolerances from this distance on. Chained points can make the real merge
+    differ slightly, since a point only merges into a point that stays.
+    
+    Distances are only needed up to the largest tolerance. They are found
+    one tolerance after another, smallest first, with a spatial hash of that
+    cell size. Points resolved at a small tolerance are not searched again,
+    so large tolerances only search the few points that are left.
+    
+    Args:
+        coords (list[tuple]): Point positions as (x, y, z) tuples
+        tolerances (list[float]): Tolerances of interest (in cm)
+    
+    Returns:
+        tuple: (distances, nearest), per point the distance to and index of
+            its nearest earlier point, inf and -1 beyond the largest tolerance
+    """
+    distances = [math.inf] * len(coords)
+    nearest = [-1] * len(coords)
+    unresolved = list(range(len(coords)))
+    neighbours = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    floor = math.floor
+    
+    for tolerance in sorted(set(abs(t) for t in tolerances)):
+        if not unresolved:
+            break
+        tolerance_squared = tolerance * tolerance
+        
+        if tolerance > 0:
+            inv_cell = 1.0 / tolerance
+            keys = [(floor(x * inv_cell), floor(y * inv_cell), floor(z * inv_cell)) for x, y, z in coords]
+        else:
+            keys = coords
+        grid = {}
+        for i, key in enumerate(keys):
+            grid.setdefault(key, []).append(i)
+        
+        remaining = []
+        for i in unresolved:
+            x, y, z = coords[i]
+            key = keys[i]
+            if tolerance > 0:
+                cells = [(key[0] + dx, key[1] + dy, key[2] + dz) for dx, dy, dz in neighbours]
+            else:
+                cells = [key]
+            best, best_j = tolerance_squared, -1
+            for cell in cells:
+                # Cells list their points in order, only earlier points are compared
+                for j in grid.get(cell, ()):
+                    if j >= i:
+                        break
+                    ux, uy, uz = coords[j]
+                    ex, ey, ez = x - ux, y - uy, z - uz
+                    distance_squared = ex * ex + ey * ey + ez * ez
+                    if distance_squared < best or (best_j < 0 and distance_squared <= best):
+                        best, best_j = distance_squared, j
+            if best_j < 0:
+                remaining.append(i)
+            else:
+                distances[i] = math.sqrt(best)
+                nearest[i] = best_j
+        unresolved = remaining
+    
+    return distances, nearest
+
+
+def preview_merge(doc, obj, tolerances, selection_tolerance=None):
+    """
+    Report how many points would merge at several tolerances without
+    changing the geometry.
+    
+    Args:
+        doc (c4d.documents.BaseDocument): The document of the object
+        obj (c4d.PolygonObject): The object to check
+        tolerances (list[float]): Tolerances to report (in cm)
+        selection_tolerance (float): If set, the points that merge at this
+            tolerance are stored in a point selection tag
+    """
+    if not obj.IsInstanceOf(c4d.Opolygon):
+        raise TypeError("Selected object is not a PolygonObject")
+    
+    start_time = time.perf_counter()
+    coords = [(p.x, p.y, p.z) for p in obj.GetAllPoints()]
+    tolerances = sorted(abs(t) for t in tolerances)
+    levels = tolerances if selection_tolerance is None else tolerances + [abs(selection_tolerance)]
+    distances, nearest = find_weld_distances(coords, levels)
+    
+    # The sweep is a binary search per tolerance on the sorted distances
+    sorted_distances = sorted(distances)
+    counts = [bisect.bisect_right(sorted_distances, t) for t in tolerances]
+    print(f"{obj.GetName()}: {len(coords)} points, dry run in "
+          f"{time.perf_counter() - start_time:.3f} s")
+    print("Tolerance (cm)  Merged points")
+    largest = max(counts) if counts and max(counts) > 0 else 1
+    for tolerance, count in zip(tolerances, counts):
+        bar = "#" * int(round(40 * count / largest))
+        print(f"{tolerance:>14g}  {count:>13}  {bar}")
+    
+    if selection_tolerance is None:
+        return counts
+    
+    affected = [False] * len(coords)
+    for i, distance in enumerate(distances):
+        if distance <= abs(selection_tolerance):
+            affected[i] = affected[nearest[i]] = True
+    
+    name = "Merge Preview"
+    tag = None
+    for existing in obj.GetTags():
+        if existing.CheckType(c4d.Tpointselection) and existing.GetName() == name:
+            tag = existing
+    
+    doc.StartUndo()
+    if tag is None:
+        tag = c4d.SelectionTag(c4d.Tpointselection)
+        tag.SetName(name)
+        obj.InsertTag(tag, obj.GetLastTag())
+        doc.AddUndo(c4d.UNDOTYPE_NEWOBJ, tag)
+    else:
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE, tag)
+    tag.GetBaseSelect().SetAll(affected)
+    doc.EndUndo()
+    c4d.EventAdd()
+    
+    print(f"Stored {sum(affected)} points that merge at {selection_tolerance} cm in '{name}'")
+    return counts
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
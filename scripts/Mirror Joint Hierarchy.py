@@ -1,4 +1,5 @@
 import c4d
+import re
 
 #Change these if you need
 mirrorAxisPos = c4d.ID_CA_CONSTRAINT_TAG_MIRROR_AXIS_YZ
@@ -11,53 +12,188 @@ searchPrefix = False
 left_prefixes = ["arm left", "leg left"]
 right_prefixes = ["arm right", "leg right"] 
 
+# Side tokens, matched as whole parts of the name between "_", ".", "-" and spaces (e.g. "hand_L", "Left.arm")
+left_tokens = ["L", "l", "Left", "left"]
+right_tokens = ["R", "r", "Right", "right"]
+
+# Regular expressions with the replacement that turns a left name into the right one,
+# e.g. [(r"^l(?=[A-Z])", "r")] for names like "lArm"
+side_patterns = []
+
+#if True pair joints by their mirrored global position instead of by name, for rigs without a side naming convention
+pairByPosition = False
+#Max distance between a joint and the mirrored position of its counterpart
+positionTolerance = 0.1
+#if True the joints on the positive side of the mirror plane are the targets (as left joints are by name)
+targetsOnPositiveSide = True
+
+token_separator = re.compile(r"([_.\s-])")
+right_by_left_token = dict(zip(left_tokens, right_tokens))
+
 
 def main():
     doc = c4d.documents.GetActiveDocument()
     obj_list = get_selected_joints(doc)
 
+    if pairByPosition:
+        pairs = find_pairs_by_position(obj_list)
+    else:
+        pairs = find_pairs_by_name(obj_list)
+
     doc.StartUndo()
 
-    for obj in obj_list:
-        for i in range(len(left_prefixes)):
-            left_prefix = left_prefixes[i]
-            right_prefix = right_prefixes[i]
-
-            if searchPrefix:
-                if obj.GetName().startswith(left_prefix):
-                    corresponding_name = obj.GetName().replace(left_prefix, right_prefix)
-
-                    for k in obj_list:
-                        if k[c4d.ID_BASELIST_NAME] == corresponding_name:
-                            corresponding_obj = k
-                            break
-
-                    if not corresponding_obj:
-                        print("NOT FOUND " + corresponding_name)
-                        continue
-
-                    add_mirror_constraint(corresponding_obj ,obj)
-            else:
-                #print(obj.GetName())
-                if obj.GetName().find(left_prefix) != -1:
-                    corresponding_name = obj.GetName().replace(left_prefix, right_prefix)
-                    #corresponding_name = corresponding_name.replace("[L", "[R")
-
-                    corresponding_obj = None
-                    for k in obj_list:
-                        if k[c4d.ID_BASELIST_NAME] == corresponding_name:
-                            corresponding_obj = k
-                            break
-
-                    if not corresponding_obj:
-                        print("NOT FOUND " + corresponding_name)
-                        continue
-
-                    add_mirror_constraint(corresponding_obj ,obj)
+    for joint, target_joint in pairs:
+        add_mirror_constraint(joint, target_joint)
 
     doc.EndUndo()
     c4d.EventAdd()
 
+def mirror_name(name):
+    """Return the name of the right side joint for a left side joint, None if the name has no left side."""
+    for left_prefix, right_prefix in zip(left_prefixes, right_prefixes):
+        if searchPrefix:
+            if name.startswith(left_prefix):
+                return name.replace(left_prefix, right_prefix)
+        elif name.find(left_prefix) != -1:
+            return name.replace(left_prefix, right_prefix)
+
+    # Separators end up at the odd indices
+    parts = token_separator.split(name)
+    found = False
+    for i in range(0, len(parts), 2):
+        if parts[i] in right_by_left_token:
+            parts[i] = right_by_left_token[parts[i]]
+            found = True
+    if found:
+        return "".join(parts)
+
+    for pattern, replacement in side_patterns:
+        corresponding_name, count = re.subn(pattern, replacement, name)
+        if count:
+            return corresponding_name
+    return None
+
+def find_pairs_by_name(obj_list):
+    """Pair every left joint with its right joint, looked up in a name index built once.
+
+    Returns (right joint, left joint) tuples as add_mirror_constraint takes them.
+    """
+    by_name = {}
+    for obj in obj_list:
+        by_name.setdefault(obj.GetName(), obj)
+
+    pairs = []
+    for obj in obj_list:
+        corresponding_name = mirror_name(obj.GetName())
+        if corresponding_name is None:
+            continue
+
+        corresponding_obj = by_name.get(corresponding_name)
+        if not corresponding_obj:
+            print("NOT FOUND " + corresponding_name)
+            continue
+
+        pairs.append((corresponding_obj, obj))
+    return pairs
+
+class KDTree:
+    """Static 3D KD-tree for radius queries."""
+
+    def __init__(self, points):
+        self.points = points
+        self.root = self.build(list(range(len(points))), 0)
+
+    def build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        mid = len(indices) // 2
+        return (indices[mid], axis,
+                self.build(indices[:mid], depth + 1),
+                self.build(indices[mid + 1:], depth + 1))
+
+    def within(self, point, radius):
+        """Return (squared distance, index) of all points within radius of point."""
+        found = []
+        radius_squared = radius * radius
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            i, axis, lower, upper = node
+            p = self.points[i]
+            dx, dy, dz = p[0] - point[0], p[1] - point[1], p[2] - point[2]
+            dist = dx * dx + dy * dy + dz * dz
+            if dist <= radius_squared:
+                found.append((dist, i))
+            diff = point[axis] - p[axis]
+            if diff <= radius:
+                stack.append(lower)
+            if diff >= -radius:
+                stack.append(upper)
+        return found
+
+def get_mirror_axis():
+    """Return the coordinate (0 = x, 1 = y, 2 = z) that mirrorAxisPos flips."""
+    for plane, axis in (("YZ", 0), ("ZY", 0), ("XZ", 1), ("ZX", 1), ("XY", 2), ("YX", 2)):
+        if getattr(c4d, "ID_CA_CONSTRAINT_TAG_MIRROR_AXIS_" + plane, None) == mirrorAxisPos:
+            return axis
+    return 0
+
+def get_depth(obj):
+    """Return the number of parents of obj."""
+    depth = 0
+    obj = obj.GetUp()
+    while obj:
+        depth += 1
+        obj = obj.GetUp()
+    return depth
+
+def find_pairs_by_position(obj_list):
+    """Pair joints whose global positions mirror each other across the mirrorAxisPos plane.
+
+    Every joint on the constrained side is mirrored and looked up in a KD-tree of the
+    target side. Candidates within positionTolerance are ranked by distance, joints at
+    the same distance by hierarchy depth difference, and every joint is used in one
+    pair at most.
+    Returns (constrained joint, target joint) tuples as add_mirror_constraint takes them.
+    """
+    axis = get_mirror_axis()
+    side = 1.0 if targetsOnPositiveSide else -1.0
+    positions = []
+    for obj in obj_list:
+        off = obj.GetMg().off
+        positions.append((off.x, off.y, off.z))
+    depths = [get_depth(obj) for obj in obj_list]
+
+    # Joints on the plane have no counterpart
+    targets = [i for i, p in enumerate(positions) if p[axis] * side > positionTolerance]
+    sources = [i for i, p in enumerate(positions) if p[axis] * side < -positionTolerance]
+    tree = KDTree([positions[i] for i in targets])
+
+    candidates = []
+    for i in sources:
+        mirrored = list(positions[i])
+        mirrored[axis] = -mirrored[axis]
+        for dist, k in tree.within(mirrored, positionTolerance):
+            candidates.append((dist, abs(depths[i] - depths[targets[k]]), i, targets[k]))
+    candidates.sort()
+
+    pairs = []
+    used = set()
+    for dist, depth_diff, i, k in candidates:
+        if i in used or k in used:
+            continue
+        used.update((i, k))
+        pairs.append((obj_list[i], obj_list[k]))
+
+    for i in sources:
+        if i not in used:
+            print("NOT FOUND counterpart of " + obj_list[i].GetName())
+    return pairs
+
 def get_selected_joints(doc):
     """Retrieve all selected joints in the current document."""
     selected_joints = []
@@ -0,0 +1,242 @@
+import c4d
+import c4d.modules.character
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#
+# Mirrors the weights of one side of a mesh to the other side, on the same weight tag.
+# Select one or more objects with a weight tag and click Execute.
+#
+# Every point on the destination side is matched to the point closest to its mirrored position
+# (in object space), and gets the weights of that point with left and right joints swapped.
+# Joints are paired by name with the same side names as Mirror Joint Hierarchy.
+# Points without a counterpart keep their weights, they are reported and selected.
+#
+
+#Change these if you need
+#Mirror plane: 0 = YZ (flips X), 1 = XZ (flips Y), 2 = XY (flips Z)
+mirrorAxis = 0
+
+#if True copy from the positive side of the plane to the negative side, otherwise the other way around
+fromPositive = True
+
+#Max distance between a point and the mirrored position of its counterpart
+tolerance = 0.01
+
+#if True search side string in joint name as prefix, otherwise search as substring
+searchPrefix = False
+
+# Define side names
+left_prefixes = ["arm left", "leg left"]
+right_prefixes = ["arm right", "leg right"]
+
+
+def main():
+    doc = c4d.documents.GetActiveDocument()
+    objs = [obj for obj in doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_CHILDREN)
+            if isinstance(obj, c4d.PointObject) and obj.GetTag(c4d.Tweights)]
+    if not objs:
+        c4d.gui.MessageDialog("Select one or more objects with a weight tag.")
+        return
+
+    doc.StartUndo()
+
+    for obj in objs:
+        start_time = time.perf_counter()
+        mirror_weights(doc, obj)
+        print(obj.GetName() + " took " + "%.3f" % (time.perf_counter() - start_time) + " s")
+
+    doc.EndUndo()
+    c4d.EventAdd()
+
+def mirror_name(name):
+    """Return the name of the joint on the other side, or the name itself for joints without a side."""
+    for left_prefix, right_prefix in zip(left_prefixes, right_prefixes):
+        for side, other in ((left_prefix, right_prefix), (right_prefix, left_prefix)):
+            if searchPrefix:
+                if name.startswith(side):
+                    return other + name[len(side):]
+            elif name.find(side) != -1:
+                return name.replace(side, other)
+    return name
+
+def get_joint_map(tag, doc):
+    """Return the index of the mirrored joint for every joint of the weight tag."""
+    joint_index = {}
+    names = []
+    for i in range(tag.GetJointCount()):
+        joint = tag.GetJoint(i, doc)
+        names.append(joint.GetName() if joint is not None else None)
+        if names[i] is not None and names[i] not in joint_index:
+            joint_index[names[i]] = i
+
+    joint_map = list(range(len(names)))
+    for i, name in enumerate(names):
+        if name is None:
+            continue
+        mirrored = mirror_name(name)
+        if mirrored == name:
+            continue
+        if mirrored not in joint_index:
+            # Keep the weights on the same joint rather than losing them
+            print("NOT FOUND " + mirrored)
+            continue
+        joint_map[i] = joint_index[mirrored]
+    return joint_map
+
+def find_closest_points(points, queries, tolerance):
+    """
+    Find the closest point within tolerance for every query position.
+
+    Points are put on a uniform grid with the tolerance as cell size, so the
+    closest point within tolerance lies in one of the 27 cells around a query.
+
+    Args:
+        points (list[tuple]): Point positions as (x, y, z) tuples
+        queries (list[tuple]): Query positions as (x, y, z) tuples
+        tolerance (float): Maximum distance between a query and its point
+
+    Returns:
+        list[int]: Index into points for every query, -1 where no point is within tolerance
+    """
+    cell_size = max(abs(tolerance), 1e-6)
+    tolerance_squared = tolerance * tolerance
+    neighbours = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+    if np is not None:
+        return find_closest_points_numpy(np.array(points, dtype=np.float64).reshape(-1, 3),
+                                         np.array(queries, dtype=np.float64).reshape(-1, 3),
+                                         cell_size, tolerance_squared, neighbours).tolist()
+
+    inv_cell = 1.0 / cell_size
+    floor = math.floor
+    grid = {}
+    for i, (x, y, z) in enumerate(points):
+        grid.setdefault((floor(x * inv_cell), floor(y * inv_cell), floor(z * inv_cell)), []).append(i)
+
+    matches = []
+    for x, y, z in queries:
+        cx, cy, cz = floor(x * inv_cell), floor(y * inv_cell), floor(z * inv_cell)
+        match = -1
+        best = tolerance_squared
+        for dx, dy, dz in neighbours:
+            for n in grid.get((cx + dx, cy + dy, cz + dz), ()):
+                px, py, pz = points[n]
+                ex, ey, ez = x - px, y - py, z - pz
+                dist = ex * ex + ey * ey + ez * ez
+                if dist <= best:
+                    match, best = n, dist
+        matches.append(match)
+    return matches
+
+def find_closest_points_numpy(points, queries, cell_size, tolerance_squared, neighbours):
+    """Vectorized find_closest_points, cells are looked up in the sorted cell keys of the points."""
+    matches = np.full(len(queries), -1, dtype=np.int64)
+    if not len(points) or not len(queries):
+        return matches
+
+    point_cells = np.floor(points / cell_size).astype(np.int64)
+    query_cells = np.floor(queries / cell_size).astype(np.int64)
+    low = np.minimum(point_cells.min(axis=0), query_cells.min(axis=0)) - 1
+    dims = np.maximum(point_cells.max(axis=0), query_cells.max(axis=0)) - low + 2
+
+    def cell_keys(cells):
+        cells = cells - low
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    order = np.argsort(cell_keys(point_cells), kind="stable")
+    sorted_keys = cell_keys(point_cells)[order]
+    best = np.full(len(queries), tolerance_squared)
+
+    # Keys are linear in the cell, so every neighbour cell is a constant offset and the
+    # query keys stay sorted, which makes the lookups much faster
+    query_order = np.argsort(cell_keys(query_cells))
+    queries = queries[query_order]
+    query_keys = cell_keys(query_cells)[query_order]
+
+    for dx, dy, dz in neighbours:
+        keys = query_keys + (dx * dims[1] + dy) * dims[2] + dz
+        first = np.searchsorted(sorted_keys, keys, side="left")
+        last = np.searchsorted(sorted_keys, keys, side="right")
+        # Walk the points of every cell in step, most cells hold one point at most
+        n = 0
+        while True:
+            active = np.flatnonzero(first + n < last)
+            if not len(active):
+                break
+            candidates = order[first[active] + n]
+            dist = ((points[candidates] - queries[active]) ** 2).sum(axis=1)
+            closer = dist <= best[active]
+            matches[active[closer]] = candidates[closer]
+            best[active[closer]] = dist[closer]
+            n += 1
+    matches[query_order] = matches.copy()
+    return matches
+
+def mirror_weights(doc, obj):
+    """Mirror the weights of obj across the mirror plane, one bulk read and write per joint."""
+    tag = obj.GetTag(c4d.Tweights)
+    side = 1.0 if fromPositive else -1.0
+    points = [(p.x, p.y, p.z) for p in obj.GetAllPoints()]
+
+    # Points within tolerance of the plane mirror onto themselves and keep their weights
+    source_points = [i for i, p in enumerate(points) if p[mirrorAxis] * side >= -tolerance]
+    targets = [i for i, p in enumerate(points) if p[mirrorAxis] * side < -tolerance]
+    mirrored = []
+    for i in targets:
+        p = list(points[i])
+        p[mirrorAxis] = -p[mirrorAxis]
+        mirrored.append(tuple(p))
+
+    closest = find_closest_points([points[i] for i in source_points], mirrored, tolerance)
+    matched = [(t, source_points[c]) for t, c in zip(targets, closest) if c >= 0]
+    unmatched = [t for t, c in zip(targets, closest) if c < 0]
+
+    joint_map = get_joint_map(tag, doc)
+    joint_count = tag.GetJointCount()
+
+    # Only the joints whose weights change are written back
+    doc.AddUndo(c4d.UNDOTYPE_CHANGE, tag)
+    if np is not None:
+        matched = np.array(matched, dtype=np.int64).reshape(-1, 2)
+        # One float32 array holds all weights, every map is converted as it is read
+        weights = np.empty((joint_count, len(points)), dtype=np.float32)
+        for i in range(joint_count):
+            weights[i] = np.asarray(tag.GetWeightMap(i), dtype=np.float32)
+        mirrored_weights = np.zeros((joint_count, len(matched)), dtype=np.float32)
+        for i, k in enumerate(joint_map):
+            mirrored_weights[k] += weights[i, matched[:, 1]]
+        changed = np.flatnonzero((mirrored_weights != weights[:, matched[:, 0]]).any(axis=1))
+        for k in changed:
+            weights[k, matched[:, 0]] = mirrored_weights[k]
+            tag.SetWeightMap(int(k), weights[k].tolist())
+    else:
+        weights = [tag.GetWeightMap(i) for i in range(joint_count)]
+        mirrored_weights = [[0.0] * len(matched) for k in range(joint_count)]
+        for i, k in enumerate(joint_map):
+            for n, (t, s) in enumerate(matched):
+                mirrored_weights[k][n] += weights[i][s]
+        for k in range(joint_count):
+            if any(weights[k][t] != w for (t, s), w in zip(matched, mirrored_weights[k])):
+                for (t, s), w in zip(matched, mirrored_weights[k]):
+                    weights[k][t] = w
+                tag.SetWeightMap(k, weights[k])
+    tag.WeightDirty()
+
+    print(obj.GetName() + ": " + str(len(matched)) + " points mirrored")
+    if unmatched:
+        print(str(len(unmatched)) + " points have no counterpart within " + str(tolerance) + ", they are selected")
+        print("first ones: " + str(unmatched[:10]))
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE_SELECTION, obj)
+        selection = obj.GetPointS()
+        selection.DeselectAll()
+        for i in unmatched:
+            selection.Select(i)
+
+if __name__=='__main__':
+    main()
@@ -1,6 +1,23 @@
 import c4d
 from c4d import gui
 import c4d.modules.character
+import math
+import sys
+import time
+import types
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The Script Manager runs this file from scratch every time, so the cache lives in its own module
+_cache = sys.modules.setdefault("_point_weight_transfer_cache", types.ModuleType("_point_weight_transfer_cache"))
+if not hasattr(_cache, "sources"):
+    _cache.sources = {}
+
+#NUMBER OF SOURCE OBJECTS KEPT IN THE CACHE
+CACHE_SIZE = 4
 
 # Welcome to the world of Python
 
@@ -13,91 +30,729 @@ import c4d.modules.character
 # This script copies weights from one poly object to another on a new weight tag
 # Please set it up as follows:
 #
-# You must select two objects in your scene..
+# You must select two or more objects in your scene..
 #
 # First / top object (just somewhere "above" in the scene object list) should be the object
 # you are trying to copy weights from and that also contains the weight tag. You only
 # have to select the polygon object itself, selecting the weight tag will make no diff
 #
+# Characters split into several skinned meshes can use all of them as sources: set "sourceCount"
+# below and select the sources first. Their joints are matched by name, and every destination
+# point takes the weights of whichever source surface is closest.
+#
 # Second / bottom object is going to be the object you are copying weights to. This object
 # can contain a weight tag, or it cannot. The script will create a new weight tag on this object and
-# apply everything there.
+# apply everything there. Select more objects below to copy the same weights to all of them.
 #
-# SAVE FIRST and then click Execute. This is a brute force style algo so it is not fast!
-# It is incredibly slow, but it works. C4D will appear frozen until the script completes.
+# The source points and search structures are kept between runs and only rebuilt when the source
+# object changes, so transferring to more objects later on skips that work.
+#
+# A destination with exactly the same points as the source (a clone or a re-export) skips the
+# search and gets the weights copied point for point, unchanged unless pruneThreshold or
+# maxInfluences is set.
+#
+# SAVE FIRST and then click Execute. Every destination point gets the weights of the closest
+# source point (in global space), found with a KD-tree, so the meshes can have different topology.
 #
 # If someone wants to help me figure out how to do a progress bar that would be extremely awesome.
 #
-# Adjust "accuracy" threshold below if needed...
+# Adjust "accuracy" threshold below if needed. Destination points further than this from any
+# source point still get weights, but are reported in the console.
+#
+# Set "surfaceMode" below to project every destination point onto the source polygons and blend
+# the weights of the corners of the closest triangle. This avoids stair-stepped weights when the
+# destination is denser than the source. Needs NumPy, otherwise closest points are used.
 
 
-# Main function
-def main():
+class KDTree:
+    """Static KD-tree over 3D points for closest point queries."""
 
-    #POINT MATCH ACCURACY
-    ac = 0.01
+    def __init__(self, points):
+        """Builds the tree from a list of (x, y, z) tuples."""
+        self.count = len(points)
+        order = list(range(self.count))
+        self.axes = [0] * self.count
 
-    doc = c4d.documents.GetActiveDocument()
-    selected = doc.GetActiveObjects(0)
+        # Sort each range on its split axis; the median of a range is its node.
+        stack = [(0, self.count, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= 0:
+                continue
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: points[i][axis])
+            mid = (lo + hi) >> 1
+            self.axes[mid] = axis
+            nextAxis = (axis + 1) % 3
+            stack.append((lo, mid, nextAxis))
+            stack.append((mid + 1, hi, nextAxis))
 
-    fromObj = selected[0]
-    toObj = selected[1]
+        self.order = order
+        self.coords = [points[i] for i in order]
 
-    fromPointArr = []
-    toPointArr = []
+    def Nearest(self, point):
+        """Returns (index, squared distance) of the closest point to (x, y, z)."""
+        coords = self.coords
+        axes = self.axes
+        bestIndex = -1
+        bestDist = math.inf
 
-    cnt = fromObj.GetPointCount()
-    for i in range(cnt):
-        fromPointArr.append(fromObj.GetPoint(i))
+        # Each entry is a range of the tree and the squared distance to its split plane
+        stack = [(0, self.count, 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if lo >= hi or bound >= bestDist:
+                continue
+            mid = (lo + hi) >> 1
+            node = coords[mid]
+            dx = point[0] - node[0]
+            dy = point[1] - node[1]
+            dz = point[2] - node[2]
+            dist = dx * dx + dy * dy + dz * dz
+            if dist < bestDist:
+                bestDist = dist
+                bestIndex = mid
 
-    cnt = toObj.GetPointCount()
-    for i in range(cnt):
-        toPointArr.append(toObj.GetPoint(i))
+            diff = point[axes[mid]] - node[axes[mid]]
+            if diff < 0:
+                stack.append((mid + 1, hi, diff * diff))
+                stack.append((lo, mid, bound))
+            else:
+                stack.append((lo, mid, diff * diff))
+                stack.append((mid + 1, hi, bound))
 
-    fromTag = fromObj.GetTag(c4d.Tweights)
-    cnt = fromTag.GetJointCount()
+        if bestIndex < 0:
+            return -1, bestDist
+        return self.order[bestIndex], bestDist
 
-    doc.StartUndo() #Start UndoBlock
+
+def ClosestPointOnTriangles(p, a, b, c):
+    """Returns the barycentric coordinates of the closest point on each triangle (a, b, c) to p.
+
+    All arguments are (n, 3) arrays, the result is an (n, 3) array of weights for a, b and c.
+    """
+    def dot(u, v):
+        return np.einsum("ij,ij->i", u, v)
+
+    def div(num, den):
+        return num / np.where(den != 0, den, 1.0)
+
+    ab = b - a
+    ac = c - a
+    ap = p - a
+    bp = p - b
+    cp = p - c
+    d1, d2 = dot(ab, ap), dot(ac, ap)
+    d3, d4 = dot(ab, bp), dot(ac, bp)
+    d5, d6 = dot(ab, cp), dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    # Inside the triangle
+    denom = va + vb + vc
+    v = div(vb, denom)
+    w = div(vc, denom)
+    bary = np.stack([1.0 - v - w, v, w], axis=1)
+
+    # Voronoi regions of the edges and corners, applied from lowest to highest priority
+    regions = []
+    t = div(d4 - d3, (d4 - d3) + (d5 - d6))
+    regions.append(((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0), np.stack([0.0 * t, 1.0 - t, t], axis=1)))
+    t = div(d2, d2 - d6)
+    regions.append(((vb <= 0) & (d2 >= 0) & (d6 <= 0), np.stack([1.0 - t, 0.0 * t, t], axis=1)))
+    regions.append(((d6 >= 0) & (d5 <= d6), np.array([0.0, 0.0, 1.0])))
+    t = div(d1, d1 - d3)
+    regions.append(((vc <= 0) & (d1 >= 0) & (d3 <= 0), np.stack([1.0 - t, t, 0.0 * t], axis=1)))
+    regions.append(((d3 >= 0) & (d4 <= d3), np.array([0.0, 1.0, 0.0])))
+    regions.append(((d1 <= 0) & (d2 <= 0), np.array([1.0, 0.0, 0.0])))
+    for mask, value in regions:
+        bary = np.where(mask[:, None], value, bary)
+
+    # Degenerate triangles fall back to their first corner
+    bary[~np.isfinite(bary).all(axis=1)] = (1.0, 0.0, 0.0)
+    return bary
+
+
+class TriangleBVH:
+    """Bounding volume hierarchy over triangles, queried for many points at once."""
+
+    def __init__(self, points, triangles, leafSize=8):
+        """Builds the tree from an (n, 3) point array and an (m, 3) array of point indices."""
+        self.points = points
+        corners = points[triangles]
+        triMin = corners.min(axis=1)
+        triMax = corners.max(axis=1)
+        centers = corners.mean(axis=1)
+
+        order = np.arange(len(triangles))
+        nodeMin, nodeMax, left, right, start, count = [], [], [], [], [], []
+
+        def NewNode():
+            for arr in (nodeMin, nodeMax):
+                arr.append(None)
+            for arr in (left, right, start, count):
+                arr.append(-1)
+            return len(left) - 1
+
+        # Split every node at the median center along its longest axis
+        stack = [(NewNode(), 0, len(triangles))]
+        while stack:
+            node, lo, hi = stack.pop()
+            idx = order[lo:hi]
+            nodeMin[node] = triMin[idx].min(axis=0)
+            nodeMax[node] = triMax[idx].max(axis=0)
+            if hi - lo <= leafSize:
+                start[node] = lo
+                count[node] = hi - lo
+                continue
+            nodeCenters = centers[idx]
+            axis = np.argmax(nodeCenters.max(axis=0) - nodeCenters.min(axis=0))
+            mid = (lo + hi) >> 1
+            order[lo:hi] = idx[np.argpartition(nodeCenters[:, axis], mid - lo)]
+            left[node] = NewNode()
+            right[node] = NewNode()
+            stack.append((left[node], lo, mid))
+            stack.append((right[node], mid, hi))
+
+        self.triangles = triangles[order]
+        self.order = order
+        self.nodeMin = np.array(nodeMin)
+        self.nodeMax = np.array(nodeMax)
+        self.left = np.array(left)
+        self.right = np.array(right)
+        self.start = np.array(start)
+        self.count = np.array(count)
+
+    def BoxDistance(self, p, nodes):
+        """Squared distance from each point to the bounding box of each node."""
+        d = np.maximum(np.maximum(self.nodeMin[nodes] - p, p - self.nodeMax[nodes]), 0.0)
+        return np.einsum("ij,ij->i", d, d)
+
+    def Update(self, queries, q, slots, best):
+        """Tests query points q against triangles in tree order slots and keeps the closest."""
+        if len(q) == 0:
+            return
+        tris = self.triangles[slots]
+        p = queries[q]
+        a, b, c = self.points[tris[:, 0]], self.points[tris[:, 1]], self.points[tris[:, 2]]
+        bary = ClosestPointOnTriangles(p, a, b, c)
+        closestPoint = bary[:, 0:1] * a + bary[:, 1:2] * b + bary[:, 2:3] * c
+        diff = p - closestPoint
+        dist = np.einsum("ij,ij->i", diff, diff)
+
+        # Closest hit per query, then keep it if it beats the current best
+        order = np.lexsort((dist, q))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = q[order][1:] != q[order][:-1]
+        hits = order[first]
+        better = dist[hits] < best[0][q[hits]]
+        hits = hits[better]
+        best[0][q[hits]] = dist[hits]
+        best[1][q[hits]] = slots[hits]
+        best[2][q[hits]] = bary[hits]
+
+    def LeafSlots(self, q, nodes):
+        """Expands (query, leaf) pairs into (query, triangle slot) pairs."""
+        counts = self.count[nodes]
+        total = counts.sum()
+        firsts = np.repeat(np.cumsum(counts) - counts, counts)
+        slots = np.repeat(self.start[nodes], counts) + np.arange(total) - firsts
+        return np.repeat(q, counts), slots
+
+    def Closest(self, queries, batchSize=50000):
+        """Returns (triangles, barycentric weights, squared distances) of the closest surface
+        points to an (n, 3) array of query points. Triangles index the input triangles."""
+        count = len(queries)
+        dist = np.full(count, np.inf)
+        slots = np.zeros(count, dtype=np.int64)
+        bary = np.zeros((count, 3))
+        for lo in range(0, count, batchSize):
+            hi = min(count, lo + batchSize)
+            best = [dist[lo:hi], slots[lo:hi], bary[lo:hi]]
+            self.ClosestBatch(queries[lo:hi], best)
+        return self.order[slots], bary, dist
+
+    def ClosestBatch(self, queries, best):
+        allQueries = np.arange(len(queries))
+
+        # Greedy descent into the closer child gives a first upper bound per query
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        inner = self.left[nodes] >= 0
+        while inner.any():
+            q, n = allQueries[inner], nodes[inner]
+            goLeft = self.BoxDistance(queries[q], self.left[n]) <= self.BoxDistance(queries[q], self.right[n])
+            nodes[q] = np.where(goLeft, self.left[n], self.right[n])
+            inner = self.left[nodes] >= 0
+        self.Update(queries, *self.LeafSlots(allQueries, nodes), best)
+
+        # Visit all nodes closer than the best hit, level by level for all queries at once
+        q = allQueries
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        while len(q):
+            keep = self.BoxDistance(queries[q], nodes) <= best[0][q]
+            q, nodes = q[keep], nodes[keep]
+            leaf = self.left[nodes] < 0
+            self.Update(queries, *self.LeafSlots(q[leaf], nodes[leaf]), best)
+            q, nodes = q[~leaf], nodes[~leaf]
+            q = np.concatenate([q, q])
+            nodes = np.concatenate([self.left[nodes], self.right[nodes]])
+
+
+def GetTriangles(obj):
+    """Returns the polygons of obj as an (n, 3) array of triangles, quads are split in two."""
+    polys = np.array([(p.a, p.b, p.c, p.d) for p in obj.GetAllPolygons()], dtype=np.int64).reshape(-1, 4)
+    quads = polys[polys[:, 2] != polys[:, 3]]
+    return np.concatenate([polys[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+
+
+def GetGlobalPoints(obj):
+    """Returns the points of obj in global space as (x, y, z) tuples."""
+    mg = obj.GetMg()
+    return [tuple(mg * p) for p in obj.GetAllPoints()]
+
+
+def GetJointIndex(tag, doc):
+    """Returns a dict of joint name -> joint index for a weight tag."""
+    jointIndex = {}
+    for i in range(tag.GetJointCount()):
+        joint = tag.GetJoint(i, doc)
+        if joint is not None and joint.GetName() not in jointIndex:
+            jointIndex[joint.GetName()] = i
+    return jointIndex
+
+
+def ReadWeights(tag):
+    """Reads all weights of a weight tag as one list per joint, one GetWeightMap call each."""
+    return [tag.GetWeightMap(i) for i in range(tag.GetJointCount())]
+
+
+class SparseWeights:
+    """Skin weights in compressed sparse rows, one row per point.
+
+    The weights of point p are values[indptr[p]:indptr[p + 1]] for the joints
+    joints[indptr[p]:indptr[p + 1]], so memory grows with the non-zero weights only.
+    """
+
+    def __init__(self, pointCount, jointCount, indptr, joints, values):
+        self.pointCount = pointCount
+        self.jointCount = jointCount
+        self.indptr = indptr
+        self.joints = joints
+        self.values = values
+
+    @classmethod
+    def FromEntries(cls, pointCount, jointCount, points, joints, values):
+        """Builds the rows from unordered (point, joint, value) entries, summing duplicates."""
+        keys = points.astype(np.int64) * jointCount + joints
+        keys, inverse = np.unique(keys, return_inverse=True)
+        values = np.bincount(inverse, weights=values, minlength=len(keys)).astype(np.float32)
+        nonZero = values != 0
+        keys, values = keys[nonZero], values[nonZero]
+        points = keys // jointCount
+        indptr = np.zeros(pointCount + 1, dtype=np.int64)
+        np.cumsum(np.bincount(points, minlength=pointCount), out=indptr[1:])
+        return cls(pointCount, jointCount, indptr, (keys % jointCount).astype(np.int32), values)
+
+    @classmethod
+    def FromTag(cls, tag):
+        """Reads a weight tag one joint map at a time, keeping only the non-zero weights."""
+        obj = tag.GetObject()
+        pointCount = obj.GetPointCount() if obj is not None else 0
+        jointCount = tag.GetJointCount()
+        points, joints, values = [], [], []
+        for i in range(jointCount):
+            weights = np.asarray(tag.GetWeightMap(i), dtype=np.float32)
+            nonZero = np.flatnonzero(weights)
+            points.append(nonZero)
+            joints.append(np.full(len(nonZero), i, dtype=np.int32))
+            values.append(weights[nonZero])
+
+        if jointCount == 0:
+            return cls(pointCount, 0, np.zeros(pointCount + 1, dtype=np.int64),
+                       np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+        return cls.FromEntries(pointCount, jointCount, np.concatenate(points),
+                               np.concatenate(joints), np.concatenate(values))
+
+    @classmethod
+    def Stack(cls, parts):
+        """Joins the rows of several SparseWeights with the same joints."""
+        indptr = [np.zeros(1, dtype=np.int64)]
+        offset = 0
+        for part in parts:
+            indptr.append(part.indptr[1:] + offset)
+            offset += part.indptr[-1]
+        return cls(sum(part.pointCount for part in parts), parts[0].jointCount, np.concatenate(indptr),
+                   np.concatenate([part.joints for part in parts]),
+                   np.concatenate([part.values for part in parts]))
+
+    def RowOfEntries(self):
+        """Returns the point index of every stored weight."""
+        return np.repeat(np.arange(self.pointCount), np.diff(self.indptr))
+
+    def Gather(self, rows):
+        """Returns new weights where point k has the weights of point rows[k]."""
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.indptr[rows + 1] - self.indptr[rows]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        entries = np.repeat(self.indptr[rows] - indptr[:-1], counts) + np.arange(indptr[-1])
+        return SparseWeights(len(rows), self.jointCount, indptr,
+                             self.joints[entries], self.values[entries])
+
+    def Blend(self, rows, blend):
+        """Returns new weights where point k has the sum of the weights of the points
+        rows[k, c], each scaled by blend[k, c]."""
+        points, joints, values = [], [], []
+        for c in range(rows.shape[1]):
+            gathered = self.Gather(rows[:, c])
+            points.append(gathered.RowOfEntries())
+            joints.append(gathered.joints)
+            values.append(gathered.values * np.repeat(blend[:, c], np.diff(gathered.indptr)))
+        return SparseWeights.FromEntries(len(rows), self.jointCount, np.concatenate(points),
+                                         np.concatenate(joints), np.concatenate(values))
+
+    def RemapJoints(self, jointMap, jointCount):
+        """Moves every weight of joint j to joint jointMap[j], weights mapped to -1 are dropped."""
+        joints = np.asarray(jointMap, dtype=np.int64)[self.joints]
+        keep = joints >= 0
+        return SparseWeights.FromEntries(self.pointCount, jointCount, self.RowOfEntries()[keep],
+                                         joints[keep], self.values[keep])
+
+    def Keep(self, mask):
+        """Drops the stored weights where mask is False."""
+        rows = self.RowOfEntries()[mask]
+        np.cumsum(np.bincount(rows, minlength=self.pointCount), out=self.indptr[1:])
+        self.joints = self.joints[mask]
+        self.values = self.values[mask]
+
+    def Prune(self, threshold):
+        """Drops all weights below threshold."""
+        self.Keep(self.values >= threshold)
+
+    def LimitInfluences(self, maxCount):
+        """Keeps only the maxCount largest weights of every point."""
+        rows = self.RowOfEntries()
+        order = np.lexsort((-self.values, rows))
+        rank = np.arange(len(order)) - self.indptr[rows[order]]
+        mask = np.zeros(len(order), dtype=bool)
+        mask[order[rank < maxCount]] = True
+        self.Keep(mask)
+
+    def Normalize(self):
+        """Scales the weights of every point so they sum up to one."""
+        rows = self.RowOfEntries()
+        sums = np.bincount(rows, weights=self.values, minlength=self.pointCount)
+        self.values = (self.values / np.where(sums > 0, sums, 1.0)[rows]).astype(np.float32)
+
+    def WriteTag(self, tag, joints, jointMap=None):
+        """Writes the weight map of each joint index in joints to the tag, one call per joint.
+        With a jointMap, joint j is written to the tag joint jointMap[j]."""
+        rows = self.RowOfEntries()
+        order = np.argsort(self.joints, kind="stable")
+        bounds = np.searchsorted(self.joints[order], np.arange(self.jointCount + 1))
+        for j in joints:
+            entries = order[bounds[j]:bounds[j + 1]]
+            weights = np.zeros(self.pointCount, dtype=np.float32)
+            weights[rows[entries]] = self.values[entries]
+            tag.SetWeightMap(j if jointMap is None else jointMap[j], weights.tolist())
+
+
+class SourceData:
+    """Points, search structures and weights of the source objects, built on first use.
+
+    All sources share one point list, so a single query finds the closest source surface.
+    """
+
+    def __init__(self, objs):
+        self.key = SourceKey(objs)
+        self.points = []
+        self.offsets = []
+        for obj in objs:
+            self.offsets.append(len(self.points))
+            self.points.extend(GetGlobalPoints(obj))
+        self.tree = None
+        self.triangles = None
+        self.bvh = None
+        self.weightsKey = None
+        self.weights = None
+        self.jointNames = []
+        self.joints = []
+
+    def GetTree(self):
+        if self.tree is None:
+            self.tree = KDTree(self.points)
+        return self.tree
+
+    def GetBVH(self, objs):
+        if self.bvh is None:
+            self.triangles = np.concatenate([GetTriangles(obj) + offset
+                                             for obj, offset in zip(objs, self.offsets)])
+            self.bvh = TriangleBVH(np.array(self.points), self.triangles)
+        return self.bvh
+
+    def GetWeights(self, tags, doc):
+        """Returns the weights of all sources as one row per combined point and one column per
+        joint name in jointNames. Read again only when any of the weights changed."""
+        key = tuple((tag.GetWeightDirty(), tag.GetJointCount()) for tag in tags)
+        if self.weights is not None and self.weightsKey == key:
+            return self.weights
+
+        # Union of the joint names of all sources, in order of appearance
+        self.jointNames = []
+        self.joints = []
+        unionIndex = {}
+        jointMaps = []
+        for tag in tags:
+            jointMap = [-1] * tag.GetJointCount()
+            for name, i in GetJointIndex(tag, doc).items():
+                if name not in unionIndex:
+                    unionIndex[name] = len(self.jointNames)
+                    self.jointNames.append(name)
+                    self.joints.append(tag.GetJoint(i, doc))
+                jointMap[i] = unionIndex[name]
+            jointMaps.append(jointMap)
+
+        if np is not None:
+            self.weights = SparseWeights.Stack([SparseWeights.FromTag(tag).RemapJoints(jointMap, len(self.jointNames))
+                                                for tag, jointMap in zip(tags, jointMaps)])
+        else:
+            self.weights = [[] for name in self.jointNames]
+            for tag, jointMap in zip(tags, jointMaps):
+                pointCount = tag.GetObject().GetPointCount()
+                maps = ReadWeights(tag)
+                for u in range(len(self.jointNames)):
+                    self.weights[u].extend(maps[jointMap.index(u)] if u in jointMap else [0.0] * pointCount)
+        self.weightsKey = key
+        return self.weights
+
+
+def SamePoints(points, toPointArr, ac):
+    """True if both point lists have the same count and every point lies within ac of its
+    counterpart, as after a re-export or a clone of the source."""
+    if len(points) != len(toPointArr):
+        return False
+    if np is not None:
+        return not points or float(np.abs(np.array(points) - np.array(toPointArr)).max()) <= ac
+    for p, q in zip(points, toPointArr):
+        if abs(p[0] - q[0]) > ac or abs(p[1] - q[1]) > ac or abs(p[2] - q[2]) > ac:
+            return False
+    return True
+
+
+def SourceKey(objs):
+    """Dirty checksum of the points and the global matrices of objs.
+
+    The matrix itself is compared, moving a parent changes the global points of its
+    children without changing their own dirty counts.
+    """
+    key = []
+    for obj in objs:
+        mg = obj.GetMg()
+        key.append((obj.GetDirty(c4d.DIRTYFLAGS_DATA),
+                    tuple(mg.off), tuple(mg.v1), tuple(mg.v2), tuple(mg.v3)))
+    return tuple(key)
+
+
+def GetSourceData(objs):
+    """Returns the cached SourceData of objs, rebuilt when any of the objects changed."""
+    guid = tuple(obj.GetGUID() for obj in objs)
+    data = _cache.sources.pop(guid, None)
+    if data is not None and data.key == SourceKey(objs):
+        print("Using cached source data of " + ", ".join(obj.GetName() for obj in objs))
+    else:
+        data = SourceData(objs)
+
+    # Most recently used entries last
+    _cache.sources[guid] = data
+    while len(_cache.sources) > CACHE_SIZE:
+        del _cache.sources[next(iter(_cache.sources))]
+    return data
+
+
+def TransferWeights(doc, fromObjs, source, toObj, ac, surfaceMode, verbose,
+                    pruneThreshold, maxInfluences, normalize):
+    """Copies the weights of the closest source to toObj, creating the weight tag and skin if needed."""
+    toPointArr = GetGlobalPoints(toObj)
+    farPoints = []
+    samePoints = SamePoints(source.points, toPointArr, ac)
+
+    if samePoints:
+        # Same points in the same order, every point keeps the weights of its counterpart
+        print(toObj.GetName() + " matches the source point for point, copying weights directly")
+        surfaceMode = False
+        closest = range(len(toPointArr))
+        if np is not None:
+            closest = np.arange(len(toPointArr))
+    elif surfaceMode:
+        # Closest point on the source surface, blended from the corners of its triangle
+        bvh = source.GetBVH(fromObjs)
+        hitTris, blend, dists = bvh.Closest(np.array(toPointArr).reshape(-1, 3))
+        closest = source.triangles[hitTris]
+        farPoints = np.flatnonzero(dists > ac * ac).tolist()
+    else:
+        # Closest source point for every destination point
+        tree = source.GetTree()
+        closest = []
+        for k, point in enumerate(toPointArr):
+            j, dist = tree.Nearest(point)
+            closest.append(j)
+            if dist > ac * ac:
+                farPoints.append(k)
+        if np is not None:
+            closest = np.array(closest, dtype=np.int64)
+
+    if farPoints:
+        print(str(len(farPoints)) + " dest points are further than " + str(ac) + " from the source")
+        print("first ones: " + str(farPoints[:10]))
+
+    fromWeights = source.GetWeights([obj.GetTag(c4d.Tweights) for obj in fromObjs], doc)
+    cnt = len(source.jointNames)
 
     toTag = toObj.GetTag(c4d.Tweights)
     if not toTag:
         toTag = toObj.MakeTag(c4d.Tweights)
         doc.AddUndo(c4d.UNDOTYPE_NEWOBJ,toTag)
-        for i in range(cnt):
-            toTag.AddJoint(fromTag.GetJoint(i))
-
+        for joint in source.joints:
+            toTag.AddJoint(joint)
+    else:
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE,toTag)
 
     cnt2 = toTag.GetJointCount()
-    print(str(cnt) + "source joints total")
-    print(str(cnt2) + "dest joints total")
-    pcnt = fromObj.GetPointCount()
+    if verbose:
+        print(str(cnt) + " source joints total")
+        print(str(cnt2) + " dest joints total")
+
+    # Match joints by name once, then move every weight map in one call
+    toJointIndex = GetJointIndex(toTag, doc)
+    jointMap = [-1] * cnt
+    missing = []
 
     #i = joint index
-    for i in range(cnt):
-        joint = fromTag.GetJoint(i, doc)
-        print ("SOURCE JOINT: " + joint.GetName() + " " + str(i))
-        for k in range(cnt2):
-            joint2 = toTag.GetJoint(k, doc)
-            print("dest name ", joint2.GetName())
-            if joint.GetName() == joint2.GetName():
-                print("DEST JOINT: " + joint2.GetName() + " " + str(k))
-                for j in range(len(fromPointArr)):
-                    fromPointWeight = fromTag.GetWeight(i, j)
-                    if fromPointWeight>0:
-                        fromPoint = fromPointArr[j]
-                        #print k
-                        #print j
-                        #print fromPointWeight
-                        toTag.SetWeight(k, j, fromPointWeight)
-                break;
-    
-    newSkin = c4d.BaseObject(c4d.Oskin)
-    newSkin.InsertUnder(toObj)
-    doc.AddUndo(c4d.UNDOTYPE_NEWOBJ,newSkin)
+    for i, name in enumerate(source.jointNames):
+        k = toJointIndex.get(name)
+        if k is None:
+            missing.append(name)
+            if verbose:
+                print("NOT FOUND IN DEST: " + name)
+            continue
+        if verbose:
+            print("SOURCE JOINT: " + name + " " + str(i) + " -> DEST JOINT: " + str(k))
+        jointMap[i] = k
+    matchedJoints = sorted(k for k in jointMap if k >= 0)
+
+    # Dest joints without a source joint are cleared, otherwise their old weights add to the new ones
+    unmatchedJoints = sorted(set(range(cnt2)) - set(matchedJoints))
+    if missing:
+        print(str(len(missing)) + " source joints are not in the dest tag, their weights are lost: "
+              + ", ".join(missing[:10]))
+    if unmatchedJoints:
+        print(str(len(unmatchedJoints)) + " dest joints have no source joint, their weights are cleared")
+
+    if samePoints and pruneThreshold <= 0 and maxInfluences <= 0:
+        # A copy of the source keeps its weights as they are, only the joints are remapped
+        sourceJoints = [i for i, k in enumerate(jointMap) if k >= 0]
+        if np is not None:
+            fromWeights.WriteTag(toTag, sourceJoints, jointMap)
+        else:
+            for i in sourceJoints:
+                toTag.SetWeightMap(jointMap[i], fromWeights[i])
+        for k in unmatchedJoints:
+            toTag.SetWeightMap(k, [0.0] * len(toPointArr))
+    elif np is not None:
+        if surfaceMode:
+            toWeights = fromWeights.Blend(closest, blend)
+        else:
+            toWeights = fromWeights.Gather(closest)
+        toWeights = toWeights.RemapJoints(jointMap, cnt2)
+
+        if pruneThreshold > 0:
+            toWeights.Prune(pruneThreshold)
+        if maxInfluences > 0:
+            toWeights.LimitInfluences(maxInfluences)
+        if normalize:
+            toWeights.Normalize()
+        toWeights.WriteTag(toTag, range(cnt2))
+    else:
+        for i, k in enumerate(jointMap):
+            if k >= 0 and isinstance(closest, range):
+                toTag.SetWeightMap(k, fromWeights[i])
+            elif k >= 0:
+                toTag.SetWeightMap(k, [fromWeights[i][j] for j in closest])
+        for k in unmatchedJoints:
+            toTag.SetWeightMap(k, [0.0] * len(toPointArr))
+
+    toTag.WeightDirty()
+    print(toObj.GetName() + ": " + str(len(matchedJoints)) + " joints transferred")
+
+    if not any(child.CheckType(c4d.Oskin) for child in toObj.GetChildren()):
+        newSkin = c4d.BaseObject(c4d.Oskin)
+        newSkin.InsertUnder(toObj)
+        doc.AddUndo(c4d.UNDOTYPE_NEWOBJ,newSkin)
+
+
+# Main function
+def main():
+
+    #POINT MATCH ACCURACY
+    ac = 0.01
+
+    #NUMBER OF SOURCE OBJECTS, the first ones selected (e.g. body, hands and head)
+    sourceCount = 1
+
+    #BLEND WEIGHTS FROM THE CLOSEST POINT ON THE SOURCE SURFACE
+    surfaceMode = False
+
+    #PRINT EVERY JOINT MATCH
+    verbose = False
+
+    #CLEANUP OF THE TRANSFERRED WEIGHTS (needs NumPy)
+    #Drop weights below this value
+    pruneThreshold = 0.0
+    #Keep at most this many joints per point, e.g. 4 for game export (0 = unlimited)
+    maxInfluences = 0
+    #Make the weights of every point sum up to one (after pruning or limiting, or when the points differ)
+    normalize = True
+
+    doc = c4d.documents.GetActiveDocument()
+    selected = doc.GetActiveObjects(0)
+    if len(selected) <= sourceCount:
+        gui.MessageDialog("Select " + str(sourceCount) + " source object(s) and at least one destination object.")
+        return
+
+    fromObjs = selected[:sourceCount]
+    for fromObj in fromObjs:
+        if not fromObj.GetTag(c4d.Tweights):
+            gui.MessageDialog("The source object " + fromObj.GetName() + " has no weight tag.")
+            return
+
+    if surfaceMode and np is None:
+        print("NumPy is not available, using closest points")
+        surfaceMode = False
+    if surfaceMode and any(obj.GetPolygonCount() == 0 for obj in fromObjs):
+        print("A source has no polygons, using closest points")
+        surfaceMode = False
+    if np is None:
+        print("NumPy is not available, weights are copied without cleanup")
+
+    startTime = time.perf_counter()
+    source = GetSourceData(fromObjs)
+
+    doc.StartUndo() #Start UndoBlock
+
+    for toObj in selected[sourceCount:]:
+        if not isinstance(toObj, c4d.PointObject):
+            print("Skipping " + toObj.GetName() + ", it has no points")
+            continue
+        objectTime = time.perf_counter()
+        TransferWeights(doc, fromObjs, source, toObj, ac, surfaceMode, verbose,
+                        pruneThreshold, maxInfluences, normalize)
+        if verbose:
+            print("  took " + "%.3f" % (time.perf_counter() - objectTime) + " s")
 
     doc.EndUndo()
     c4d.EventAdd()
     c4d.gui.StatusClear()
+    print("Transfer took " + "%.3f" % (time.perf_counter() - startTime) + " s")
 
 # Execute main()
 if __name__=='__main__':
@@ -3,8 +3,18 @@
 ###by Matthaeus Niedoba: matniedoba.de
 
 import c4d
+import concurrent.futures
+import os
 from c4d import documents, utils, Vector
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#Variable tags that store one record per polygon, when an object has as many points as polygons
+PER_POLYGON_TAGS = (c4d.Tuvw, c4d.Tnormal)
+
 def walk(op):
     if not op: return
     elif op.GetDown():
@@ -22,6 +32,12 @@ def createUVW(obj):
         for i in obj.GetTags():
             if i.CheckType(c4d.Tuvw):
                 i.Remove()
+        #Project directly instead of selecting the tag and running the command
+        uvw = utils.GenerateUVW(obj, obj.GetMg(), tex, obj.GetMg())
+        if uvw is not None:
+            obj.InsertTag(uvw, tex)
+            tex[c4d.TEXTURETAG_PROJECTION] = c4d.TEXTURETAG_PROJECTION_UVW
+            return
         doc.SetActiveTag(tex)
         c4d.CallCommand(12235)   # Generate UVW Coordinates
         doc.SetActiveTag(None)
@@ -49,29 +65,26 @@ def modif_coor(p, tex, lcX, lcY) :
 
     return p
 
-#Cleanup offset and scale values
-def cleanUVW(obj) :
-    tex = obj.GetTag(c4d.Ttexture)
-    if not tex : return
-    uvw = obj.GetTag(c4d.Tuvw)
-    if not uvw : return
-
-    polys = uvw.GetDataCount()
+#Offset and scale of the UV cleanup as (p - offset) * scale, and if lengths or tiles are used
+def getUVTransform(tex):
     lcX  = True # Longueur ou Carreaux X
     lcY  = True # Longueur ou Carreaux Y
     if nb_dec(tex[c4d.TEXTURETAG_TILESX]) < nb_dec(tex[c4d.TEXTURETAG_LENGTHX]*100) :
         lcX = False
     if nb_dec(tex[c4d.TEXTURETAG_TILESY]) < nb_dec(tex[c4d.TEXTURETAG_LENGTHY]*100) :
         lcY = False
-
-    for i in range(polys):
-        uvwdict = uvw.GetSlow(i)
-        a = modif_coor(uvwdict["a"], tex, lcX, lcY)
-        b = modif_coor(uvwdict["b"], tex, lcX, lcY)
-        c = modif_coor(uvwdict["c"], tex, lcX, lcY)
-        d = modif_coor(uvwdict["d"], tex, lcX, lcY)
-        uvw.SetSlow(i, a, b, c, d)
-
+    offset = (tex[c4d.TEXTURETAG_OFFSETX], tex[c4d.TEXTURETAG_OFFSETY])
+    scale = (1.0 / tex[c4d.TEXTURETAG_LENGTHX] if lcX else tex[c4d.TEXTURETAG_TILESX],
+             1.0 / tex[c4d.TEXTURETAG_LENGTHY] if lcY else tex[c4d.TEXTURETAG_TILESY])
+    return offset, scale, lcX, lcY
+
+#modif_coor on all UVW tag data at once, in place: 4 points of 3 float32 per polygon, only u and v change
+def transformUVW(buffer, offset, scale):
+    uv = np.frombuffer(buffer, dtype=np.float32).reshape(-1, 4, 3)[:, :, :2]
+    uv[:] = (uv - np.array(offset)) * np.array(scale)
+
+#Texture tag values once they are baked into the UVWs
+def resetTexture(tex):
     tex[c4d.TEXTURETAG_OFFSETX] = 0
     tex[c4d.TEXTURETAG_OFFSETY] = 0
     tex[c4d.TEXTURETAG_LENGTHX] = 1
@@ -79,34 +92,78 @@ def cleanUVW(obj) :
     tex[c4d.TEXTURETAG_TILESX] = 1
     tex[c4d.TEXTURETAG_TILESY] = 1
 
+#Cleanup offset and scale values
+def cleanUVW(obj) :
+    tex = obj.GetTag(c4d.Ttexture)
+    if not tex : return
+    uvw = obj.GetTag(c4d.Tuvw)
+    if not uvw : return
+
+    polys = uvw.GetDataCount()
+    offset, scale, lcX, lcY = getUVTransform(tex)
+    if offset == (0, 0) and scale == (1, 1) : return # Nothing to clean
+
+    buffer = uvw.GetLowlevelDataAddressW() if np is not None else None
+    if buffer is not None and len(buffer) == polys * 48:
+        transformUVW(buffer, offset, scale)
+    else:
+        for i in range(polys):
+            uvwdict = uvw.GetSlow(i)
+            a = modif_coor(uvwdict["a"], tex, lcX, lcY)
+            b = modif_coor(uvwdict["b"], tex, lcX, lcY)
+            c = modif_coor(uvwdict["c"], tex, lcX, lcY)
+            d = modif_coor(uvwdict["d"], tex, lcX, lcY)
+            uvw.SetSlow(i, a, b, c, d)
+
+    resetTexture(tex)
+
 #check if material has alpha applied
 def checkAlpha (tag):
     mat = tag[c4d.TEXTURETAG_MATERIAL]
     if mat[c4d.MATERIAL_USE_ALPHA]==1:return True
     else: return False
 
+#Tags of one object by polygon selection name, material and type, collected in one pass
+#so the helpers below don't have to loop over all tags again for every texture tag
+class TagIndex:
+    def __init__(self, obj):
+        self.selections = {} #selection name -> polygon selection tag, the last one wins
+        self.textures = {} #material -> texture tags
+        self.types = {} #tag type -> tags
+        for i in obj.GetTags():
+            self.types.setdefault(i.GetType(), []).append(i)
+            if i.CheckType(c4d.Tpolygonselection):
+                self.selections[i.GetName()] = i
+            elif i.CheckType(c4d.Ttexture):
+                self.textures.setdefault(i[c4d.TEXTURETAG_MATERIAL], []).append(i)
+
+    #Polygon selection tag the texture tag is restricted to, None if there is none
+    def getSelection(self, tag):
+        return self.selections.get(tag[c4d.TEXTURETAG_RESTRICTION])
+
+    #All tags of a type, in tag order
+    def getTags(self, tagType):
+        return self.types.get(tagType, [])
+
 #check if Selection Tag is empty
-def checkEmpty(tag):
-    sel = None
-    for i in tag.GetObject().GetTags():
-        if i.CheckType(c4d.Tpolygonselection) and tag[c4d.TEXTURETAG_RESTRICTION] == i.GetName():
-            sel = i
+def checkEmpty(tag,index=None):
+    if index is None: index = TagIndex(tag.GetObject())
+    sel = index.getSelection(tag)
     #Check if Selection has no polygons
-    if sel.GetBaseSelect().GetCount()==0: return True
+    if sel is None or sel.GetBaseSelect().GetCount()==0: return True
     else: return False
 
 #Clean Tags
-def cleanTags(obj,tag):
-    for i in obj.GetTags():
-        if i.CheckType(c4d.Ttexture) and i[c4d.TEXTURETAG_MATERIAL]!=tag[c4d.TEXTURETAG_MATERIAL]: i.Remove()
-        if i.CheckType(c4d.Tpolygonselection): i.Remove()
-        if i.CheckType(c4d.Ttexture): i[c4d.TEXTURETAG_RESTRICTION]=""
-    #Rremove double or multiple Texture Tags
-    tempTag = None
-    for i in obj.GetTags():
-        if i.CheckType(c4d.Ttexture) and tempTag == None:
-            tempTag = obj.GetFirstTag()
-        elif i.CheckType(c4d.Ttexture) :
+def cleanTags(obj,tag,index=None):
+    if index is None: index = TagIndex(obj)
+    for i in index.getTags(c4d.Tpolygonselection):
+        i.Remove()
+    #Keep only the first Texture Tag of the material
+    keep = index.textures.get(tag[c4d.TEXTURETAG_MATERIAL], [None])[0]
+    for i in index.getTags(c4d.Ttexture):
+        if i is keep:
+            i[c4d.TEXTURETAG_RESTRICTION]=""
+        else:
             i.Remove()
 
 #Copy Object and Clean Tags
@@ -117,18 +174,21 @@ def copyObject (obj,tag):
     cleanTags(newObj,tag)
     return newObj
 
-#Split polygonselection to a new object and Clean Tags
-def copySelection(obj,tag):
-
+#Select the polygons of the selection tag of a texture tag on obj
+def selectPolygons(obj,tag,index=None):
+    if index is None: index = TagIndex(obj)
     #deselect current polygonselection
     polyselection = obj.GetPolygonS()
     polyselection.DeselectAll()
 
     #select polygons from selectiontag
-    for i in obj.GetTags():
-        if tag[c4d.TEXTURETAG_RESTRICTION]== i.GetName()and i.CheckType(c4d.Tpolygonselection):
-                tagselection  =  i.GetBaseSelect()
-                tagselection.CopyTo(polyselection)
+    sel = index.getSelection(tag)
+    if sel is not None:
+        sel.GetBaseSelect().CopyTo(polyselection)
+
+#Split polygonselection to a new object and Clean Tags
+def copySelection(obj,tag,index=None):
+    selectPolygons(obj,tag,index)
 
     sec = utils.SendModelingCommand(command=c4d.MCOMMAND_SPLIT,
                                     list=[obj],
@@ -140,16 +200,8 @@ def copySelection(obj,tag):
     return newObj
 
 #Delete selected polygons, split polygonselection to a new object and Clean Tags
-def splitObject(obj,tag,delete):
-    #deselect current polygonselection
-    polyselection = obj.GetPolygonS()
-    polyselection.DeselectAll()
-
-    #select polygons from selectiontag
-    for i in obj.GetTags():
-        if tag[c4d.TEXTURETAG_RESTRICTION] == i.GetName() and i.CheckType(c4d.Tpolygonselection):
-            tagselection  =  i.GetBaseSelect()
-            tagselection.CopyTo(polyselection)
+def splitObject(obj,tag,delete,index=None):
+    selectPolygons(obj,tag,index)
 
     sec = utils.SendModelingCommand(command=c4d.MCOMMAND_SPLIT,
                                     list=[obj],
@@ -174,8 +226,257 @@ def splitObject(obj,tag,delete):
                                     doc=documents.GetActiveDocument())
     return newObj
 
+#Read all points of obj, as an (n, 3) array with NumPy
+def readPoints(obj):
+    tag = obj.GetTag(c4d.Tpoint)
+    buffer = tag.GetLowlevelDataAddressR() if tag is not None and np is not None else None
+    if buffer is not None and len(buffer) == obj.GetPointCount() * 24:
+        return np.frombuffer(buffer, dtype=np.float64).reshape(-1, 3).copy()
+    points = obj.GetAllPoints()
+    if np is not None:
+        return np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64).reshape(-1, 3)
+    return points
+
+#Read all polygons of obj as (a, b, c, d), as an (n, 4) array with NumPy
+def readPolygons(obj):
+    tag = obj.GetTag(c4d.Tpolygon)
+    buffer = tag.GetLowlevelDataAddressR() if tag is not None and np is not None else None
+    if buffer is not None and len(buffer) == obj.GetPolygonCount() * 16:
+        return np.frombuffer(buffer, dtype=np.int32).reshape(-1, 4).copy()
+    polys = [(p.a, p.b, p.c, p.d) for p in obj.GetAllPolygons()]
+    if np is not None:
+        return np.array(polys, dtype=np.int32).reshape(-1, 4)
+    return polys
+
+#Read the data of all tags of obj once: (tag, type, kind, data), kind says how data is split.
+#Variable tags that are neither per point nor per polygon get the kind "unsliceable".
+def readTags(obj):
+    pointCount = obj.GetPointCount()
+    polyCount = obj.GetPolygonCount()
+    tags = []
+    for i in obj.GetTags():
+        #Geometry is rebuilt, polygon selections are removed by cleanTags anyway
+        if i.CheckType(c4d.Tpoint) or i.CheckType(c4d.Tpolygon) or i.CheckType(c4d.Tpolygonselection):
+            continue
+        tagType = i.GetType()
+        if isinstance(i, c4d.VariableTag):
+            #The record count tells the kind, the type only decides when both counts are equal
+            count = i.GetDataCount()
+            perPolygon = tagType in PER_POLYGON_TAGS or (tagType == c4d.Tvertexcolor and not i.IsPerPointColor())
+            if count == polyCount and (count != pointCount or perPolygon):
+                kind = "polygon"
+            elif count == pointCount:
+                kind = "point"
+            else:
+                kind = None
+            buffer = i.GetLowlevelDataAddressR()
+            if buffer is None or kind is None:
+                print("Tag " + i.GetName() + " can't be split per polygon, " + obj.GetName() + " is split with the split command")
+                tags.append((i, tagType, "unsliceable", None))
+                continue
+            tags.append((i, tagType, kind, (bytes(buffer), i.GetDataSize())))
+        elif i.CheckType(c4d.Tweights):
+            #One float32 array per joint, sliced per part
+            weights = [i.GetWeightMap(j) for j in range(i.GetJointCount())]
+            if np is not None:
+                weights = [np.asarray(weights[j], dtype=np.float32) for j in range(len(weights))]
+            tags.append((i, tagType, "weights", weights))
+        elif i.CheckType(c4d.Tpointselection):
+            tags.append((i, tagType, "pointselection", i.GetBaseSelect().GetAll(pointCount)))
+        elif i.CheckType(c4d.Tedgeselection):
+            #Edges are numbered polygon * 4 + side
+            tags.append((i, tagType, "edgeselection", i.GetBaseSelect().GetAll(polyCount * 4)))
+        else:
+            tags.append((i, tagType, None, None))
+    return tags
+
+#Polygon indices of the selection tag a texture tag is restricted to, None without selection tag
+def getSelectionPolygons(obj,tag,index):
+    sel = index.getSelection(tag)
+    if sel is None:
+        return None
+    states = sel.GetBaseSelect().GetAll(obj.GetPolygonCount())
+    return [n for n, state in enumerate(states) if state]
+
+#Points used by the polygons polyIndices (ascending) and those polygons renumbered to them
+def compactPolygons(polys, polyIndices):
+    if np is not None:
+        sub = polys[np.asarray(polyIndices, dtype=np.int64)]
+        pointIndices = np.unique(sub)
+        return pointIndices, np.searchsorted(pointIndices, sub)
+    pointIndices = sorted({k for n in polyIndices for k in polys[n]})
+    pointMap = {k: i for i, k in enumerate(pointIndices)}
+    return pointIndices, [tuple(pointMap[k] for k in polys[n]) for n in polyIndices]
+
+#Records of a variable tag at the given indices
+def sliceRecords(data, size, indices):
+    if np is not None:
+        return np.frombuffer(data, dtype=np.uint8).reshape(-1, size)[np.asarray(indices, dtype=np.int64)].tobytes()
+    return b"".join(data[i * size:(i + 1) * size] for i in indices)
+
+#Everything partitionSource needs from obj, read on the main thread
+def readSource(obj):
+    index = TagIndex(obj)
+    parts = []
+    for i in reversed(index.getTags(c4d.Ttexture)):
+        if i[c4d.TEXTURETAG_RESTRICTION]!="":
+            polyIndices = getSelectionPolygons(obj,i,index)
+        else:
+            polyIndices = range(obj.GetPolygonCount())
+        if not polyIndices:
+            continue
+        #UVWs of a texture tag that already uses UVW mapping are cleaned along with the rest,
+        #cleanTags keeps the first texture tag of the material
+        tex = index.textures[i[c4d.TEXTURETAG_MATERIAL]][0]
+        uvTransform = None
+        if np is not None and tex[c4d.TEXTURETAG_PROJECTION]==c4d.TEXTURETAG_PROJECTION_UVW:
+            uvTransform = getUVTransform(tex)[:2]
+        parts.append((i, polyIndices, uvTransform))
+    return readPoints(obj), readPolygons(obj), readTags(obj), parts
+
+#Split the data of readSource into parts, compacts the points and slices the tag data.
+#Works on data only and doesn't touch the document, so it can run on a worker thread.
+#Returns None if a tag can't be sliced, the object has to be split with the split command then.
+def partitionSource(points, polys, sourceTags, parts):
+    if any(kind == "unsliceable" for i, tagType, kind, data in sourceTags):
+        return None
+    results = []
+    for tag, polyIndices, uvTransform in parts:
+        pointIndices, newPolys = compactPolygons(polys, polyIndices)
+        newPoints = points[pointIndices] if np is not None else [points[k] for k in pointIndices]
+        tagData = []
+        uvCleaned = False
+        for i, tagType, kind, data in sourceTags:
+            if kind == "point" or kind == "polygon":
+                records = sliceRecords(data[0], data[1], polyIndices if kind == "polygon" else pointIndices)
+                if tagType == c4d.Tuvw and uvTransform is not None and not uvCleaned:
+                    records = bytearray(records)
+                    transformUVW(records, *uvTransform)
+                    uvCleaned = True
+                tagData.append(records)
+            elif kind == "weights":
+                if np is not None:
+                    tagData.append([weights[pointIndices] for weights in data])
+                else:
+                    tagData.append([[weights[k] for k in pointIndices] for weights in data])
+            elif kind == "pointselection":
+                tagData.append([data[k] for k in pointIndices])
+            elif kind == "edgeselection":
+                tagData.append([data[n * 4 + side] for n in polyIndices for side in range(4)])
+            else:
+                tagData.append(None)
+        results.append((tag, newPoints, newPolys, tagData, uvCleaned))
+    return results
+
+#Build a new object from one part of partitionSource
+def buildPart(sourceTags, tag, points, polys, tagData, uvCleaned):
+    newObj = c4d.PolygonObject(len(points), len(polys))
+
+    pointTag = newObj.GetTag(c4d.Tpoint)
+    polygonTag = newObj.GetTag(c4d.Tpolygon)
+    if np is not None and pointTag is not None and polygonTag is not None:
+        pointTag.GetLowlevelDataAddressW()[:] = np.ascontiguousarray(points).tobytes()
+        polygonTag.GetLowlevelDataAddressW()[:] = polys.astype(np.int32).tobytes()
+    elif np is not None:
+        newObj.SetAllPoints([c4d.Vector(x, y, z) for x, y, z in points.tolist()])
+        for n, (a, b, c, d) in enumerate(polys.tolist()):
+            newObj.SetPolygon(n, c4d.CPolygon(a, b, c, d))
+    else:
+        newObj.SetAllPoints(points)
+        for n, (a, b, c, d) in enumerate(polys):
+            newObj.SetPolygon(n, c4d.CPolygon(a, b, c, d))
+
+    for (i, tagType, kind, data), newData in zip(sourceTags, tagData):
+        if kind == "point" or kind == "polygon":
+            newTag = newObj.MakeVariableTag(tagType, len(newData) // data[1], newObj.GetLastTag())
+            newTag.SetName(i.GetName())
+            newTag.SetData(i.GetData())
+            if tagType == c4d.Tvertexcolor:
+                newTag.SetPerPointMode(kind == "point")
+            buffer = newTag.GetLowlevelDataAddressW()
+            if buffer is None or len(buffer) != len(newData):
+                print("Could not write the data of tag " + i.GetName() + " to " + newObj.GetName())
+                continue
+            buffer[:] = newData
+            continue
+        newTag = i.GetClone()
+        newObj.InsertTag(newTag, newObj.GetLastTag())
+        if kind == "weights":
+            for j, weights in enumerate(newData):
+                newTag.SetWeightMap(j, weights.tolist() if np is not None else weights)
+        elif kind == "pointselection" or kind == "edgeselection":
+            newTag.GetBaseSelect().SetAll(newData)
+
+    newObj.Message(c4d.MSG_UPDATE)
+    newObj.SetName(tag[c4d.TEXTURETAG_MATERIAL].GetName())
+    cleanTags(newObj,tag)
+    if uvCleaned:
+        resetTexture(newObj.GetTag(c4d.Ttexture))
+    return newObj
+
+#Split obj in one pass: every texture tag gets the polygons of its selection
+def partitionObject(obj,progress,numAllTextures):
+    points, polys, sourceTags, parts = readSource(obj)
+    partList = partitionSource(points, polys, sourceTags, parts)
+    if partList is None:
+        return splitPerTexture(obj,progress,numAllTextures)
+    newObjs = []
+    for part in partList:
+        progress+=1
+        c4d.gui.StatusSetText("Exporting "+str(progress)+"of "+str(numAllTextures))
+        c4d.gui.StatusSetBar(100.0*progress/numAllTextures)
+        newObjs.append(buildPart(sourceTags, *part))
+    return newObjs
+
+#Read the objects on the main thread and partition them on a thread pool. Yields
+#(index, (source tags, parts)) as soon as the parts of an object are ready, so they can be
+#built on the main thread and released. Only readAhead objects are read before their parts
+#are taken, which keeps the memory from growing with the number of objects.
+def prepareParts(objs,maxWorkers=None,readAhead=None):
+    if readAhead is None:
+        readAhead = (maxWorkers or os.cpu_count() or 1) + 1
+    pending = {}
+    nextObj = 0
+    done = 0
+    with concurrent.futures.ThreadPoolExecutor(maxWorkers) as executor:
+        while pending or nextObj < len(objs):
+            while nextObj < len(objs) and len(pending) < readAhead:
+                points, polys, sourceTags, parts = readSource(objs[nextObj])
+                future = executor.submit(partitionSource, points, polys, sourceTags, parts)
+                pending[future] = (nextObj, sourceTags)
+                nextObj += 1
+            finished, unfinished = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                k, sourceTags = pending.pop(future)
+                done += 1
+                c4d.gui.StatusSetText("Preparing "+str(done)+" of "+str(len(objs)))
+                c4d.gui.StatusSetBar(100.0*done/len(objs))
+                yield k, (sourceTags, future.result())
+
+#Split obj with one split command (a full copy) per texture tag
+def splitPerTexture(obj,progress,numAllTextures):
+    index = TagIndex(obj)
+    newObjs=[]
+    for i in reversed(index.getTags(c4d.Ttexture)):
+        progress+=1
+        c4d.gui.StatusSetText("Exporting "+str(progress)+"of "+str(numAllTextures))
+        c4d.gui.StatusSetBar(100.0*progress/numAllTextures)
+        if i[c4d.TEXTURETAG_RESTRICTION]!="":
+            sel = i[c4d.TEXTURETAG_RESTRICTION]
+        else: sel = None
+        if sel == None:
+            newObjs.append( copyObject (obj,i))
+            print("append1")
+        elif sel != None and checkEmpty(i,index)==False:
+            newObjs.append(copySelection (obj,i,index))
+            print("append2")
+        #elif sel != None and checkAlpha(i)==False and checkEmpty(i)==False:
+            #newObjs.append(splitObject(obj,i,True))
+            #print("splitObject")
+    return newObjs
+
 #transform polygon object with tags to null with children
-def proceedObject(obj,progress,numAllTextures):
+def proceedObject(obj,progress,numAllTextures,singlePass=True,partData=None):
     if obj.CheckType(c4d.Opolygon)==False:
         return
     
@@ -185,25 +486,14 @@ def proceedObject(obj,progress,numAllTextures):
             hasSkin = True
             break
 
-    tags = obj.GetTags()
-    newObjs=[]
-    for i in reversed(tags):
-        if i.CheckType(c4d.Ttexture):
-            progress+=1
-            c4d.gui.StatusSetText("Exporting "+str(progress)+"of "+str(numAllTextures))
-            c4d.gui.StatusSetBar(100.0*progress/numAllTextures)
-            if i[c4d.TEXTURETAG_RESTRICTION]!="":
-                sel = i[c4d.TEXTURETAG_RESTRICTION]
-            else: sel = None
-            if sel == None:
-                newObjs.append( copyObject (obj,i))
-                print("append1")
-            elif sel != None and checkEmpty(i)==False:
-                newObjs.append(copySelection (obj,i))
-                print("append2")
-            #elif sel != None and checkAlpha(i)==False and checkEmpty(i)==False:
-                #newObjs.append(splitObject(obj,i,True))
-                #print("splitObject")
+    if partData is not None and partData[1] is not None:
+        sourceTags, parts = partData
+        newObjs = [buildPart(sourceTags, *part) for part in parts]
+    elif singlePass and partData is None:
+        newObjs = partitionObject(obj,progress,numAllTextures)
+    else:
+        #Parts of None mean a tag can't be sliced, the split command keeps it
+        newObjs = splitPerTexture(obj,progress,numAllTextures)
 
     #Create new nullobject
     nullObj = c4d.BaseObject(c4d.Onull)
@@ -223,6 +513,10 @@ def main():
 
     doc = c4d.documents.GetActiveDocument()
 
+    #Build every material part directly from the source in one pass, instead of
+    #splitting a full copy of the object for every texture tag
+    singlePass = True
+
     objs = documents.GetActiveDocument().GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_CHILDREN)
     nb = len(objs)
     if nb == 0 : return False
@@ -244,11 +538,18 @@ def main():
                 if numTextures>1 and i not in objListMM:
                     objListMM.append(i)
 
+    #Geometry is split on worker threads, every object is replaced as soon as its parts are ready
+    if singlePass:
+        partData = prepareParts(objListMM)
+    else:
+        partData = ((k, None) for k in range(len(objListMM)))
+
     doc.StartUndo() #Start UndoBlock
 
-    for i in objListMM: #Insert and delete objects
+    for k, data in partData: #Insert and delete objects
+        i = objListMM[k]
         doc.AddUndo(c4d.UNDOTYPE_CHANGE, i)
-        tempObj = proceedObject(i,progress,numAllTextures)
+        tempObj = proceedObject(i,progress,numAllTextures,singlePass,data)
         tempObj.InsertAfter(i)
         tempObj.SetMg(i.GetMg())
         doc.AddUndo(c4d.UNDOTYPE_NEW, tempObj)
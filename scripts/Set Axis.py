@@ -2,6 +2,8 @@
 Sets the axis to selected object.
 Also handles vertices and normal tags.
 Corrected to handle non-uniform scaling.
+Children keep their global position. Set batchMode in main() to process
+every selected object, and axisTarget to move the axis to the bounding box.
 
 Based on script by ferdinand
 http://developers.maxon.net/forum/post/67961
@@ -9,13 +11,24 @@ http://developers.maxon.net/forum/post/67961
 
 import c4d
 import array
+import concurrent.futures
 import math
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def main() -> None:
     """Entry point that runs the code when there is an active object."""
-    if not op:
-        c4d.gui.MessageDialog("Please select an object.")
-        return
+    #Set to True to set the axis of every selected object in one undo step
+    batchMode = False
+
+    #Where the axis goes: "psr" (the PSR below), "bbox_center", "bottom_center"
+    #(of the bounding box in world space) or "world_origin". The bounding box
+    #targets keep the scale and rotation of the PSR below.
+    axisTarget = "psr"
 
     #Set to desired PSR:
     mgTarget = psr_to_matrix(
@@ -23,8 +36,27 @@ def main() -> None:
                                 c4d.Vector(1,1,1),
                                 c4d.Vector(0,0,0))
 
-    TransferAxisTo(op, mgTarget)
+    nodes = doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_CHILDREN) if batchMode else [op]
+    if not nodes or not nodes[0]:
+        c4d.gui.MessageDialog("Please select an object.")
+        return
+    if axisTarget not in AXIS_TARGETS:
+        c4d.gui.MessageDialog(f"Unknown axis target {axisTarget}, use one of {AXIS_TARGETS}.")
+        return
+
+    start = time.perf_counter()
+    doc.StartUndo()
+    if batchMode and np is not None:
+        TransferAxes(nodes, mgTarget, axisTarget)
+    else:
+        for node in nodes:
+            TransferAxisTo(node, GetAxisTarget(node, mgTarget, axisTarget))
+    doc.EndUndo()
     c4d.EventAdd()
+    print(f"Set the axis of {len(nodes)} object(s) in {time.perf_counter() - start:.3f} s")
+
+
+AXIS_TARGETS = ("psr", "bbox_center", "bottom_center", "world_origin")
 
 
 def psr_to_matrix(pos: c4d.Vector, scale: c4d.Vector, rot_degrees: c4d.Vector) -> c4d.Matrix:
@@ -124,19 +156,228 @@ def WriteNormalTag(tag: c4d.NormalTag, normals: list[c4d.Vector],
     buffer[:len(data)] = data
 
 
+def MatrixToArrays(m: c4d.Matrix) -> tuple:
+    """Returns the 3x3 orientation (rows v1, v2, v3) and the offset of m as arrays,
+    so that `points @ rows + off` equals `p * m` for every point."""
+    rows = np.array([(m.v1.x, m.v1.y, m.v1.z),
+                     (m.v2.x, m.v2.y, m.v2.z),
+                     (m.v3.x, m.v3.y, m.v3.z)], dtype=np.float64)
+    return rows, np.array((m.off.x, m.off.y, m.off.z), dtype=np.float64)
+
+
+def TransformNormalArray(raw: "np.ndarray", rows: "np.ndarray") -> "np.ndarray":
+    """Transforms and renormalizes (n, 3) int16 normals by the orientation rows."""
+    normals = (raw / 32000.0) @ rows
+
+    # Zero length normals stay zero instead of turning into NaN.
+    length = np.sqrt((normals * normals).sum(axis=1, keepdims=True))
+    np.divide(normals, length, out=normals, where=length > 0.0)
+    return (normals * 32000.0).astype(np.int16)
+
+
+def GetPointBuffer(node: c4d.PointObject, write: bool = False):
+    """Returns the memory of the hidden point tag of node, None if not accessible."""
+    pointTag = node.GetTag(c4d.Tpoint)
+    if pointTag is None:
+        return None
+    buffer = pointTag.GetLowlevelDataAddressW() if write else pointTag.GetLowlevelDataAddressR()
+    if buffer is None or len(buffer) != node.GetPointCount() * 24:
+        return None
+    return buffer
+
+
+def GetNormalBuffer(tag: c4d.NormalTag, write: bool = False):
+    """Returns the memory of a `c4d.NormalTag`, raises if it is not accessible."""
+    if not (isinstance(tag, c4d.BaseTag) and tag.CheckType(c4d.Tnormal)):
+        msg = f"Expected normal tag, received: {tag}."
+        raise TypeError(tag)
+
+    buffer = tag.GetLowlevelDataAddressW() if write else tag.GetLowlevelDataAddressR()
+    if buffer is None:
+        msg = "Failed to retrieve memory buffer for VariableTag."
+        raise RuntimeError(msg)
+
+    # The tag stores 4 normals per polygon.
+    expected_size = tag.GetDataCount() * 4 * 3 * 2
+    if len(buffer) < expected_size:
+        msg = (f"Invalid data size. The NormalTag buffer has {len(buffer)} bytes "
+               f"and {expected_size} are expected.")
+        raise IndexError(msg)
+    return buffer[:expected_size]
+
+
+def ReadPointArray(node: c4d.PointObject) -> "np.ndarray":
+    """Returns a copy of all points of node as an (n, 3) float64 array."""
+    buffer = GetPointBuffer(node)
+    if buffer is not None:
+        return np.frombuffer(buffer, dtype=np.float64).reshape(-1, 3).copy()
+    return np.array([(p.x, p.y, p.z) for p in node.GetAllPoints()], dtype=np.float64).reshape(-1, 3)
+
+
+def WritePointArray(node: c4d.PointObject, points: "np.ndarray") -> None:
+    """Writes an (n, 3) array to node, which already has n points."""
+    buffer = GetPointBuffer(node, write=True)
+    if buffer is not None:
+        np.frombuffer(buffer, dtype=np.float64).reshape(-1, 3)[:] = points
+    else:
+        node.SetAllPoints([c4d.Vector(x, y, z) for x, y, z in points.tolist()])
+
+
+def TransformPoints(node: c4d.PointObject, m: c4d.Matrix) -> None:
+    """Transforms all points of node by m, in place in the point buffer when
+    NumPy is available."""
+    buffer = GetPointBuffer(node, write=True) if np is not None else None
+    if buffer is None:
+        node.SetAllPoints([p * m for p in node.GetAllPoints()])
+        return
+
+    # View on the tag memory, the points are never copied into Python objects
+    points = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 3)
+    rows, off = MatrixToArrays(m)
+    points[:] = points @ rows + off
+
+
+def TransformNormalTag(tag: c4d.NormalTag, m: c4d.Matrix) -> None:
+    """Transforms and renormalizes all normals of a `c4d.NormalTag` by the
+    orientation of m, in place in the int16 tag buffer."""
+    raw = np.frombuffer(GetNormalBuffer(tag, write=True), dtype=np.int16).reshape(-1, 3)
+    rows, off = MatrixToArrays(m)
+    raw[:] = TransformNormalArray(raw, rows)
+
+
+def TargetPosition(axisTarget: str, low, high):
+    """Returns the axis position for axisTarget from the low and high corner of
+    the world bounding box, or None to keep the position of the PSR."""
+    if axisTarget == "psr":
+        return None
+    if axisTarget == "world_origin":
+        return (0.0, 0.0, 0.0)
+    center = [(a + b) * 0.5 for a, b in zip(low, high)]
+    if axisTarget == "bottom_center":
+        center[1] = low[1]
+    return tuple(float(v) for v in center)
+
+
+def GetAxisTarget(node: c4d.BaseObject, mgTarget: c4d.Matrix, axisTarget: str) -> c4d.Matrix:
+    """Returns mgTarget moved to the axisTarget position of node."""
+    mg = node.GetMg()
+    if axisTarget == "psr":
+        return mgTarget
+
+    low = high = (mg.off.x, mg.off.y, mg.off.z)
+    if isinstance(node, c4d.PointObject) and node.GetPointCount():
+        if np is not None:
+            rows, off = MatrixToArrays(mg)
+            world = ReadPointArray(node) @ rows + off
+            low, high = world.min(axis=0), world.max(axis=0)
+        else:
+            world = [mg * p for p in node.GetAllPoints()]
+            low = (min(p.x for p in world), min(p.y for p in world), min(p.z for p in world))
+            high = (max(p.x for p in world), max(p.y for p in world), max(p.z for p in world))
+
+    return c4d.Matrix(c4d.Vector(*TargetPosition(axisTarget, low, high)),
+                      mgTarget.v1, mgTarget.v2, mgTarget.v3)
+
+
+def ComputeAxisTransfer(nodeRows, nodeOff, targetRows, targetOff, axisTarget, points, normals):
+    """Geometry part of TransferAxisTo on arrays only, so it can run off the main thread.
+
+    Returns the offset of the new axis, the new points and normals (None where
+    none were given) and whether the normal transformation could be calculated.
+    """
+    if points is not None and len(points):
+        world = points @ nodeRows + nodeOff
+        low, high = world.min(axis=0), world.max(axis=0)
+    else:
+        low = high = nodeOff
+    position = TargetPosition(axisTarget, low, high)
+    if position is not None:
+        targetOff = np.array(position, dtype=np.float64)
+
+    # Same as ~mgTarget * mgNode
+    inverseTarget = np.linalg.inv(targetRows)
+    deltaRows = nodeRows @ inverseTarget
+    deltaOff = (nodeOff - targetOff) @ inverseTarget
+
+    try:
+        normalRows = np.linalg.inv(deltaRows).T
+        normalsOk = True
+    except np.linalg.LinAlgError:
+        normalRows = np.identity(3)
+        normalsOk = False
+
+    if points is not None:
+        points = points @ deltaRows + deltaOff
+    if normals is not None:
+        normals = TransformNormalArray(normals, normalRows)
+    return targetOff, points, normals, normalsOk
+
+
+def GetChildMatrices(node: c4d.BaseObject) -> list:
+    """Returns the children of node with their global matrices."""
+    return [(child, child.GetMg()) for child in node.GetChildren()]
+
+
+def RestoreChildMatrices(children: list) -> None:
+    """Moves the children back to the global matrices from GetChildMatrices."""
+    for child, mg in children:
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE, child)
+        child.SetMg(mg)
+
+
+def TransferAxes(nodes: list, mgTarget: c4d.Matrix, axisTarget: str,
+                 maxWorkers: int = None) -> None:
+    """Moves the axis of all nodes like TransferAxisTo.
+
+    Points and normals are copied on the main thread, transformed in a thread
+    pool and written back on the main thread. NumPy releases the GIL for the
+    math, and Cinema 4D cannot start worker processes of its own.
+    """
+    targetRows, targetOff = MatrixToArrays(mgTarget)
+    jobs = []
+    for node in nodes:
+        nodeRows, nodeOff = MatrixToArrays(node.GetMg())
+        points = normals = None
+        if isinstance(node, c4d.PointObject):
+            points = ReadPointArray(node)
+            normalTag = node.GetTag(c4d.Tnormal)
+            if isinstance(normalTag, c4d.NormalTag):
+                normals = np.frombuffer(GetNormalBuffer(normalTag), dtype=np.int16).reshape(-1, 3).copy()
+        jobs.append((nodeRows, nodeOff, targetRows, targetOff, axisTarget, points, normals))
+
+    with concurrent.futures.ThreadPoolExecutor(maxWorkers) as executor:
+        results = list(executor.map(lambda job: ComputeAxisTransfer(*job), jobs))
+
+    for node, (off, points, normals, normalsOk) in zip(nodes, results):
+        children = GetChildMatrices(node)
+        doc.AddUndo(c4d.UNDOTYPE_CHANGE, node)
+        node.SetMg(c4d.Matrix(c4d.Vector(*off.tolist()), mgTarget.v1, mgTarget.v2, mgTarget.v3))
+        if points is not None:
+            WritePointArray(node, points)
+            node.Message(c4d.MSG_UPDATE)
+        if normals is not None:
+            if not normalsOk:
+                print(f"Could not calculate normal transformation for {node.GetName()}. Normals may be incorrect.")
+            normalTag = node.GetTag(c4d.Tnormal)
+            doc.AddUndo(c4d.UNDOTYPE_CHANGE, normalTag)
+            np.frombuffer(GetNormalBuffer(normalTag, write=True), dtype=np.int16).reshape(-1, 3)[:] = normals
+        RestoreChildMatrices(children)
+
+
 def TransferAxisTo(node: c4d.BaseObject, mgTarget: c4d.Matrix) -> None:
     """Moves the axis of node to target, baking the transformation into the
-    points and normals, correctly handling non-uniform scale.
+    points and normals, correctly handling non-uniform scale. The children
+    keep their global position. Call it inside an undo block.
     """
     mgNode = node.GetMg()
 
-    doc.StartUndo()
+    children = GetChildMatrices(node)
     doc.AddUndo(c4d.UNDOTYPE_CHANGE, node)
 
     node.SetMg(mgTarget)
+    RestoreChildMatrices(children)
 
     if not isinstance(node, c4d.PointObject):
-        doc.EndUndo()
         return
 
     mgDelta = ~mgTarget * mgNode
@@ -149,24 +390,24 @@ def TransferAxisTo(node: c4d.BaseObject, mgTarget: c4d.Matrix) -> None:
         c4d.gui.MessageDialog("Could not calculate normal transformation. The object might have a scale of zero on an axis. Normals may be incorrect.")
         mgNormalDelta = c4d.Matrix()
 
-    node.SetAllPoints([p * mgDelta for p in node.GetAllPoints()])
+    TransformPoints(node, mgDelta)
     node.Message(c4d.MSG_UPDATE)
 
     normalTag = node.GetTag(c4d.Tnormal)
     if not isinstance(normalTag, c4d.NormalTag):
-        doc.EndUndo()
         return
 
     try:
-        current_normals = ReadNormalTag(normalTag)
-        newNormals = [n * mgNormalDelta for n in current_normals]
         doc.AddUndo(c4d.UNDOTYPE_CHANGE, normalTag)
-        WriteNormalTag(normalTag, newNormals, normalize=True)
+        if np is not None:
+            TransformNormalTag(normalTag, mgNormalDelta)
+        else:
+            current_normals = ReadNormalTag(normalTag)
+            newNormals = [n * mgNormalDelta for n in current_normals]
+            WriteNormalTag(normalTag, newNormals, normalize=True)
     except (TypeError, RuntimeError, IndexError) as e:
         print(f"An error occurred while writing to the normal tag: {e}")
         c4d.gui.MessageDialog(f"An error occurred while writing to the normal tag: {e}")
 
-    doc.EndUndo()
-
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,1189 @@
+"""Headless stand-in for the parts of the Cinema 4D ``c4d`` module used by
+the scripts in this repository.
+
+Geometry and variable tag data are stored in flat byte buffers with the same
+record layout as Cinema 4D, so ``GetLowlevelDataAddressR/W`` based code runs
+unchanged.
+"""
+
+import array
+import bisect
+import itertools
+import math
+import struct
+
+# Object types
+Obase = 5155
+Opoint = 5168
+Opolygon = 5100
+Onull = 5140
+Ojoint = 1019362
+Oskin = 1019363
+
+# Tag types
+Tpoint = 5600
+Tpolygon = 5604
+Tphong = 5612
+Texpresso = 5613
+Ttexture = 5616
+Tuvw = 5671
+Tpolygonselection = 5673
+Tpointselection = 5674
+Tedgeselection = 5701
+Tvertexmap = 5682
+Tnormal = 5711
+Tvertexcolor = 431000045
+Tweights = 1019365
+Tcaconstraint = 1019364
+Tpython = 1022749
+
+# Messages, flags and misc constants
+MSG_UPDATE = 1
+UNDOTYPE_CHANGE = 40
+UNDOTYPE_CHANGE_SMALL = 42
+UNDOTYPE_CHANGE_SELECTION = 44
+UNDOTYPE_NEW = 10
+UNDOTYPE_NEWOBJ = 10
+UNDOTYPE_DELETE = 30
+UNDOTYPE_DELETEOBJ = 30
+UNDOTYPE_BITS = 43
+DIRTYFLAGS_NONE = 0
+DIRTYFLAGS_MATRIX = 1 << 1
+DIRTYFLAGS_DATA = 1 << 2
+DIRTYFLAGS_SELECT = 1 << 3
+DIRTYFLAGS_CACHE = 1 << 4
+DIRTYFLAGS_CHILDREN = 1 << 5
+DIRTYFLAGS_DESCRIPTION = 1 << 6
+HDIRTYFLAGS_OBJECT_HIERARCHY = 1 << 4
+GETACTIVEOBJECTFLAGS_NONE = 0
+GETACTIVEOBJECTFLAGS_CHILDREN = 1
+GETACTIVEOBJECTFLAGS_SELECTIONORDER = 2
+SELECTION_NEW = 0
+SELECTION_ADD = 1
+SELECTION_SUB = 2
+ROTATIONORDER_HPB = 6
+MCOMMAND_SPLIT = 220
+MCOMMAND_DELETE = 210
+MCOMMAND_OPTIMIZE = 260
+MODELINGCOMMANDMODE_ALL = 0
+MODELINGCOMMANDMODE_POINTSELECTION = 1
+MODELINGCOMMANDMODE_POLYGONSELECTION = 2
+DESCFLAGS_SET_NONE = 0
+DESCFLAGS_SET_USERINTERACTION = 1 << 2
+DESCFLAGS_GET_NONE = 0
+ID_BASELIST_NAME = 900
+ID_USERDATA = 700
+EXPRESSION_ENABLE = 1000
+BUILDFLAGS_NONE = 0
+CINTERPOLATION_SPLINE = 1
+CINTERPOLATION_LINEAR = 2
+CINTERPOLATION_STEP = 3
+DTYPE_REAL = 19
+DTYPE_VECTOR = 23
+DTYPE_BASELISTLINK = 133
+DESC_NAME = 1
+ID_BASEOBJECT_REL_POSITION = 903
+ID_BASEOBJECT_REL_ROTATION = 904
+ID_BASEOBJECT_REL_SCALE = 905
+VECTOR_X = 1000
+VECTOR_Y = 1001
+VECTOR_Z = 1002
+
+TEXTURETAG_MATERIAL = 1010
+TEXTURETAG_RESTRICTION = 1011
+TEXTURETAG_PROJECTION = 1012
+TEXTURETAG_OFFSETX = 1013
+TEXTURETAG_OFFSETY = 1014
+TEXTURETAG_LENGTHX = 1015
+TEXTURETAG_LENGTHY = 1016
+TEXTURETAG_TILESX = 1017
+TEXTURETAG_TILESY = 1018
+TEXTURETAG_PROJECTION_UVW = 6
+MATERIAL_USE_ALPHA = 2004
+
+ID_CA_CONSTRAINT_TAG_MIRROR = 70000
+ID_CA_CONSTRAINT_TAG_MIRROR_AXIS_XY = 0
+ID_CA_CONSTRAINT_TAG_MIRROR_AXIS_ZY = 1
+ID_CA_CONSTRAINT_TAG_MIRROR_AXIS_YZ = 1
+ID_CA_CONSTRAINT_TAG_MIRROR_AXIS_XZ = 2
+ID_CA_CONSTRAINT_TAG_PSR = 10000
+ID_CA_CONSTRAINT_TAG_LOCAL_S = 10004
+
+_guid_counter = itertools.count(1)
+_dirty_counter = itertools.count(1)
+
+
+class Vector:
+    """Three component double precision vector."""
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0.0, y=None, z=None):
+        if isinstance(x, Vector):
+            x, y, z = x.x, x.y, x.z
+        elif y is None and z is None:
+            y = z = x
+        self.x, self.y, self.z = float(x), float(y or 0.0), float(z or 0.0)
+
+    def __repr__(self):
+        return f"Vector({self.x}, {self.y}, {self.z})"
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __setitem__(self, i, value):
+        setattr(self, "xyz"[i], float(value))
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __add__(self, other):
+        if isinstance(other, Vector):
+            return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+        return Vector(self.x + other, self.y + other, self.z + other)
+
+    def __sub__(self, other):
+        if isinstance(other, Vector):
+            return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+        return Vector(self.x - other, self.y - other, self.z - other)
+
+    def __neg__(self):
+        return Vector(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, Vector):
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        if isinstance(other, Matrix):
+            return other.Mul(self)
+        return Vector(self.x * other, self.y * other, self.z * other)
+
+    def __rmul__(self, other):
+        return Vector(self.x * other, self.y * other, self.z * other)
+
+    def __truediv__(self, other):
+        return Vector(self.x / other, self.y / other, self.z / other)
+
+    def __mod__(self, other):
+        return Cross(self, other)
+
+    def __abs__(self):
+        return Vector(abs(self.x), abs(self.y), abs(self.z))
+
+    def Dot(self, other):
+        return self * other
+
+    def Cross(self, other):
+        return Cross(self, other)
+
+    def GetLength(self):
+        return math.sqrt(self.GetLengthSquared())
+
+    def GetLengthSquared(self):
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    def GetNormalized(self):
+        length = self.GetLength()
+        if length == 0:
+            return Vector(0.0)
+        return self / length
+
+    def Normalize(self):
+        n = self.GetNormalized()
+        self.x, self.y, self.z = n.x, n.y, n.z
+        return self
+
+
+def Cross(a, b):
+    return Vector(a.y * b.z - a.z * b.y, a.z * b.x - a.x * b.z, a.x * b.y - a.y * b.x)
+
+
+class Matrix:
+    """Affine matrix with the offset and the three axis vectors."""
+
+    def __init__(self, off=None, v1=None, v2=None, v3=None):
+        self.off = Vector(off) if off is not None else Vector(0.0)
+        self.v1 = Vector(v1) if v1 is not None else Vector(1.0, 0.0, 0.0)
+        self.v2 = Vector(v2) if v2 is not None else Vector(0.0, 1.0, 0.0)
+        self.v3 = Vector(v3) if v3 is not None else Vector(0.0, 0.0, 1.0)
+
+    def __repr__(self):
+        return f"Matrix(off={self.off}, v1={self.v1}, v2={self.v2}, v3={self.v3})"
+
+    def __eq__(self, other):
+        return (isinstance(other, Matrix) and self.off == other.off and self.v1 == other.v1
+                and self.v2 == other.v2 and self.v3 == other.v3)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def Mul(self, v):
+        return self.off + self.v1 * v.x + self.v2 * v.y + self.v3 * v.z
+
+    def MulV(self, v):
+        return self.v1 * v.x + self.v2 * v.y + self.v3 * v.z
+
+    def __mul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self.Mul(other.off), self.MulV(other.v1),
+                          self.MulV(other.v2), self.MulV(other.v3))
+        if isinstance(other, Vector):
+            return self.Mul(other)
+        return Matrix(self.off * other, self.v1 * other, self.v2 * other, self.v3 * other)
+
+    def __invert__(self):
+        a, b, c = self.v1, self.v2, self.v3
+        det = a * Cross(b, c)
+        if det == 0:
+            raise ZeroDivisionError("Matrix is not invertible")
+        # Rows of the inverse are the cross products divided by the determinant.
+        r1, r2, r3 = Cross(b, c) / det, Cross(c, a) / det, Cross(a, b) / det
+        inv = Matrix(Vector(0.0),
+                     Vector(r1.x, r2.x, r3.x),
+                     Vector(r1.y, r2.y, r3.y),
+                     Vector(r1.z, r2.z, r3.z))
+        inv.off = -inv.MulV(self.off)
+        return inv
+
+    def GetTensorMatrix(self):
+        # Inverse transpose, its axes are the rows of the inverse
+        inv = ~Matrix(v1=self.v1, v2=self.v2, v3=self.v3)
+        return Matrix(Vector(0.0),
+                      Vector(inv.v1.x, inv.v2.x, inv.v3.x),
+                      Vector(inv.v1.y, inv.v2.y, inv.v3.y),
+                      Vector(inv.v1.z, inv.v2.z, inv.v3.z))
+
+    def Normalize(self):
+        self.v1 = self.v1.GetNormalized()
+        self.v2 = self.v2.GetNormalized()
+        self.v3 = self.v3.GetNormalized()
+
+    def GetNormalized(self):
+        m = Matrix(self.off, self.v1, self.v2, self.v3)
+        m.Normalize()
+        return m
+
+    def GetScale(self):
+        return Vector(self.v1.GetLength(), self.v2.GetLength(), self.v3.GetLength())
+
+
+class CPolygon:
+    """Polygon with four point indices, triangles repeat ``c`` as ``d``."""
+
+    __slots__ = ("a", "b", "c", "d")
+
+    def __init__(self, t_a, t_b, t_c, t_d=None):
+        self.a, self.b, self.c = int(t_a), int(t_b), int(t_c)
+        self.d = int(t_c if t_d is None else t_d)
+
+    def __repr__(self):
+        return f"CPolygon({self.a}, {self.b}, {self.c}, {self.d})"
+
+    def __eq__(self, other):
+        return isinstance(other, CPolygon) and self.tuple() == other.tuple()
+
+    def __getitem__(self, i):
+        return self.tuple()[i]
+
+    def tuple(self):
+        return (self.a, self.b, self.c, self.d)
+
+    def IsTriangle(self):
+        return self.c == self.d
+
+
+class BaseContainer(dict):
+    def GetData(self, key, default=None):
+        return self.get(key, default)
+
+    def SetData(self, key, value):
+        self[key] = value
+
+
+class BaseSelect:
+    """Selection of element indices."""
+
+    def __init__(self):
+        self._sel = set()
+
+    def Select(self, num):
+        self._sel.add(int(num))
+        return True
+
+    def Deselect(self, num):
+        self._sel.discard(int(num))
+        return True
+
+    def Toggle(self, num):
+        if num in self._sel:
+            self._sel.discard(num)
+        else:
+            self._sel.add(num)
+        return True
+
+    def IsSelected(self, num):
+        return num in self._sel
+
+    def GetCount(self):
+        return len(self._sel)
+
+    def SelectAll(self, max, min=0):
+        self._sel.update(range(min, max + 1))
+        return True
+
+    def DeselectAll(self):
+        self._sel.clear()
+        return True
+
+    def CopyTo(self, dest):
+        dest._sel = set(self._sel)
+        return True
+
+    def GetAll(self, max):
+        return [i in self._sel for i in range(max)]
+
+    def SetAll(self, states):
+        self._sel = {i for i, state in enumerate(states) if state}
+        return True
+
+    def GetClone(self):
+        clone = BaseSelect()
+        clone._sel = set(self._sel)
+        return clone
+
+    def GetSegments(self):
+        return sorted(self._sel)
+
+
+class GeListNode:
+    def __init__(self):
+        self._up = None
+        self._children = []
+
+    def GetUp(self):
+        return self._up
+
+    def GetDown(self):
+        return self._children[0] if self._children else None
+
+    def GetChildren(self):
+        return list(self._children)
+
+    def _siblings(self):
+        if self._up is not None:
+            return self._up._children
+        doc = getattr(self, "_doc", None)
+        if doc is not None and self in doc._objects:
+            return doc._objects
+        return None
+
+    def GetNext(self):
+        sib = self._siblings()
+        if sib is None:
+            return None
+        i = sib.index(self)
+        return sib[i + 1] if i + 1 < len(sib) else None
+
+    def GetPred(self):
+        sib = self._siblings()
+        if sib is None:
+            return None
+        i = sib.index(self)
+        return sib[i - 1] if i > 0 else None
+
+    def Remove(self):
+        sib = self._siblings()
+        if sib is not None:
+            sib.remove(self)
+        self._up = None
+
+    def _set_doc(self, doc):
+        self._doc = doc
+        for child in self._children:
+            child._set_doc(doc)
+
+    def InsertUnder(self, parent):
+        self.Remove()
+        self._up = parent
+        parent._children.insert(0, self)
+        self._set_doc(getattr(parent, "_doc", None))
+
+    def InsertUnderLast(self, parent):
+        self.Remove()
+        self._up = parent
+        parent._children.append(self)
+        self._set_doc(getattr(parent, "_doc", None))
+
+    def InsertAfter(self, pred):
+        self.Remove()
+        sib = pred._siblings()
+        self._up = pred._up
+        sib.insert(sib.index(pred) + 1, self)
+        self._set_doc(getattr(pred, "_doc", None))
+
+    def InsertBefore(self, nxt):
+        self.Remove()
+        sib = nxt._siblings()
+        self._up = nxt._up
+        sib.insert(sib.index(nxt), self)
+        self._set_doc(getattr(nxt, "_doc", None))
+
+
+class BaseList2D(GeListNode):
+    def __init__(self, type_id):
+        super().__init__()
+        self._type = type_id
+        self._name = ""
+        self._data = {}
+        self._guid = next(_guid_counter)
+        self._dirty = {DIRTYFLAGS_DATA: next(_dirty_counter), DIRTYFLAGS_MATRIX: next(_dirty_counter),
+                       DIRTYFLAGS_CHILDREN: next(_dirty_counter)}
+        self._bits = 0
+        self._tracks = []
+        self._userdata = []
+
+    def _touch(self, flag=DIRTYFLAGS_DATA):
+        self._dirty[flag] = next(_dirty_counter)
+
+    def GetType(self):
+        return self._type
+
+    def CheckType(self, type_id):
+        return self._type == type_id
+
+    def IsInstanceOf(self, type_id):
+        return self._type == type_id
+
+    def GetName(self):
+        return self._name
+
+    def SetName(self, name):
+        self._name = name
+
+    def GetGUID(self):
+        return self._guid
+
+    def GetDirty(self, flags):
+        total = 0
+        for flag, value in self._dirty.items():
+            if flags & flag:
+                total += value
+        return total
+
+    def SetDirty(self, flags):
+        for flag in list(self._dirty):
+            if flags & flag:
+                self._touch(flag)
+
+    def Message(self, msg, data=None):
+        if msg == MSG_UPDATE:
+            self._touch()
+        return True
+
+    def GetDataInstance(self):
+        return self._data
+
+    def GetData(self):
+        return BaseContainer(self._data)
+
+    def SetData(self, bc, add=True):
+        self._data.update(bc)
+        return True
+
+    def _key(self, key):
+        if isinstance(key, tuple):
+            return key
+        return key
+
+    def __getitem__(self, key):
+        if key == ID_BASELIST_NAME:
+            return self._name
+        return self._data.get(self._key(key))
+
+    def __setitem__(self, key, value):
+        if key == ID_BASELIST_NAME:
+            self._name = value
+            return
+        self._data[self._key(key)] = value
+
+    def GetParameter(self, key, flags=DESCFLAGS_GET_NONE):
+        return self[key]
+
+    def SetParameter(self, key, value, flags=DESCFLAGS_SET_NONE):
+        self[key] = value
+        return True
+
+    def GetUserDataContainer(self):
+        return list(self._userdata)
+
+    def AddUserData(self, bc):
+        did = DescID(DescLevel(ID_USERDATA), DescLevel(len(self._userdata) + 1))
+        self._userdata.append((did, bc))
+        self._touch(DIRTYFLAGS_DESCRIPTION)
+        return did
+
+    # Animation
+    def FindCTrack(self, id):
+        for track in self._tracks:
+            if track.GetDescriptionID() == id:
+                return track
+        return None
+
+    def InsertTrackSorted(self, track):
+        self._tracks.append(track)
+        track._object = self
+
+    def GetCTracks(self):
+        return list(self._tracks)
+
+    def GetBit(self, bit):
+        return bool(self._bits & bit)
+
+    def SetBit(self, bit):
+        self._bits |= bit
+
+    def DelBit(self, bit):
+        self._bits &= ~bit
+
+
+class BaseMaterial(BaseList2D):
+    def __init__(self, type_id=5703):
+        super().__init__(type_id)
+
+
+class Material(BaseMaterial):
+    pass
+
+
+class BaseTag(BaseList2D):
+    def __init__(self, type_id):
+        super().__init__(type_id)
+        self._object = None
+
+    def GetObject(self):
+        return self._object
+
+    def GetOrigin(self):
+        return self._object
+
+    def Remove(self):
+        if self._object is not None and self in self._object._tags:
+            self._object._tags.remove(self)
+        self._object = None
+
+    def GetClone(self, flags=0):
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone._data = dict(self._data)
+        clone._tracks = []
+        clone._userdata = list(self._userdata)
+        clone._object = None
+        clone._guid = next(_guid_counter)
+        clone._children = []
+        clone._up = None
+        clone._dirty = dict(self._dirty)
+        self._clone_into(clone)
+        return clone
+
+    def _clone_into(self, clone):
+        pass
+
+    def GetNext(self):
+        if self._object is None:
+            return None
+        tags = self._object._tags
+        i = tags.index(self)
+        return tags[i + 1] if i + 1 < len(tags) else None
+
+    def GetPred(self):
+        if self._object is None:
+            return None
+        tags = self._object._tags
+        i = tags.index(self)
+        return tags[i - 1] if i > 0 else None
+
+
+class TextureTag(BaseTag):
+    def __init__(self):
+        super().__init__(Ttexture)
+        self._data.update({
+            TEXTURETAG_RESTRICTION: "",
+            TEXTURETAG_PROJECTION: TEXTURETAG_PROJECTION_UVW,
+            TEXTURETAG_OFFSETX: 0.0, TEXTURETAG_OFFSETY: 0.0,
+            TEXTURETAG_LENGTHX: 1.0, TEXTURETAG_LENGTHY: 1.0,
+            TEXTURETAG_TILESX: 1.0, TEXTURETAG_TILESY: 1.0,
+        })
+        self._ml = Matrix()
+
+    def SetMaterial(self, mat):
+        self[TEXTURETAG_MATERIAL] = mat
+
+    def GetMaterial(self):
+        return self[TEXTURETAG_MATERIAL]
+
+    def GetMl(self):
+        return Matrix(self._ml.off, self._ml.v1, self._ml.v2, self._ml.v3)
+
+    def SetMl(self, m):
+        self._ml = Matrix(m.off, m.v1, m.v2, m.v3)
+
+
+class SelectionTag(BaseTag):
+    def __init__(self, type_id=Tpolygonselection):
+        super().__init__(type_id)
+        self._select = BaseSelect()
+
+    def GetBaseSelect(self):
+        return self._select
+
+    def _clone_into(self, clone):
+        clone._select = self._select.GetClone()
+
+
+class VariableTag(BaseTag):
+    """Tag with a fixed size record per point or per polygon."""
+
+    #: Bytes per element, per polygon tags store four corners.
+    RECORD_SIZE = 4
+    PER_POLYGON = False
+
+    def __init__(self, type_id, count=0):
+        super().__init__(type_id)
+        self._buf = bytearray(self.RECORD_SIZE * count)
+
+    def GetDataCount(self):
+        return len(self._buf) // self.RECORD_SIZE
+
+    def GetDataSize(self):
+        return self.RECORD_SIZE
+
+    def _resize(self, count):
+        size = self.RECORD_SIZE * count
+        if size <= len(self._buf):
+            del self._buf[size:]
+        else:
+            self._buf.extend(bytes(size - len(self._buf)))
+
+    def GetLowlevelDataAddressR(self):
+        return memoryview(self._buf).toreadonly()
+
+    def GetLowlevelDataAddressW(self):
+        self._touch()
+        return memoryview(self._buf)
+
+    def _clone_into(self, clone):
+        clone._buf = bytearray(self._buf)
+
+
+class PointTag(VariableTag):
+    RECORD_SIZE = 24
+
+    def __init__(self, count=0):
+        super().__init__(Tpoint, count)
+
+
+class PolygonTag(VariableTag):
+    RECORD_SIZE = 16
+    PER_POLYGON = True
+
+    def __init__(self, count=0):
+        super().__init__(Tpolygon, count)
+
+
+class UVWTag(VariableTag):
+    RECORD_SIZE = 48
+    PER_POLYGON = True
+
+    def __init__(self, count=0):
+        super().__init__(Tuvw, count)
+
+    def GetSlow(self, i):
+        values = struct.unpack_from("12f", self._buf, i * 48)
+        return {key: Vector(*values[n * 3:n * 3 + 3]) for n, key in enumerate("abcd")}
+
+    def SetSlow(self, i, a, b, c, d):
+        struct.pack_into("12f", self._buf, i * 48, *a, *b, *c, *d)
+        self._touch()
+
+
+class NormalTag(VariableTag):
+    RECORD_SIZE = 24
+    PER_POLYGON = True
+
+    def __init__(self, count=0):
+        super().__init__(Tnormal, count)
+
+
+class VertexMapTag(VariableTag):
+    RECORD_SIZE = 4
+
+    def __init__(self, count=0):
+        super().__init__(Tvertexmap, count)
+
+    def GetAllHighlevelData(self):
+        return array.array("f", bytes(self._buf)).tolist()
+
+    def SetAllHighlevelData(self, data):
+        self._buf[:] = array.array("f", data).tobytes()
+        self._touch()
+
+
+class VertexColorTag(VariableTag):
+    """Stores a color per point, or four per polygon in per polygon mode."""
+
+    RECORD_SIZE = 16
+
+    def __init__(self, count=0):
+        super().__init__(Tvertexcolor, count)
+
+    def IsPerPointColor(self):
+        return not self.PER_POLYGON
+
+    def SetPerPointMode(self, perPointColor):
+        """Switches the mode, the colors are not converted headless."""
+        self.PER_POLYGON = not perPointColor
+        self.RECORD_SIZE = 16 if perPointColor else 64
+        obj = self._object
+        if isinstance(obj, PointObject):
+            self._buf = bytearray(0)
+            self._resize(obj.GetPointCount() if perPointColor else obj.GetPolygonCount())
+        self._touch()
+        return True
+
+    def _clone_into(self, clone):
+        super()._clone_into(clone)
+        clone.PER_POLYGON = self.PER_POLYGON
+        clone.RECORD_SIZE = self.RECORD_SIZE
+
+
+class PhongTag(BaseTag):
+    def __init__(self):
+        super().__init__(Tphong)
+
+
+_TAG_CLASSES = {
+    Ttexture: TextureTag,
+    Tuvw: UVWTag,
+    Tnormal: NormalTag,
+    Tvertexmap: VertexMapTag,
+    Tvertexcolor: VertexColorTag,
+    Tphong: PhongTag,
+    Tpolygonselection: lambda: SelectionTag(Tpolygonselection),
+    Tpointselection: lambda: SelectionTag(Tpointselection),
+    Tedgeselection: lambda: SelectionTag(Tedgeselection),
+}
+
+
+def _make_tag(type_id):
+    if type_id == Tweights:
+        from c4d.modules.character import CAWeightTag
+        return CAWeightTag()
+    factory = _TAG_CLASSES.get(type_id)
+    if factory is None:
+        return BaseTag(type_id)
+    return factory()
+
+
+class BaseObject(BaseList2D):
+    def __init__(self, type_id):
+        super().__init__(type_id)
+        self._tags = []
+        self._ml = Matrix()
+        self._doc = None
+
+    def __bool__(self):
+        return True
+
+    # Tags
+    def GetTags(self):
+        return list(self._tags)
+
+    def GetFirstTag(self):
+        return self._tags[0] if self._tags else None
+
+    def GetLastTag(self):
+        return self._tags[-1] if self._tags else None
+
+    def GetTag(self, type_id, nr=0):
+        found = [t for t in self._tags if t.GetType() == type_id]
+        return found[nr] if nr < len(found) else None
+
+    def InsertTag(self, tag, pred=None):
+        tag.Remove()
+        tag._object = self
+        if pred is None:
+            self._tags.insert(0, tag)
+        else:
+            self._tags.insert(self._tags.index(pred) + 1, tag)
+        if isinstance(tag, VariableTag) and isinstance(self, PointObject):
+            count = self.GetPolygonCount() if tag.PER_POLYGON else self.GetPointCount()
+            if tag.GetDataCount() != count:
+                tag._resize(count)
+
+    def MakeTag(self, type_id, pred=None):
+        tag = _make_tag(type_id)
+        if isinstance(tag, VariableTag) and isinstance(self, PointObject):
+            tag._resize(self.GetPolygonCount() if tag.PER_POLYGON else self.GetPointCount())
+        if pred is None:
+            pred = self._tags[-1] if self._tags else None
+        tag._object = self
+        if pred is None:
+            self._tags.insert(0, tag)
+        else:
+            self._tags.insert(self._tags.index(pred) + 1, tag)
+        return tag
+
+    def MakeVariableTag(self, type_id, count, pred=None):
+        tag = self.MakeTag(type_id, pred)
+        tag._resize(count)
+        return tag
+
+    def KillTag(self, type_id, nr=0):
+        tag = self.GetTag(type_id, nr)
+        if tag is not None:
+            tag.Remove()
+
+    # Matrices
+    def GetMl(self):
+        return Matrix(self._ml.off, self._ml.v1, self._ml.v2, self._ml.v3)
+
+    def SetMl(self, m):
+        self._ml = Matrix(m.off, m.v1, m.v2, m.v3)
+        self._touch(DIRTYFLAGS_MATRIX)
+
+    def GetUpMg(self):
+        return self._up.GetMg() if self._up is not None else Matrix()
+
+    def GetMg(self):
+        return self.GetUpMg() * self._ml
+
+    def SetMg(self, m):
+        self.SetMl(~self.GetUpMg() * m)
+
+    def GetAbsPos(self):
+        return Vector(self._ml.off)
+
+    def SetAbsPos(self, v):
+        self._ml.off = Vector(v)
+        self._touch(DIRTYFLAGS_MATRIX)
+
+    def GetRelPos(self):
+        return self.GetAbsPos()
+
+    def SetRelPos(self, v):
+        self.SetAbsPos(v)
+
+    def GetRelRot(self):
+        return self.GetAbsRot()
+
+    def GetRelScale(self):
+        return self.GetAbsScale()
+
+    def GetRotationOrder(self):
+        return ROTATIONORDER_HPB
+
+    def GetAbsScale(self):
+        return self._ml.GetScale()
+
+    def SetAbsScale(self, s):
+        m = self._ml.GetNormalized()
+        self._ml = Matrix(self._ml.off, m.v1 * s.x, m.v2 * s.y, m.v3 * s.z)
+        self._touch(DIRTYFLAGS_MATRIX)
+
+    def GetAbsRot(self):
+        from c4d.utils import MatrixToHPB
+        return MatrixToHPB(self._ml)
+
+    def SetAbsRot(self, r):
+        from c4d.utils import HPBToMatrix
+        scale = self._ml.GetScale()
+        m = HPBToMatrix(r)
+        self._ml = Matrix(self._ml.off, m.v1 * scale.x, m.v2 * scale.y, m.v3 * scale.z)
+        self._touch(DIRTYFLAGS_MATRIX)
+
+    def InsertUnder(self, parent):
+        super().InsertUnder(parent)
+        parent._touch(DIRTYFLAGS_CHILDREN)
+
+    def InsertUnderLast(self, parent):
+        super().InsertUnderLast(parent)
+        parent._touch(DIRTYFLAGS_CHILDREN)
+
+    def Remove(self):
+        if self._up is not None:
+            self._up._touch(DIRTYFLAGS_CHILDREN)
+        super().Remove()
+
+    def GetClone(self, flags=0):
+        clone = self.__class__.__new__(self.__class__)
+        BaseObject.__init__(clone, self._type)
+        clone._name = self._name
+        clone._data = dict(self._data)
+        clone._ml = self.GetMl()
+        self._clone_geometry(clone)
+        for tag in self._tags:
+            t = tag.GetClone()
+            t._object = clone
+            clone._tags.append(t)
+        for child in self._children:
+            c = child.GetClone(flags)
+            c._up = clone
+            clone._children.append(c)
+        return clone
+
+    def _clone_geometry(self, clone):
+        pass
+
+    def GetDeformCache(self):
+        return None
+
+    def GetCache(self):
+        return None
+
+    def GetRad(self):
+        return Vector(0.0)
+
+    def GetMp(self):
+        return Vector(0.0)
+
+
+class PointObject(BaseObject):
+    def __init__(self, type_id=Opoint, pcnt=0):
+        super().__init__(type_id)
+        self._tags.append(PointTag(pcnt))
+        self._tags[-1]._object = self
+        self._points_sel = BaseSelect()
+
+    def _point_tag(self):
+        return next(t for t in self._tags if isinstance(t, PointTag))
+
+    def _clone_geometry(self, clone):
+        clone._points_sel = self._points_sel.GetClone()
+
+    def GetPointCount(self):
+        return self._point_tag().GetDataCount()
+
+    def GetAllPoints(self):
+        values = array.array("d", bytes(self._point_tag()._buf))
+        return [Vector(values[i], values[i + 1], values[i + 2]) for i in range(0, len(values), 3)]
+
+    def SetAllPoints(self, points):
+        values = array.array("d")
+        for p in points:
+            values.extend((p.x, p.y, p.z))
+        buf = self._point_tag()._buf
+        if len(values) * 8 != len(buf):
+            raise IndexError("Point count does not match the object")
+        buf[:] = values.tobytes()
+        self._touch()
+        return True
+
+    def GetPoint(self, i):
+        return Vector(*struct.unpack_from("3d", self._point_tag()._buf, i * 24))
+
+    def SetPoint(self, i, p):
+        struct.pack_into("3d", self._point_tag()._buf, i * 24, p.x, p.y, p.z)
+
+    def GetPointS(self):
+        return self._points_sel
+
+    def GetPointH(self):
+        return BaseSelect()
+
+    def _resize_points(self, pcnt):
+        for tag in self._tags:
+            if isinstance(tag, VariableTag) and not tag.PER_POLYGON:
+                tag._resize(pcnt)
+
+
+class PolygonObject(PointObject):
+    def __init__(self, pcnt=0, vcnt=0):
+        super().__init__(Opolygon, pcnt)
+        self._tags.append(PolygonTag(vcnt))
+        self._tags[-1]._object = self
+        self._polys_sel = BaseSelect()
+
+    def _polygon_tag(self):
+        return next(t for t in self._tags if isinstance(t, PolygonTag))
+
+    def _clone_geometry(self, clone):
+        super()._clone_geometry(clone)
+        clone._polys_sel = self._polys_sel.GetClone()
+
+    def IsInstanceOf(self, type_id):
+        return type_id in (Opolygon, Opoint)
+
+    def GetPolygonCount(self):
+        return self._polygon_tag().GetDataCount()
+
+    def GetAllPolygons(self):
+        values = array.array("i", bytes(self._polygon_tag()._buf))
+        return [CPolygon(*values[i:i + 4]) for i in range(0, len(values), 4)]
+
+    def GetPolygon(self, i):
+        return CPolygon(*struct.unpack_from("4i", self._polygon_tag()._buf, i * 16))
+
+    def SetPolygon(self, i, poly):
+        struct.pack_into("4i", self._polygon_tag()._buf, i * 16, poly.a, poly.b, poly.c, poly.d)
+        return True
+
+    def GetPolygonS(self):
+        return self._polys_sel
+
+    def GetPolygonH(self):
+        return BaseSelect()
+
+    def GetNgonCount(self):
+        return 0
+
+    def ResizeObject(self, pcnt, vcnt=None, ncnt=None):
+        self._resize_points(pcnt)
+        if vcnt is not None:
+            for tag in self._tags:
+                if isinstance(tag, VariableTag) and tag.PER_POLYGON:
+                    tag._resize(vcnt)
+        self._touch()
+        return True
+
+
+def GetCustomDataTypeDefault(dtype):
+    return BaseContainer()
+
+
+def EventAdd(flags=0):
+    pass
+
+
+def CallCommand(command_id, subid=0):
+    pass
+
+
+def GetC4DVersion():
+    return 2025000
+
+
+def IsCommandChecked(command_id):
+    return False
+
+
+class BaseTime:
+    def __init__(self, value=0.0, fps=None):
+        if fps is not None:
+            value = float(value) / float(fps)
+        self._seconds = float(value)
+
+    def Get(self):
+        return self._seconds
+
+    def GetFrame(self, fps):
+        return int(round(self._seconds * fps))
+
+    def __eq__(self, other):
+        return isinstance(other, BaseTime) and self._seconds == other._seconds
+
+    def __lt__(self, other):
+        return self._seconds < other._seconds
+
+
+class DescLevel:
+    def __init__(self, t_id, t_datatype=0, t_creator=0):
+        self.id = t_id
+        self.dtype = t_datatype
+        self.creator = t_creator
+
+
+class DescID:
+    def __init__(self, *levels):
+        self._levels = levels
+
+    def __getitem__(self, i):
+        return self._levels[i]
+
+    def GetDepth(self):
+        return len(self._levels)
+
+    def __eq__(self, other):
+        return isinstance(other, DescID) and [l.id for l in self._levels] == [l.id for l in other._levels]
+
+    def __hash__(self):
+        return hash(tuple(l.id for l in self._levels))
+
+
+class CKey:
+    def __init__(self, time, value=0.0):
+        self._time = time
+        self._value = value
+        self._interpolation = CINTERPOLATION_SPLINE
+
+    def GetTime(self):
+        return self._time
+
+    def GetValue(self):
+        return self._value
+
+    def SetValue(self, curve, value):
+        self._value = value
+
+    def SetInterpolation(self, curve, inter):
+        self._interpolation = inter
+
+    def GetInterpolation(self):
+        return self._interpolation
+
+
+class CCurve:
+    def __init__(self):
+        self._keys = []
+
+    def GetKeyCount(self):
+        return len(self._keys)
+
+    def GetKey(self, index):
+        return self._keys[index]
+
+    def AddKey(self, time, bUndo=True, SynchronizeKeys=False):
+        key = CKey(time)
+        index = bisect.bisect_left([k.GetTime().Get() for k in self._keys], time.Get())
+        if index < len(self._keys) and self._keys[index].GetTime() == time:
+            return {"key": self._keys[index], "nidx": index}
+        self._keys.insert(index, key)
+        return {"key": key, "nidx": index}
+
+    def DelKey(self, index, bUndo=True, SynchronizeKeys=False):
+        del self._keys[index]
+        return True
+
+    def FlushKeys(self, bUndo=True, SynchronizeKeys=False):
+        self._keys = []
+
+    def SetKeyDefault(self, doc, kidx):
+        pass
+
+
+class CTrack(BaseList2D):
+    def __init__(self, op, id):
+        super().__init__(5350)
+        self._object = op
+        self._id = id
+        self._curve = CCurve()
+
+    def GetCurve(self, type=0, bCreate=True):
+        return self._curve
+
+    def GetDescriptionID(self):
+        return self._id
+
+    def Remove(self):
+        if self._object is not None and self in self._object._tracks:
+            self._object._tracks.remove(self)
+
+from c4d import documents, gui, utils, modules  # noqa: E402
+from c4d.modules import character  # noqa: E402,F401
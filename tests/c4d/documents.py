@@ -0,0 +1,147 @@
+"""Document stand-in with a flat undo log."""
+
+import c4d
+
+
+class BaseDocument(c4d.BaseList2D):
+    def __init__(self):
+        super().__init__(110059)
+        self._objects = []
+        self._active = []
+        self._active_tag = None
+        self._time = c4d.BaseTime(0.0)
+        self._fps = 30
+        self._min_time = c4d.BaseTime(0.0)
+        self._max_time = c4d.BaseTime(90, 30)
+        self.undo_log = []
+        self._undo_depth = 0
+
+    # Objects
+    def InsertObject(self, op, parent=None, pred=None, checknames=False):
+        if parent is not None:
+            if pred is not None:
+                op.InsertAfter(pred)
+            else:
+                op.InsertUnder(parent)
+        elif pred is not None:
+            op.InsertAfter(pred)
+        else:
+            op.Remove()
+            self._objects.insert(0, op)
+            op._up = None
+        op._set_doc(self)
+
+    def GetFirstObject(self):
+        return self._objects[0] if self._objects else None
+
+    def GetObjects(self):
+        return list(self._objects)
+
+    def _walk(self):
+        stack = list(reversed(self._objects))
+        while stack:
+            op = stack.pop()
+            yield op
+            stack.extend(reversed(op._children))
+
+    def SearchObject(self, name):
+        for op in self._walk():
+            if op.GetName() == name:
+                return op
+        return None
+
+    # Selection
+    def GetActiveObject(self):
+        return self._active[0] if len(self._active) == 1 else None
+
+    def GetActiveObjects(self, flags=0):
+        active = [op for op in self._walk() if op in self._active]
+        if flags & c4d.GETACTIVEOBJECTFLAGS_SELECTIONORDER:
+            active = list(self._active)
+        if flags & c4d.GETACTIVEOBJECTFLAGS_CHILDREN:
+            return active
+        # Without the children flag, objects below a selected parent are skipped.
+        result = []
+        for op in active:
+            parent = op.GetUp()
+            while parent is not None and parent not in self._active:
+                parent = parent.GetUp()
+            if parent is None:
+                result.append(op)
+        return result
+
+    def SetActiveObject(self, op, mode=c4d.SELECTION_NEW):
+        if mode == c4d.SELECTION_NEW:
+            self._active = []
+        if op is None:
+            return
+        if mode == c4d.SELECTION_SUB:
+            if op in self._active:
+                self._active.remove(op)
+        elif op not in self._active:
+            self._active.append(op)
+
+    def SetSelection(self, op, mode=c4d.SELECTION_NEW):
+        self.SetActiveObject(op, mode)
+
+    def SetActiveTag(self, tag, mode=c4d.SELECTION_NEW):
+        self._active_tag = tag
+
+    def GetActiveTag(self):
+        return self._active_tag
+
+    # Undo
+    def StartUndo(self):
+        self._undo_depth += 1
+        return True
+
+    def EndUndo(self):
+        self._undo_depth -= 1
+        return True
+
+    def AddUndo(self, type, data):
+        self.undo_log.append((type, data))
+        return True
+
+    # Time
+    def GetTime(self):
+        return self._time
+
+    def SetTime(self, time):
+        self._time = time
+
+    def GetFps(self):
+        return self._fps
+
+    def SetFps(self, fps):
+        self._fps = fps
+
+    def GetMinTime(self):
+        return self._min_time
+
+    def GetMaxTime(self):
+        return self._max_time
+
+    def GetLoopMinTime(self):
+        return self._min_time
+
+    def GetLoopMaxTime(self):
+        return self._max_time
+
+    def ExecutePasses(self, bt, animation, expressions, caches, flags):
+        return True
+
+    def GetHDirty(self, flags):
+        return sum(op.GetDirty(c4d.DIRTYFLAGS_CHILDREN) for op in self._walk())
+
+
+_active_document = BaseDocument()
+
+
+def GetActiveDocument():
+    return _active_document
+
+
+def SetActiveDocument(doc):
+    global _active_document
+    _active_document = doc
@@ -0,0 +1,30 @@
+"""GUI stand-ins that print instead of opening dialogs."""
+
+messages = []
+
+
+def MessageDialog(text, type=0):
+    messages.append(text)
+    print(text)
+    return True
+
+
+def QuestionDialog(text):
+    messages.append(text)
+    return True
+
+
+def StatusSetText(text):
+    pass
+
+
+def StatusSetBar(percent):
+    pass
+
+
+def StatusSetSpin():
+    pass
+
+
+def StatusClear():
+    pass
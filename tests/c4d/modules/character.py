@@ -0,0 +1,75 @@
+"""Weight tag stand-in storing one float array per joint."""
+
+import array
+
+import c4d
+
+
+class CAWeightTag(c4d.BaseTag):
+    def __init__(self):
+        super().__init__(c4d.Tweights)
+        self._joints = []
+        self._maps = []
+
+    def _point_count(self):
+        obj = self.GetObject()
+        return obj.GetPointCount() if obj is not None else 0
+
+    def GetJointCount(self):
+        return len(self._joints)
+
+    def GetJoint(self, index, doc=None):
+        return self._joints[index]
+
+    def AddJoint(self, op):
+        if op in self._joints:
+            return self._joints.index(op)
+        self._joints.append(op)
+        self._maps.append(array.array("f"))
+        return len(self._joints) - 1
+
+    def RemoveJoint(self, op):
+        i = self._joints.index(op)
+        del self._joints[i]
+        del self._maps[i]
+
+    def FindJoint(self, op, doc=None):
+        return self._joints.index(op) if op in self._joints else -1
+
+    def _map(self, index):
+        count = self._point_count()
+        values = self._maps[index]
+        if len(values) < count:
+            values.extend([0.0] * (count - len(values)))
+        elif len(values) > count:
+            del values[count:]
+        return values
+
+    def GetWeight(self, index, pntIndex):
+        return float(self._map(index)[pntIndex])
+
+    def SetWeight(self, index, pntIndex, weight):
+        self._map(index)[pntIndex] = weight
+        self._touch()
+        return True
+
+    def GetWeightMap(self, index):
+        return self._map(index).tolist()
+
+    def SetWeightMap(self, index, map):
+        count = self._point_count()
+        if len(map) != count:
+            raise ValueError("Weight map size does not match the point count")
+        self._maps[index] = array.array("f", map)
+        self._touch()
+        return True
+
+    def GetWeightDirty(self):
+        return self.GetDirty(c4d.DIRTYFLAGS_DATA)
+
+    def WeightDirty(self):
+        self._touch()
+
+    def _clone_into(self, clone):
+        clone._joints = list(self._joints)
+        clone._maps = [array.array("f", m) for m in self._maps]
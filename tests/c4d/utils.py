@@ -0,0 +1,57 @@
+"""Math helpers and modeling command stubs."""
+
+import math
+
+import c4d
+
+
+def Rad(value):
+    return math.radians(value)
+
+
+def Deg(value):
+    return math.degrees(value)
+
+
+def HPBToMatrix(w, rot_order=c4d.ROTATIONORDER_HPB):
+    """HPB rotation (Y, X, Z) to a rotation matrix, as in Cinema 4D."""
+    ch, sh = math.cos(w.x), math.sin(w.x)
+    cp, sp = math.cos(w.y), math.sin(w.y)
+    cb, sb = math.cos(w.z), math.sin(w.z)
+    v1 = c4d.Vector(ch * cb - sh * sp * sb, -cp * sb, sh * cb + ch * sp * sb)
+    v2 = c4d.Vector(ch * sb + sh * sp * cb, cp * cb, sh * sb - ch * sp * cb)
+    v3 = c4d.Vector(-sh * cp, sp, ch * cp)
+    return c4d.Matrix(c4d.Vector(0.0), v1, v2, v3)
+
+
+def MatrixToHPB(m, rot_order=c4d.ROTATIONORDER_HPB):
+    """Inverse of :func:`HPBToMatrix` for normalized matrices."""
+    m = m.GetNormalized()
+    p = math.asin(max(-1.0, min(1.0, m.v3.y)))
+    if abs(math.cos(p)) > 1e-9:
+        h = math.atan2(-m.v3.x, m.v3.z)
+        b = math.atan2(-m.v1.y, m.v2.y)
+    else:
+        h = 0.0
+        b = math.atan2(m.v2.x, m.v1.x)
+    return c4d.Vector(h, p, b)
+
+
+def GetOptimalAngle(hpb_old, hpb_new, order=c4d.ROTATIONORDER_HPB):
+    result = c4d.Vector(hpb_new)
+    for axis in range(3):
+        while result[axis] - hpb_old[axis] > math.pi:
+            result[axis] = result[axis] - 2 * math.pi
+        while result[axis] - hpb_old[axis] < -math.pi:
+            result[axis] = result[axis] + 2 * math.pi
+    return result
+
+
+def SendModelingCommand(command, list, mode=c4d.MODELINGCOMMANDMODE_ALL, bc=None, doc=None, flags=0):
+    """Only ``MCOMMAND_OPTIMIZE`` style no-ops are supported headless."""
+    return True
+
+
+def GenerateUVW(op, mg, tag, texopmg, viewport=None):
+    """Projection is not simulated headless, returns a zeroed UVW tag of the right size."""
+    return c4d.UVWTag(op.GetPolygonCount())
@@ -0,0 +1,55 @@
+"""Runs the scripts headless against the c4d stand-in package next to this file."""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+# The stand-in has to win over a real c4d module
+sys.path.insert(0, TESTS_DIR)
+
+from c4d import documents  # noqa: E402
+
+
+def load_script(path, doc=None, op=None, numpy=True):
+    """
+    Import a script like the Script Manager runs it, without calling main().
+
+    Args:
+        path (str): Script path relative to the repository root
+        doc (c4d.documents.BaseDocument): Set as the doc global, the active document by default
+        op (c4d.BaseObject): Set as the op global
+        numpy (bool): if False the script runs its pure Python code paths
+
+    Returns:
+        module: The script module, its functions run against the stand-in
+    """
+    name = "script_" + os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, path))
+    module = importlib.util.module_from_spec(spec)
+    module.doc = doc if doc is not None else documents.GetActiveDocument()
+    module.op = op
+    spec.loader.exec_module(module)
+    if not numpy:
+        module.np = None
+    return module
+
+
+@pytest.fixture
+def doc():
+    """A new empty document, also set as the active one."""
+    document = documents.BaseDocument()
+    documents.SetActiveDocument(document)
+    return document
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def use_numpy(request):
+    """Runs a test with the NumPy code paths and again with the pure Python ones."""
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
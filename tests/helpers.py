@@ -0,0 +1,38 @@
+"""Builders for the test scenes."""
+
+import c4d
+
+
+def make_polygon_object(points, polygons, name=""):
+    """Return a PolygonObject with the given (x, y, z) points and (a, b, c, d) polygons."""
+    obj = c4d.PolygonObject(len(points), len(polygons))
+    obj.SetAllPoints([c4d.Vector(*p) for p in points])
+    for i, poly in enumerate(polygons):
+        obj.SetPolygon(i, c4d.CPolygon(*poly))
+    obj.SetName(name)
+    return obj
+
+
+def make_grid(columns, rows, size=1.0, offset=(0.0, 0.0, 0.0)):
+    """Return the points and quads of a grid in the XZ plane."""
+    ox, oy, oz = offset
+    points = [(ox + x * size, oy, oz + z * size) for z in range(rows + 1) for x in range(columns + 1)]
+    polygons = []
+    for z in range(rows):
+        for x in range(columns):
+            a = z * (columns + 1) + x
+            polygons.append((a, a + 1, a + columns + 2, a + columns + 1))
+    return points, polygons
+
+
+def make_joint(name, parent=None, doc=None, position=None):
+    """Return a joint inserted under parent, or at the top of doc."""
+    joint = c4d.BaseObject(c4d.Ojoint)
+    joint.SetName(name)
+    if parent is not None:
+        joint.InsertUnderLast(parent)
+    elif doc is not None:
+        doc.InsertObject(joint)
+    if position is not None:
+        joint.SetAbsPos(c4d.Vector(*position))
+    return joint
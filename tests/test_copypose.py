@@ -0,0 +1,183 @@
+import math
+
+import c4d
+import pytest
+
+from conftest import load_script
+from helpers import make_joint
+
+
+def make_rig(doc, names_order=None):
+    """Root with two branches of three joints, children can be inserted in a different order."""
+    root = make_joint("root", doc=doc)
+    joints = [root]
+    for branch in names_order or ("left", "right"):
+        parent = root
+        for k in range(3):
+            parent = make_joint("%s%d" % (branch, k), parent)
+            joints.append(parent)
+    return root, joints
+
+
+def add_userdata(tag, name):
+    bc = c4d.GetCustomDataTypeDefault(c4d.DTYPE_BASELISTLINK)
+    bc[c4d.DESC_NAME] = name
+    return tag.AddUserData(bc)
+
+
+def animate(joints, frame):
+    for i, joint in enumerate(joints):
+        ml = c4d.utils.HPBToMatrix(c4d.Vector(0.02 * frame * (i % 3), 0.3 * math.sin(frame * 0.1 + i), 0.0))
+        ml.off = c4d.Vector(10.0 + (frame if i % 2 else 5.0), 0.0, 0.0)
+        joint.SetMl(ml)
+
+
+def by_path(joints):
+    def path(joint):
+        names = []
+        while joint is not None:
+            names.append(joint.GetName())
+            joint = joint.GetUp()
+        return tuple(reversed(names))
+    return {path(joint): joint for joint in joints}
+
+
+def test_tag_copies_pose_and_caches_pairs(doc):
+    source, source_joints = make_rig(doc)
+    target, target_joints = make_rig(doc, ("right", "left"))
+    tag = c4d.BaseTag(c4d.Tpython)
+    target.InsertTag(tag)
+    tag[add_userdata(tag, "CopyFrom")] = source
+    time_id = add_userdata(tag, "Time (ms)")
+    copy_pose = load_script("pythontag/CopyPose.py", doc, tag)
+    animate(source_joints, 12)
+
+    copy_pose.main()
+
+    targets = by_path(target_joints)
+    for path, joint in by_path(source_joints).items():
+        assert (targets[path].GetMg().off - joint.GetMg().off).GetLength() < 1e-9
+    assert tag[time_id] is not None
+
+    pairs = copy_pose.cache["pairs"]
+    copy_pose.main()
+    assert copy_pose.cache["pairs"] is pairs
+
+    make_joint("extra", source)
+    copy_pose.main()
+    assert copy_pose.cache["pairs"] is not pairs
+
+
+def test_tag_rematches_renamed_joints(doc):
+    source, source_joints = make_rig(doc)
+    target, target_joints = make_rig(doc, ("right", "left"))
+    tag = c4d.BaseTag(c4d.Tpython)
+    target.InsertTag(tag)
+    tag[add_userdata(tag, "CopyFrom")] = source
+    copy_pose = load_script("pythontag/CopyPose.py", doc, tag)
+    copy_pose.main()
+    count = len(copy_pose.cache["pairs"])
+
+    renamed = target.GetChildren()[0]
+    renamed.SetName("renamed")
+    copy_pose.main()
+
+    assert all(tgt is not renamed for src, tgt in copy_pose.cache["pairs"])
+    assert len(copy_pose.cache["pairs"]) < count
+
+
+def test_tag_throttles_time_writes(doc, monkeypatch):
+    source, source_joints = make_rig(doc)
+    target, target_joints = make_rig(doc)
+    tag = c4d.BaseTag(c4d.Tpython)
+    target.InsertTag(tag)
+    tag[add_userdata(tag, "CopyFrom")] = source
+    time_id = add_userdata(tag, "Time (ms)")
+    copy_pose = load_script("pythontag/CopyPose.py", doc, tag)
+    writes = []
+    set_item = c4d.BaseTag.__setitem__
+    monkeypatch.setattr(c4d.BaseTag, "__setitem__",
+                        lambda self, key, value: writes.append(value) or set_item(self, key, value))
+
+    for frame in range(copy_pose.timeUpdateInterval * 3):
+        copy_pose.main()
+
+    assert 1 <= len(writes) <= 3
+    assert all(value == round(value, 2) for value in writes)
+
+
+def test_linear_keys_stay_within_tolerance(use_numpy):
+    bake = load_script("scripts/Bake CopyPose.py", numpy=use_numpy)
+    frames = 200
+    values = [[5.0, frame * 0.5, math.sin(frame * 0.05), min(frame, 50) * 2.0] for frame in range(frames)]
+
+    keep = bake.find_keys(values)
+
+    assert sum(keep[0]) == 2 and sum(keep[1]) == 2
+    assert keep[3][50] and sum(keep[3]) == 3
+    for channel, kept in enumerate(keep):
+        keys = [frame for frame in range(frames) if kept[frame]]
+        for start, end in zip(keys, keys[1:]):
+            a, b = values[start][channel], values[end][channel]
+            for frame in range(start, end):
+                interpolated = a + (b - a) * (frame - start) / (end - start)
+                assert abs(interpolated - values[frame][channel]) <= bake.linearTolerance + 1e-12
+
+
+def test_bake_writes_tracks(doc, monkeypatch):
+    source, source_joints = make_rig(doc)
+    target, target_joints = make_rig(doc, ("right", "left"))
+    bake = load_script("scripts/Bake CopyPose.py", doc)
+    doc.SetFps(30)
+    doc._min_time, doc._max_time = c4d.BaseTime(0, 30), c4d.BaseTime(59, 30)
+    monkeypatch.setattr(doc, "ExecutePasses", lambda *args: animate(source_joints, doc.GetTime().GetFrame(30)))
+    doc.SetActiveObject(source)
+    doc.SetActiveObject(target, c4d.SELECTION_ADD)
+
+    bake.main()
+
+    pairs = bake.build_pairs(source, target)
+    times = [c4d.BaseTime(frame, 30) for frame in range(60)]
+    values = bake.sample_pose(doc, pairs, times)
+    for j, (src, joint) in enumerate(pairs):
+        tracks = joint.GetCTracks()
+        assert len(tracks) == len(bake.CHANNELS)
+        for c, track in enumerate(tracks):
+            curve = track.GetCurve()
+            keys = [(curve.GetKey(k).GetTime().GetFrame(30), curve.GetKey(k).GetValue()) for k in range(curve.GetKeyCount())]
+            assert keys[0][0] == 0 and keys[-1][0] == 59
+            for (start, a), (end, b) in zip(keys, keys[1:]):
+                for frame in range(start, end + 1):
+                    interpolated = a + (b - a) * (frame - start) / (end - start)
+                    assert interpolated == pytest.approx(values[frame][j * 9 + c], abs=bake.linearTolerance + 1e-9)
+
+    # Baking again replaces the keys in the range instead of adding to them
+    counts = [track.GetCurve().GetKeyCount() for track in target.GetCTracks()]
+    bake.main()
+    assert [track.GetCurve().GetKeyCount() for track in target.GetCTracks()] == counts
+
+
+def test_bake_stores_joints_for_undo_before_sampling(doc, monkeypatch):
+    source, source_joints = make_rig(doc)
+    target, target_joints = make_rig(doc, ("right", "left"))
+    bake = load_script("scripts/Bake CopyPose.py", doc)
+    doc._min_time, doc._max_time = c4d.BaseTime(0, 30), c4d.BaseTime(9, 30)
+    undone = []
+
+    def execute_passes(*args):
+        if not undone:
+            undone.extend(data for kind, data in doc.undo_log)
+        animate(source_joints, doc.GetTime().GetFrame(30))
+    monkeypatch.setattr(doc, "ExecutePasses", execute_passes)
+    add_key = c4d.CCurve.AddKey
+
+    def add_key_without_undo(self, time, bUndo=True, SynchronizeKeys=False):
+        assert not bUndo
+        return add_key(self, time, bUndo, SynchronizeKeys)
+    monkeypatch.setattr(c4d.CCurve, "AddKey", add_key_without_undo)
+    doc.SetActiveObject(source)
+    doc.SetActiveObject(target, c4d.SELECTION_ADD)
+
+    bake.main()
+
+    assert all(joint in undone for joint in target_joints)
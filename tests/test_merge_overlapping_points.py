@@ -0,0 +1,252 @@
+import random
+import struct
+
+import c4d
+import pytest
+
+from conftest import load_script
+from helpers import make_grid, make_polygon_object
+
+
+@pytest.fixture
+def merge(doc, use_numpy):
+    return load_script("scripts/Merge Overlaping Points.py", doc, numpy=use_numpy)
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 0.01, 0.5])
+def test_spatial_hash_matches_brute_force(merge, tolerance):
+    rng = random.Random(1)
+    coords = [(rng.randint(0, 20) + rng.uniform(-0.3, 0.3), rng.randint(0, 20), 0.0) for _ in range(2000)]
+    coords += coords[:100]
+
+    assert merge.find_point_matches(coords, tolerance) == merge.find_point_matches(coords, tolerance, brute_force=True)
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 0.01, 0.5, 0.8])
+def test_numpy_matches_python(tolerance):
+    np = pytest.importorskip("numpy")
+    merge = load_script("scripts/Merge Overlaping Points.py")
+    rng = random.Random(2)
+    # Chains of close points, which point stays unique depends on the point order
+    coords = [(rng.randint(0, 10) * 0.4 + rng.uniform(-0.05, 0.05), rng.randint(0, 3) * 0.3, 0.0) for _ in range(1500)]
+    coords += coords[:50]
+
+    point_map, unique_indices = merge.find_point_matches_array(np.array(coords), tolerance)
+
+    assert (point_map.tolist(), unique_indices.tolist()) == merge.find_point_matches(coords, tolerance)
+
+
+def split_grid_object(name=""):
+    left_points, left_polygons = make_grid(2, 2)
+    right_points, right_polygons = make_grid(2, 2, offset=(2.0, 0.0, 0.0))
+    offset = len(left_points)
+    polygons = left_polygons + [tuple(i + offset for i in poly) for poly in right_polygons]
+    return make_polygon_object(left_points + right_points, polygons, name)
+
+
+def test_merges_selected_objects(merge, doc, capsys):
+    objects = [split_grid_object("grid" + str(i)) for i in range(3)]
+    points, polygons = make_grid(1, 1)
+    objects.append(make_polygon_object(points, polygons, "clean"))
+    for obj in objects:
+        doc.InsertObject(obj)
+        doc.SetActiveObject(obj, c4d.SELECTION_ADD)
+
+    assert merge.merge_selected_objects(doc, 0.01, max_workers=2)
+
+    assert [obj.GetPointCount() for obj in objects] == [15, 15, 15, 4]
+    assert [obj.GetPolygonCount() for obj in objects] == [8, 8, 8, 1]
+    out = capsys.readouterr().out
+    assert "CPU time summed over the objects" in out and "speedup" not in out
+
+
+def test_welds_split_grid(merge):
+    # Two grids that share one row of points, every shared point exists twice
+    left_points, left_polygons = make_grid(2, 2)
+    right_points, right_polygons = make_grid(2, 2, offset=(2.0, 0.0, 0.0))
+    offset = len(left_points)
+    polygons = left_polygons + [tuple(i + offset for i in poly) for poly in right_polygons]
+    obj = make_polygon_object(left_points + right_points, polygons)
+    before = [tuple(obj.GetPoint(i) for i in poly) for poly in obj.GetAllPolygons()]
+
+    assert merge.merge_points_with_tolerance(obj, 0.01)
+
+    assert obj.GetPointCount() == 15
+    assert obj.GetPolygonCount() == 8
+    after = [tuple(obj.GetPoint(i) for i in poly) for poly in obj.GetAllPolygons()]
+    assert after == before
+
+
+def test_collapsed_edge_makes_triangle(merge):
+    obj = make_polygon_object([(0, 0, 0), (0.001, 0, 0), (1, 0, 1), (0, 0, 1)], [(0, 1, 2, 3)])
+
+    assert merge.merge_points_with_tolerance(obj, 0.01)
+
+    assert obj.GetPointCount() == 3
+    assert obj.GetPolygon(0).IsTriangle()
+
+
+def test_keeps_uvs_with_their_polygons(merge):
+    points, polygons = make_grid(1, 1)
+    obj = make_polygon_object(points + points, polygons + [(4, 5, 6, 7)])
+    uvw = obj.MakeVariableTag(c4d.Tuvw, 2)
+    for i in range(2):
+        uvw.SetSlow(i, c4d.Vector(i, 0, 0), c4d.Vector(i, 1, 0), c4d.Vector(i, 2, 0), c4d.Vector(i, 3, 0))
+
+    assert merge.merge_points_with_tolerance(obj, 0.01)
+
+    assert obj.GetPointCount() == 4
+    assert [uvw.GetSlow(i)["a"].x for i in range(uvw.GetDataCount())] == [0.0, 1.0]
+
+
+def test_memory_report_is_optional(merge, capsys, monkeypatch):
+    import tracemalloc
+    points, polygons = make_grid(40, 40)
+    start = tracemalloc.start
+
+    def no_tracing():
+        raise AssertionError("merge must not trace allocations")
+    monkeypatch.setattr("tracemalloc.start", no_tracing)
+    assert merge.merge_points_with_tolerance(make_polygon_object(points + points, polygons), 0.01)
+    assert "Peak memory" not in capsys.readouterr().out
+
+    monkeypatch.setattr("tracemalloc.start", start)
+    assert merge.merge_points_with_tolerance(make_polygon_object(points + points, polygons), 0.01,
+                                             report_memory=True)
+    peak = float(capsys.readouterr().out.split("Peak memory of the merge ")[1].split(" MB")[0])
+    assert peak > 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_remaps_point_and_polygon_tags(merge):
+    # Two quads with a duplicated shared edge, points 4 and 7 lie on points 1 and 2
+    points = [(0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1), (1, 0, 0), (2, 0, 0), (2, 0, 1), (1, 0, 1)]
+    obj = make_polygon_object(points, [(0, 1, 2, 3), (4, 5, 6, 7)])
+    vertex_map = obj.MakeVariableTag(c4d.Tvertexmap, 8)
+    vertex_map.SetAllHighlevelData([i / 8.0 for i in range(8)])
+    weights = obj.MakeTag(c4d.Tweights)
+    weights.AddJoint(c4d.BaseObject(c4d.Ojoint))
+    weights.SetWeightMap(0, [i / 8.0 for i in range(8)])
+    normals = obj.MakeVariableTag(c4d.Tnormal, 2)
+    normals.GetLowlevelDataAddressW()[:] = struct.pack("24h", *range(24))
+    point_selection = obj.MakeTag(c4d.Tpointselection)
+    point_selection.GetBaseSelect().Select(6)
+    polygon_selection = obj.MakeTag(c4d.Tpolygonselection)
+    polygon_selection.GetBaseSelect().Select(1)
+    edge_selection = obj.MakeTag(c4d.Tedgeselection)
+    edge_selection.GetBaseSelect().Select(1 * 4 + 2)
+
+    assert merge.merge_points_with_tolerance(obj, 0.01)
+
+    kept_points = [0, 1, 2, 3, 5, 6]
+    assert obj.GetPointCount() == 6
+    assert [int(round(v * 8)) for v in vertex_map.GetAllHighlevelData()] == kept_points
+    assert [int(round(v * 8)) for v in weights.GetWeightMap(0)] == kept_points
+    assert struct.unpack("24h", bytes(normals.GetLowlevelDataAddressR())) == tuple(range(24))
+    assert point_selection.GetBaseSelect().GetAll(6) == [False] * 5 + [True]
+    assert polygon_selection.GetBaseSelect().GetAll(2) == [False, True]
+    assert edge_selection.GetBaseSelect().GetAll(8) == [False] * 6 + [True, False]
+
+
+def test_edges_follow_collapsed_quad(merge):
+    # The a-b edge collapses, the quad is stored as the triangle b, c, d
+    obj = make_polygon_object([(0, 0, 0), (0.001, 0, 0), (1, 0, 1), (0, 0, 1)], [(0, 1, 2, 3)])
+    edge_selection = obj.MakeTag(c4d.Tedgeselection)
+    edge_selection.GetBaseSelect().Select(1)
+    edge_selection.GetBaseSelect().Select(3)
+
+    assert merge.merge_points_with_tolerance(obj, 0.01)
+
+    assert edge_selection.GetBaseSelect().GetAll(4) == [True, False, True, True]
+
+
+def test_weld_objects_keeps_materials_and_tags(merge, doc):
+    points, polygons = make_grid(2, 2)
+    left = make_polygon_object(points, polygons, "left")
+    right = make_polygon_object(points, polygons, "right")
+    right.SetMg(c4d.Matrix(c4d.Vector(2, 0, 0)))
+    for obj in (left, right):
+        doc.InsertObject(obj, pred=None)
+
+    uvw = left.MakeVariableTag(c4d.Tuvw, 4)
+    for i in range(4):
+        uvw.SetSlow(i, c4d.Vector(i + 1, 0, 0), c4d.Vector(), c4d.Vector(), c4d.Vector())
+    first = left.MakeTag(c4d.Tpolygonselection)
+    first.SetName("first")
+    first.GetBaseSelect().Select(0)
+    materials = [c4d.Material() for _ in range(3)]
+    for obj, material, restriction in ((left, materials[0], ""), (left, materials[1], "first"),
+                                       (right, materials[2], "")):
+        texture = obj.MakeTag(c4d.Ttexture)
+        texture.SetMaterial(material)
+        texture[c4d.TEXTURETAG_RESTRICTION] = restriction
+    joint = c4d.BaseObject(c4d.Ojoint)
+    weights = right.MakeTag(c4d.Tweights)
+    weights.AddJoint(joint)
+    weights.SetWeightMap(0, [1.0] * 9)
+
+    new_obj = merge.weld_objects(doc, [left, right], 0.01)
+
+    assert new_obj.GetPointCount() == 15
+    assert new_obj.GetPolygonCount() == 8
+    selections = {tag.GetName(): tag.GetBaseSelect().GetAll(8)
+                  for tag in new_obj.GetTags() if tag.CheckType(c4d.Tpolygonselection)}
+    used = {tag.GetMaterial(): selections[tag[c4d.TEXTURETAG_RESTRICTION]]
+            for tag in new_obj.GetTags() if tag.CheckType(c4d.Ttexture)}
+    assert used[materials[0]] == [True] * 4 + [False] * 4
+    assert used[materials[1]] == [True] + [False] * 7
+    assert used[materials[2]] == [False] * 4 + [True] * 4
+
+    new_uvw = new_obj.GetTag(c4d.Tuvw)
+    assert [new_uvw.GetSlow(i)["a"].x for i in range(8)] == [1.0, 2.0, 3.0, 4.0, 0.0, 0.0, 0.0, 0.0]
+    new_weights = new_obj.GetTag(c4d.Tweights)
+    assert new_weights.GetJoint(0) is joint
+    # Welded seam points keep the weights of the first object's points
+    assert [p.x > 2 for p in new_obj.GetAllPoints()] == [w == 1.0 for w in new_weights.GetWeightMap(0)]
+
+
+def test_transforms_normals_into_global_space(merge):
+    # x becomes -z and is scaled by 2, y stays, z becomes x
+    mg = c4d.Matrix(c4d.Vector(1, 2, 3), c4d.Vector(0, 0, -2), c4d.Vector(0, 1, 0), c4d.Vector(1, 0, 0))
+    data = struct.pack("<9h", 32000, 0, 0, 0, 32000, 0, 0, 0, 32000)
+
+    normals = struct.unpack("<9h", merge.transform_normals(data, mg))
+
+    assert normals == (0, 0, -32000, 0, 32000, 0, 32000, 0, 0)
+
+
+def test_preview_counts_match_merge(merge, doc, capsys):
+    # Every grid point has a copy moved by a distance between the tolerances
+    points, polygons = make_grid(6, 6, size=10.0)
+    offsets = [0.005, 0.05, 0.5]
+    copies = [(x + offsets[i % 3], y, z) for i, (x, y, z) in enumerate(points)]
+    coords = points + copies
+    obj = make_polygon_object(coords, polygons)
+    doc.InsertObject(obj)
+    tolerances = [0.001, 0.01, 0.1, 1.0]
+
+    counts = merge.preview_merge(doc, obj, tolerances, selection_tolerance=0.01)
+
+    assert counts == [len(coords) - len(merge.find_point_matches(coords, t)[1]) for t in tolerances]
+    assert counts == [0, 17, 33, 49]
+    selection = obj.GetTag(c4d.Tpointselection).GetBaseSelect()
+    assert selection.GetCount() == 2 * 17
+    assert all(selection.IsSelected(i) == selection.IsSelected(i + len(points)) for i in range(len(points)))
+    assert obj.GetPointCount() == len(coords)
+
+
+def test_weld_distances_are_nearest_earlier_point(merge):
+    rng = random.Random(3)
+    coords = [(rng.uniform(0, 5), rng.uniform(0, 5), 0.0) for _ in range(400)]
+    tolerances = [0.05, 0.2, 0.5]
+
+    distances, nearest = merge.find_weld_distances(coords, tolerances)
+
+    for i, (x, y, z) in enumerate(coords):
+        expected = min([((x - u) ** 2 + (y - v) ** 2) ** 0.5 for u, v, w in coords[:i]] + [float("inf")])
+        if expected > 0.5:
+            assert distances[i] == float("inf") and nearest[i] == -1
+        else:
+            assert distances[i] == pytest.approx(expected)
+            u, v, w = coords[nearest[i]]
+            assert ((x - u) ** 2 + (y - v) ** 2) ** 0.5 == pytest.approx(expected)
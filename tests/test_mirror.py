@@ -0,0 +1,102 @@
+import random
+
+import c4d
+import pytest
+
+from conftest import load_script
+from helpers import make_joint, make_polygon_object
+
+
+@pytest.fixture
+def mirror_weights(doc, use_numpy):
+    return load_script("scripts/Mirror Weights.py", doc, numpy=use_numpy)
+
+
+@pytest.fixture
+def mirror_joints(doc):
+    return load_script("scripts/Mirror Joint Hierarchy.py", doc)
+
+
+def test_closest_points_match_brute_force(mirror_weights):
+    rng = random.Random(2)
+    points = [(rng.uniform(0, 10), rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(1000)]
+    queries = [(x + rng.uniform(-0.2, 0.2), y, z) for x, y, z in points[::4]]
+
+    matches = mirror_weights.find_closest_points(points, queries, 0.1)
+
+    for query, match in zip(queries, matches):
+        dists = [sum((a - b) ** 2 for a, b in zip(query, p)) for p in points]
+        best = min(range(len(points)), key=dists.__getitem__)
+        assert match == (best if dists[best] <= 0.01 else -1)
+
+
+def test_mirror_weights_swaps_sides(mirror_weights, doc):
+    root = make_joint("root", doc=doc)
+    left = make_joint("arm left", root)
+    right = make_joint("arm right", root)
+    # Positive side points first, then their mirror images in reverse order, one point without a counterpart
+    positive = [(x + 1.0, y, 0.0) for x in range(3) for y in range(3)]
+    points = positive + [(-x, y, z) for x, y, z in reversed(positive)] + [(-7.0, 0.0, 0.0)]
+    obj = make_polygon_object(points, [])
+    doc.InsertObject(obj)
+    tag = obj.MakeTag(c4d.Tweights)
+    for joint in (root, left, right):
+        tag.AddJoint(joint)
+    count = len(points)
+    tag.SetWeightMap(0, [0.5] * count)
+    tag.SetWeightMap(1, [i / 20.0 if i < 9 else 0.0 for i in range(count)])
+    tag.SetWeightMap(2, [0.25 if i < 9 else 0.0 for i in range(count)])
+
+    written = []
+    set_weight_map = tag.SetWeightMap
+    tag.SetWeightMap = lambda index, weights: written.append(index) or set_weight_map(index, weights)
+
+    mirror_weights.mirror_weights(doc, obj)
+
+    # The root weights are symmetric already and not written again
+    assert sorted(written) == [1, 2]
+    for i in range(9):
+        target = 17 - i
+        assert tag.GetWeight(0, target) == pytest.approx(0.5)
+        assert tag.GetWeight(1, target) == pytest.approx(0.25)
+        assert tag.GetWeight(2, target) == pytest.approx(i / 20.0)
+    assert tag.GetWeight(0, 18) == pytest.approx(0.5)
+    assert obj.GetPointS().IsSelected(18)
+
+
+def test_pairs_by_name(mirror_joints, doc):
+    root = make_joint("root", doc=doc)
+    joints = [root]
+    for name in ("arm left", "arm right", "hand_L", "hand_R", "spine", "Leg.l", "Leg.r"):
+        joints.append(make_joint(name, root))
+
+    pairs = mirror_joints.find_pairs_by_name(joints)
+
+    assert [(a.GetName(), b.GetName()) for a, b in pairs] == [
+        ("arm right", "arm left"), ("hand_R", "hand_L"), ("Leg.r", "Leg.l")]
+
+
+def test_pairs_by_position(mirror_joints, doc):
+    root = make_joint("root", doc=doc)
+    pairs = []
+    for k, x in enumerate((10.0, 20.0, 30.0)):
+        positive = make_joint("a%d" % k, root, position=(x, k, 0.0))
+        negative = make_joint("b%d" % k, root, position=(-x - 0.01, k, 0.0))
+        pairs.append((negative, positive))
+    unmatched = make_joint("c", root, position=(-50.0, 0.0, 0.0))
+
+    found = mirror_joints.find_pairs_by_position([root, unmatched] + [j for pair in pairs for j in pair])
+
+    assert sorted(found, key=lambda pair: pair[0].GetName()) == pairs
+
+
+def test_pairs_by_position_prefer_closest(mirror_joints, doc):
+    root = make_joint("root", doc=doc)
+    source = make_joint("source", make_joint("parent", root, position=(-10.0, 5.0, 0.0)), position=(0.0, -5.0, 0.0))
+    # Same depth as the source but further away than the exact mirror one level up
+    further = make_joint("further", make_joint("other", root, position=(10.0, 5.0, 0.0)), position=(0.05, -5.0, 0.0))
+    exact = make_joint("exact", root, position=(10.0, 0.0, 0.0))
+
+    found = mirror_joints.find_pairs_by_position([source, further, exact])
+
+    assert found == [(source, exact)]
@@ -0,0 +1,148 @@
+import struct
+
+import c4d
+import pytest
+
+from conftest import load_script
+from helpers import make_grid, make_joint, make_polygon_object
+
+# Polygons of the 3x3 grid for every material, the last one has no restriction
+MATERIALS = [("red", [0, 1, 2]), ("blue", [4, 8]), ("base", None)]
+
+
+@pytest.fixture
+def split(doc, use_numpy):
+    return load_script("scripts/SelectionToObject.py", doc, numpy=use_numpy)
+
+
+def make_source(doc):
+    points, polygons = make_grid(3, 3)
+    obj = make_polygon_object(points, polygons, "source")
+    uvw = obj.MakeVariableTag(c4d.Tuvw, len(polygons))
+    for i in range(len(polygons)):
+        uvw.SetSlow(i, c4d.Vector(i, 0, 0), c4d.Vector(i, 1, 0), c4d.Vector(i, 2, 0), c4d.Vector(i, 3, 0))
+    # Stores the source index of every point, to follow the points into the parts
+    obj.MakeVariableTag(c4d.Tvertexmap, len(points)).SetAllHighlevelData([i / 16.0 for i in range(len(points))])
+    weights = obj.MakeTag(c4d.Tweights)
+    weights.AddJoint(make_joint("joint", doc=doc))
+    weights.SetWeightMap(0, [i / 16.0 for i in range(len(points))])
+
+    for name, polys in MATERIALS:
+        material = c4d.BaseMaterial(5703)
+        material.SetName(name)
+        texture = obj.MakeTag(c4d.Ttexture)
+        texture[c4d.TEXTURETAG_MATERIAL] = material
+        if polys is not None:
+            selection = obj.MakeTag(c4d.Tpolygonselection)
+            selection.SetName(name + " selection")
+            for i in polys:
+                selection.GetBaseSelect().Select(i)
+            texture[c4d.TEXTURETAG_RESTRICTION] = name + " selection"
+    doc.InsertObject(obj)
+    return obj, points, polygons
+
+
+def check_parts(null, points, polygons):
+    parts = {part.GetTag(c4d.Ttexture)[c4d.TEXTURETAG_MATERIAL].GetName(): part for part in null.GetChildren()}
+    assert sorted(parts) == sorted(name for name, polys in MATERIALS)
+    for name, polys in MATERIALS:
+        part = parts[name]
+        polys = range(len(polygons)) if polys is None else polys
+        source_index = [int(round(v * 16)) for v in part.GetTag(c4d.Tvertexmap).GetAllHighlevelData()]
+
+        assert part.GetPolygonCount() == len(polys)
+        assert [part.GetPoint(i) for i in range(part.GetPointCount())] == [c4d.Vector(*points[k]) for k in source_index]
+        assert [int(round(v * 16)) for v in part.GetTag(c4d.Tweights).GetWeightMap(0)] == source_index
+        for i, k in enumerate(polys):
+            assert [source_index[n] for n in part.GetPolygon(i).tuple()] == list(polygons[k])
+            assert part.GetTag(c4d.Tuvw).GetSlow(i)["a"].x == k
+
+
+def test_split_per_material(split, doc):
+    obj, points, polygons = make_source(doc)
+
+    null = split.proceedObject(obj, 0, len(MATERIALS))
+
+    assert null.GetName() == "source"
+    check_parts(null, points, polygons)
+
+
+def test_parts_prepared_on_threads(split, doc):
+    sources = [make_source(doc) for _ in range(3)]
+
+    part_data = dict(split.prepareParts([obj for obj, points, polygons in sources], maxWorkers=2))
+
+    assert sorted(part_data) == [0, 1, 2]
+    for k, (obj, points, polygons) in enumerate(sources):
+        check_parts(split.proceedObject(obj, 0, len(MATERIALS), partData=part_data[k]), points, polygons)
+
+
+def test_parts_are_built_before_all_objects_are_read(split, doc, monkeypatch):
+    sources = [make_source(doc)[0] for _ in range(5)]
+    events = []
+    read_source = split.readSource
+    monkeypatch.setattr(split, "readSource", lambda obj: events.append("read") or read_source(obj))
+
+    for k, data in split.prepareParts(sources, maxWorkers=1, readAhead=2):
+        events.append("built")
+
+    assert events.count("read") == events.count("built") == 5
+    ahead = [events[:n].count("read") - events[:n].count("built") for n in range(len(events))]
+    assert max(ahead) == 2
+
+
+def test_main_replaces_object(split, doc):
+    obj, points, polygons = make_source(doc)
+    doc.SetActiveObject(obj)
+
+    assert split.main()
+
+    null = doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_NONE)[0]
+    assert null.CheckType(c4d.Onull)
+    assert obj.GetUp() is None and obj not in doc.GetObjects()
+    assert len(null.GetChildren()) == len(MATERIALS)
+
+
+def test_per_polygon_vertex_colors_follow_the_polygons(split, doc):
+    obj, points, polygons = make_source(doc)
+    colors = obj.MakeTag(c4d.Tvertexcolor)
+    colors.SetPerPointMode(False)
+    buffer = colors.GetLowlevelDataAddressW()
+    for i in range(len(polygons)):
+        buffer[i * 64:(i + 1) * 64] = struct.pack("16f", *[i] * 16)
+
+    null = split.proceedObject(obj, 0, len(MATERIALS))
+
+    check_parts(null, points, polygons)
+    for part in null.GetChildren():
+        tag = part.GetTag(c4d.Tvertexcolor)
+        assert not tag.IsPerPointColor()
+        assert tag.GetDataCount() == part.GetPolygonCount()
+        first = [struct.unpack_from("f", tag.GetLowlevelDataAddressR(), i * 64)[0] for i in range(part.GetPolygonCount())]
+        assert [part.GetTag(c4d.Tuvw).GetSlow(i)["a"].x for i in range(part.GetPolygonCount())] == first
+
+
+def test_unsliceable_tag_falls_back_to_split_command(split, doc, monkeypatch, capsys):
+    obj, points, polygons = make_source(doc)
+    tag = obj.MakeTag(c4d.Tvertexcolor)
+    tag.SetName("odd")
+    tag._resize(len(points) + 1)
+    monkeypatch.setattr(split, "splitPerTexture", lambda obj, progress, numAllTextures: [c4d.PolygonObject(0, 0)])
+
+    null = split.proceedObject(obj, 0, len(MATERIALS))
+    part_data = dict(split.prepareParts([obj]))
+
+    assert "Tag odd can't be split per polygon" in capsys.readouterr().out
+    assert len(null.GetChildren()) == 1
+    assert part_data[0][1] is None
+    assert len(split.proceedObject(obj, 0, len(MATERIALS), partData=part_data[0]).GetChildren()) == 1
+
+
+def test_weights_are_read_per_joint(split, doc, use_numpy):
+    obj, points, polygons = make_source(doc)
+
+    weights = [data for tag, tagType, kind, data in split.readTags(obj) if kind == "weights"][0]
+
+    assert len(weights) == 1 and len(weights[0]) == len(points)
+    if use_numpy:
+        assert weights[0].dtype == "float32"
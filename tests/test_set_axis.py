@@ -0,0 +1,92 @@
+import random
+import struct
+
+import c4d
+import pytest
+
+from conftest import load_script
+from helpers import make_polygon_object
+
+
+@pytest.fixture
+def set_axis(doc, use_numpy):
+    return load_script("scripts/Set Axis.py", doc, numpy=use_numpy)
+
+
+def make_scene(doc, count=3):
+    """Chain of objects with rotation, non-uniform scale and random normals."""
+    rng = random.Random(5)
+    objs = []
+    for k in range(count):
+        points = [(rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(40)]
+        obj = make_polygon_object(points, [(i * 4, i * 4 + 1, i * 4 + 2, i * 4 + 3) for i in range(10)], "obj%d" % k)
+        normals = []
+        for _ in range(40):
+            n = c4d.Vector(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)).GetNormalized()
+            normals += [int(n.x * 32000), int(n.y * 32000), int(n.z * 32000)]
+        obj.MakeTag(c4d.Tnormal).GetLowlevelDataAddressW()[:] = struct.pack("120h", *normals)
+        if objs:
+            obj.InsertUnder(objs[-1])
+        else:
+            doc.InsertObject(obj)
+        mg = c4d.utils.HPBToMatrix(c4d.Vector(0.3 * k, 0.7, -0.2))
+        mg.off = c4d.Vector(10 * k, -3, 2)
+        mg.v1 *= 2.0
+        mg.v2 *= 0.5
+        obj.SetMg(mg)
+        objs.append(obj)
+    return objs
+
+
+def world_points(obj):
+    mg = obj.GetMg()
+    return [mg * p for p in obj.GetAllPoints()]
+
+
+def world_normals(set_axis, obj):
+    normalMatrix = set_axis.transpose_matrix(~c4d.Matrix(v1=obj.GetMg().v1, v2=obj.GetMg().v2, v3=obj.GetMg().v3))
+    values = struct.unpack("120h", bytes(obj.GetTag(c4d.Tnormal).GetLowlevelDataAddressR()))
+    return [normalMatrix.MulV(c4d.Vector(*values[i:i + 3])).GetNormalized() for i in range(0, len(values), 3)]
+
+
+def assert_same_geometry(set_axis, objs, points, normals):
+    for obj, before_points, before_normals in zip(objs, points, normals):
+        for p, q in zip(world_points(obj), before_points):
+            assert (p - q).GetLength() < 1e-6
+        for n, m in zip(world_normals(set_axis, obj), before_normals):
+            assert (n - m).GetLength() < 1e-3
+
+
+@pytest.mark.parametrize("axis_target", ["psr", "bbox_center", "bottom_center", "world_origin"])
+def test_axis_moves_without_moving_geometry(set_axis, doc, axis_target):
+    objs = make_scene(doc)
+    points = [world_points(obj) for obj in objs]
+    normals = [world_normals(set_axis, obj) for obj in objs]
+    mg_target = set_axis.psr_to_matrix(c4d.Vector(1, 2, 3), c4d.Vector(1, 1, 1), c4d.Vector(0, 45, 0))
+
+    target = set_axis.GetAxisTarget(objs[1], mg_target, axis_target)
+    set_axis.TransferAxisTo(objs[1], target)
+
+    assert (objs[1].GetMg().off - target.off).GetLength() < 1e-9
+    assert_same_geometry(set_axis, objs, points, normals)
+
+
+def test_batch_matches_single_objects(doc):
+    pytest.importorskip("numpy")
+    mg_target = c4d.Matrix()
+    results = []
+    for batch in (False, True):
+        set_axis = load_script("scripts/Set Axis.py", doc)
+        objs = make_scene(doc)
+        points = [world_points(obj) for obj in objs]
+        normals = [world_normals(set_axis, obj) for obj in objs]
+        if batch:
+            set_axis.TransferAxes(objs, mg_target, "bbox_center", maxWorkers=2)
+        else:
+            for obj in objs:
+                set_axis.TransferAxisTo(obj, set_axis.GetAxisTarget(obj, mg_target, "bbox_center"))
+        assert_same_geometry(set_axis, objs, points, normals)
+        results.append([obj.GetMg().off for obj in objs])
+
+    for single, batch in zip(*results):
+        assert (single - batch).GetLength() < 1e-6
@@ -0,0 +1,263 @@
+import random
+
+import c4d
+import pytest
+
+from conftest import load_script
+from helpers import make_grid, make_joint, make_polygon_object
+
+
+@pytest.fixture
+def transfer(doc, use_numpy):
+    return load_script("scripts/Point based weight tag transfer.py", doc, numpy=use_numpy)
+
+
+def make_weighted_object(doc, points, joints):
+    obj = make_polygon_object(points, [])
+    doc.InsertObject(obj)
+    tag = obj.MakeTag(c4d.Tweights)
+    for joint in joints:
+        tag.AddJoint(joint)
+    count = len(points)
+    tag.SetWeightMap(0, [i / count for i in range(count)])
+    tag.SetWeightMap(1, [1 - i / count for i in range(count)])
+    return obj, tag
+
+
+def run_transfer(transfer, doc, source, target):
+    transfer.TransferWeights(doc, [source], transfer.GetSourceData([source]), target, 0.01,
+                             False, False, 0.0, 0, True)
+    return target.GetTag(c4d.Tweights)
+
+
+def test_same_points_copy_weights(transfer, doc):
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc)]
+    points = [(i, (i * 7) % 5, (i * 3) % 11) for i in range(50)]
+    source, weights = make_weighted_object(doc, points, joints)
+    target = make_polygon_object(points, [])
+    doc.InsertObject(target)
+
+    result = run_transfer(transfer, doc, source, target)
+
+    assert [result.GetJoint(i) for i in range(2)] == joints
+    for i in range(2):
+        assert result.GetWeightMap(i) == pytest.approx(weights.GetWeightMap(i), abs=1e-6)
+
+
+def test_same_points_copy_weights_without_cleanup(transfer, doc, monkeypatch):
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc)]
+    points = [(i, 0, 0) for i in range(10)]
+    source, weights = make_weighted_object(doc, points, joints)
+    weights.SetWeightMap(1, [0.25] * 10)
+    target = make_polygon_object(points, [])
+    doc.InsertObject(target)
+    tag = target.MakeTag(c4d.Tweights)
+    for joint in reversed(joints):
+        tag.AddJoint(joint)
+    if transfer.np is not None:
+        monkeypatch.setattr(transfer.SparseWeights, "Gather", None)
+        monkeypatch.setattr(transfer.SparseWeights, "Normalize", None)
+
+    run_transfer(transfer, doc, source, target)
+
+    # Not normalized, and joint a is the second joint of the dest tag
+    assert tag.GetWeightMap(1) == pytest.approx(weights.GetWeightMap(0), abs=1e-6)
+    assert tag.GetWeightMap(0) == pytest.approx([0.25] * 10)
+
+
+def test_closest_point_weights(transfer, doc):
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc)]
+    points = [(x * 10.0, 0.0, z * 10.0) for z in range(6) for x in range(6)]
+    source, weights = make_weighted_object(doc, points, joints)
+
+    # Shuffled and moved a little, every point still has a single closest source point
+    rng = random.Random(4)
+    order = list(range(len(points)))
+    rng.shuffle(order)
+    moved = [(points[i][0] + rng.uniform(-1, 1), 0.5, points[i][2] + rng.uniform(-1, 1)) for i in order]
+    target = make_polygon_object(moved, [])
+    doc.InsertObject(target)
+
+    result = run_transfer(transfer, doc, source, target)
+
+    for i in range(2):
+        expected = [weights.GetWeightMap(i)[k] for k in order]
+        assert result.GetWeightMap(i) == pytest.approx(expected, abs=1e-6)
+
+
+def make_constant_weights(doc, points, joints, values):
+    obj = make_polygon_object(points, [])
+    doc.InsertObject(obj)
+    tag = obj.MakeTag(c4d.Tweights)
+    for joint, value in zip(joints, values):
+        tag.SetWeightMap(tag.AddJoint(joint), [value] * len(points))
+    return obj
+
+
+def test_multiple_sources_joined_by_joint_name(transfer, doc):
+    a, b, c = (make_joint(name, doc=doc) for name in "abc")
+    body = make_constant_weights(doc, [(x, 0, 0) for x in range(10)], [a, b], [0.25, 0.75])
+    hand = make_constant_weights(doc, [(x, 0, 0) for x in range(20, 30)], [b, c], [0.4, 0.6])
+    points = [(x + 0.3, 0.2, 0.0) for x in (0, 25, 4, 29, 9, 21)]
+    target = make_polygon_object(points, [])
+    doc.InsertObject(target)
+
+    transfer.TransferWeights(doc, [body, hand], transfer.GetSourceData([body, hand]), target, 1.0,
+                             False, False, 0.0, 0, True)
+
+    result = target.GetTag(c4d.Tweights)
+    assert [result.GetJoint(i).GetName() for i in range(3)] == ["a", "b", "c"]
+    on_body = [x < 10 for x, y, z in points]
+    assert result.GetWeightMap(0) == pytest.approx([0.25 if body else 0.0 for body in on_body])
+    assert result.GetWeightMap(1) == pytest.approx([0.75 if body else 0.4 for body in on_body])
+    assert result.GetWeightMap(2) == pytest.approx([0.0 if body else 0.6 for body in on_body])
+
+
+def test_surface_mode_blends_triangle_corners(doc):
+    pytest.importorskip("numpy")
+    transfer = load_script("scripts/Point based weight tag transfer.py", doc)
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc)]
+    points, polygons = make_grid(4, 4, size=10.0)
+    source = make_polygon_object(points, polygons)
+    doc.InsertObject(source)
+    tag = source.MakeTag(c4d.Tweights)
+    for joint in joints:
+        tag.AddJoint(joint)
+    # Weights linear in x are reproduced exactly by the blend of any triangle
+    tag.SetWeightMap(0, [x / 40.0 for x, y, z in points])
+    tag.SetWeightMap(1, [1.0 - x / 40.0 for x, y, z in points])
+    rng = random.Random(5)
+    moved = [(rng.uniform(0, 40), 0.5, rng.uniform(0, 40)) for _ in range(60)]
+    target = make_polygon_object(moved, [])
+    doc.InsertObject(target)
+
+    transfer.TransferWeights(doc, [source], transfer.GetSourceData([source]), target, 1.0,
+                             True, False, 0.0, 0, True)
+
+    result = target.GetTag(c4d.Tweights)
+    assert result.GetWeightMap(0) == pytest.approx([x / 40.0 for x, y, z in moved], abs=1e-5)
+    assert result.GetWeightMap(1) == pytest.approx([1.0 - x / 40.0 for x, y, z in moved], abs=1e-5)
+
+
+def test_bvh_matches_brute_force():
+    np = pytest.importorskip("numpy")
+    transfer = load_script("scripts/Point based weight tag transfer.py")
+    rng = np.random.default_rng(6)
+    points = rng.uniform(-10, 10, (300, 3))
+    triangles = rng.integers(0, len(points), (100, 3))
+    queries = rng.uniform(-12, 12, (200, 3))
+
+    hit, blend, dist = transfer.TriangleBVH(points, triangles, leafSize=4).Closest(queries, batchSize=64)
+
+    corners = points[triangles]
+    for q, query in enumerate(queries):
+        repeated = np.repeat(query[None], len(triangles), axis=0)
+        bary = transfer.ClosestPointOnTriangles(repeated, corners[:, 0], corners[:, 1], corners[:, 2])
+        closest = np.einsum("ij,ijk->ik", bary, corners)
+        expected = ((closest - query) ** 2).sum(axis=1).min()
+        assert dist[q] == pytest.approx(expected)
+        surface_point = blend[q] @ corners[hit[q]]
+        assert ((surface_point - query) ** 2).sum() == pytest.approx(expected)
+
+
+def test_source_data_is_cached_until_the_source_changes(transfer, doc):
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc)]
+    source, tag = make_weighted_object(doc, [(i, 0, 0) for i in range(10)], joints)
+
+    data = transfer.GetSourceData([source])
+    weights = data.GetWeights([tag], doc)
+    assert transfer.GetSourceData([source]) is data
+    assert data.GetWeights([tag], doc) is weights
+
+    tag.SetWeightMap(0, [0.5] * 10)
+    assert data.GetWeights([tag], doc) is not weights
+
+    source.SetMg(c4d.Matrix(c4d.Vector(0, 5, 0)))
+    moved = transfer.GetSourceData([source])
+    assert moved is not data
+    assert moved.points[0] == (0.0, 5.0, 0.0)
+
+
+def test_existing_tag_is_cleared_of_unmatched_joints(transfer, doc, capsys):
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc), make_joint("c", doc=doc)]
+    points = [(i, 0, 0) for i in range(20)]
+    source, weights = make_weighted_object(doc, points, joints[:2])
+    weights.AddJoint(joints[2])
+    weights.SetWeightMap(2, [0.0] * 20)
+    target = make_polygon_object(points, [])
+    doc.InsertObject(target)
+    old = target.MakeTag(c4d.Tweights)
+    extra = make_joint("extra", doc=doc)
+    for joint in (joints[0], joints[1], extra):
+        old.AddJoint(joint)
+    old.SetWeightMap(2, [1.0] * 20)
+
+    result = run_transfer(transfer, doc, source, target)
+
+    maps = [result.GetWeightMap(i) for i in range(result.GetJointCount())]
+    assert maps[2] == [0.0] * 20
+    assert [sum(weights) for weights in zip(*maps)] == pytest.approx([1.0] * 20)
+    out = capsys.readouterr().out
+    assert "1 source joints are not in the dest tag" in out and ": c" in out
+
+
+@pytest.fixture
+def sparse():
+    pytest.importorskip("numpy")
+    transfer = load_script("scripts/Point based weight tag transfer.py")
+    np = transfer.np
+    # 3 points, 4 joints
+    dense = np.array([[0.5, 0.3, 0.15, 0.05],
+                      [0.0, 0.0, 0.0, 0.0],
+                      [0.01, 0.6, 0.0, 0.2]], dtype=np.float32)
+    points, joints = np.nonzero(dense)
+    return transfer.SparseWeights.FromEntries(3, 4, points, joints, dense[points, joints]), dense
+
+
+def to_dense(weights):
+    import numpy as np
+    dense = np.zeros((weights.pointCount, weights.jointCount), dtype=np.float32)
+    dense[weights.RowOfEntries(), weights.joints] = weights.values
+    return dense
+
+
+def test_sparse_prune(sparse):
+    weights, dense = sparse
+
+    weights.Prune(0.1)
+
+    assert to_dense(weights) == pytest.approx(dense * (dense >= 0.1))
+
+
+def test_sparse_limit_influences(sparse):
+    weights, dense = sparse
+
+    weights.LimitInfluences(2)
+
+    expected = [0.5, 0.3, 0.0, 0.0] + [0.0] * 4 + [0.0, 0.6, 0.0, 0.2]
+    assert to_dense(weights).ravel().tolist() == pytest.approx(expected)
+
+
+def test_sparse_normalize(sparse):
+    weights, dense = sparse
+    weights.LimitInfluences(2)
+
+    weights.Normalize()
+
+    assert to_dense(weights).sum(axis=1).tolist() == pytest.approx([1.0, 0.0, 1.0])
+    assert to_dense(weights)[2].tolist() == pytest.approx([0.0, 0.75, 0.0, 0.25])
+
+
+def test_source_data_is_rebuilt_when_a_parent_moves(transfer, doc):
+    joints = [make_joint("a", doc=doc), make_joint("b", doc=doc)]
+    source, tag = make_weighted_object(doc, [(i, 0, 0) for i in range(10)], joints)
+    parent = c4d.BaseObject(c4d.Onull)
+    doc.InsertObject(parent)
+    source.InsertUnder(parent)
+    data = transfer.GetSourceData([source])
+
+    parent.SetAbsPos(c4d.Vector(100, 0, 0))
+
+    moved = transfer.GetSourceData([source])
+    assert moved is not data
+    assert moved.points[0] == (100.0, 0.0, 0.0)